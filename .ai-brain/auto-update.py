@@ -9,17 +9,1641 @@ import os
 import json
 import re
 import ast
+import math
+import stat
+import heapq
+import pstats
+import cProfile
+import hashlib
+import posixpath
+import sqlite3
+import argparse
+import bisect
+import tempfile
+import threading
+import time
+from collections import deque
+from collections.abc import Mapping
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from itertools import groupby, islice
 from pathlib import Path
 
+# Watchdog jest opcjonalny - potrzebny tylko w trybie --watch
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+    WATCHDOG_AVAILABLE = True
+except ImportError:
+    WATCHDOG_AVAILABLE = False
+
+# Wersja analizatora - zmiana unieważnia zapisane wyniki analizy plików
+ANALYZER_VERSION = 5
+
+
+def batched(iterable, size):
+    """Dzieli strumień na listy po size elementów (ostatnia może być krótsza)."""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def file_fingerprint(filepath, st, with_hash=False, digest=None):
+    """Zwraca odcisk pliku (rozmiar, mtime_ns i opcjonalnie hash treści).
+
+    digest - SHA-1 treści już wczytanej przez wywołującego; bez niego plik jest czytany ponownie.
+    """
+    fingerprint = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'analyzer': ANALYZER_VERSION}
+    if with_hash:
+        fingerprint['hash'] = digest or content_hash(filepath)
+    return fingerprint
+
+
+@contextmanager
+def atomic_open(path):
+    """Otwiera plik tymczasowy obok `path` do zapisu; po sukcesie podmienia go atomowo (os.replace).
+
+    Edytor/Copilot nigdy nie widzi w połowie zapisanego pliku, a przy błędzie stary plik zostaje.
+    """
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            yield f
+        try:
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+        except OSError:
+            mode = 0o644
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def content_hash(filepath):
+    """Liczy hash SHA-1 treści pliku (czytanego blokami)."""
+    digest = hashlib.sha1()
+    try:
+        with open(filepath, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 16), b''):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+def _gitignore_pattern_to_regex(pattern):
+    """Tłumaczy wzorzec .gitignore (bez '!' i końcowego '/') na wyrażenie regularne."""
+    anchored = '/' in pattern
+    pattern = pattern.lstrip('/')
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if pattern.startswith('**/', i):
+            out.append('(?:.*/)?')
+            i += 3
+            continue
+        if pattern.startswith('**', i):
+            out.append('.*')
+            i += 2
+            continue
+        if c == '*':
+            out.append('[^/]*')
+        elif c == '?':
+            out.append('[^/]')
+        elif c == '[':
+            j = pattern.find(']', i + 1)
+            if j == -1:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:j]
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                out.append(f'[{body}]')
+                i = j
+        elif c == '\\' and i + 1 < n:
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    prefix = '' if anchored else '(?:.*/)?'
+    return re.compile(f'^{prefix}{"".join(out)}$')
+
+
+class GitIgnoreRules:
+    """Skompilowane reguły jednego pliku .gitignore (względem jego katalogu)."""
+
+    def __init__(self, base, lines):
+        self.base = base  # katalog .gitignore względem korzenia ('' dla korzenia)
+        self.rules = []
+        for line in lines:
+            line = line.rstrip('\n').rstrip()
+            if not line or line.startswith('#'):
+                continue
+            negate = line.startswith('!')
+            if negate:
+                line = line[1:]
+            dir_only = line.endswith('/')
+            line = line.rstrip('/')
+            if line:
+                self.rules.append((_gitignore_pattern_to_regex(line), negate, dir_only))
+
+    @classmethod
+    def from_file(cls, path, base):
+        try:
+            with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+                return cls(base, f.readlines())
+        except OSError:
+            return None
+
+    def match(self, rel_path, is_dir):
+        """Zwraca True (ignorowany), False (przywrócony przez '!') lub None (brak dopasowania)."""
+        if self.base:
+            if not rel_path.startswith(self.base + '/'):
+                return None
+            rel_path = rel_path[len(self.base) + 1:]
+        result = None
+        for regex, negate, dir_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(rel_path):
+                result = not negate
+        return result
+
+
+# --- Ekstraktor symboli JS/JSX/TS/TSX (jedno przejście) ---
+
+# Identyfikator nie oddaje znaków przy cofaniu (bez kwantyfikatorów zaborczych - działa przed Pythonem 3.11)
+_JS_ID = r'[A-Za-z_$][\w$]*(?![\w$])'
+# Deklaracja zaczyna się na początku linii. Wzorzec startuje od '\n', więc silnik regex szuka
+# kolejnych znaków nowej linii szybkim wyszukiwaniem literału, a linie, których pierwsza litera
+# nie może rozpocząć słowa kluczowego (import, export, function, class, const, ...), odrzuca
+# jednym sprawdzeniem klasy znaków - Python widzi tylko dopasowane deklaracje. Wcięcie jest
+# pobierane lookaheadem i odwołaniem (?P=indent), czyli atomowo: odrzucona linia nie cofa się po
+# spacjach wcięcia, a wzorzec nie potrzebuje składni zaborczej z Pythona 3.11.
+_JS_DECLARATION = re.compile(r'''
+    \n(?=(?P<indent>[ \t]*))(?P=indent)(?=[acdefilntv][abelmnosuxy][acmnprstuy])(?:
+        (?P<reexport>export\s+(?:type\s+)?(?:\*(?:\s+as\s+(?P<reexport_ns>''' + _JS_ID + r'''))?|\{(?P<reexport_names>[^}]*)\})
+            \s*from\s*['"](?P<reexport_src>[^'"\n]+)['"])
+      | (?P<import>import\s+(?:type\s+)?(?:[\w$*{}\s,]+?\s*from\s*)?['"](?P<import_src>[^'"\n]+)['"])
+      | (?P<exportlist>export\s*\{(?P<export_names>[^}]*)\})
+      | (?P<decl>(?P<export>export\s+(?P<default>default\s+)?)?(?:declare\s+)?(?:abstract\s+)?(?:async\s+)?
+            (?:(?P<kind>function\s*\*?|class|interface|type|enum|const\s+enum|namespace)|(?P<variable>const|let|var))
+            \s+(?P<name>''' + _JS_ID + r''')
+            # Zmienna jest symbolem tylko gdy jest funkcją/komponentem lub jest eksportowana
+            (?(variable)(?:(?P<assign>\s*(?::[^=;\n]+?)?=\s*(?:
+                (?P<fn_expr>(?:async\s+)?function\b)
+              | (?P<wrapped>(?:React\.)?(?:memo|forwardRef)\s*(?:<[^>\n]*>)?\s*\()
+              | (?P<arrow>(?:async\s+)?''' + _JS_ID + r'''\s*=>)
+              # '(' listy parametrów - domknięcie i '=>' sprawdza _js_arrow_params (nawiasy mogą się zagnieżdżać)
+              | (?P<arrow_params>(?:async\s*)?(?:<[^>\n]*>\s*)?\()
+            ))|(?(export)|(?!)))))
+      | (?P<default_expr>export\s+default\s+(?P<default_name>''' + _JS_ID + r'''))
+    )
+''', re.VERBOSE)
+# import('x') / require('x') w dowolnym miejscu kodu. Wzorzec zaczyna się od literału '(' (szybkie
+# wyszukiwanie), a słowo kluczowe sprawdzają lookbehindy - wiodące \b wyłączałoby tę optymalizację.
+_JS_CALL = re.compile(r'''\((?:(?<=(?<![\w$])import\()|(?<=(?<![\w$])require\())['"`](?P<call>[^'"`\n]*)''')
+# Kod od początku linii bez komentarza // i bez otwartego napisu (pętle rozwinięte - bez cofania)
+_JS_LINE_CODE = re.compile(r'''(?:[^'"/\n]+|/(?![/*])|'[^'\\\n]*(?:\\.[^'\\\n]*)*'|"[^"\\\n]*(?:\\.[^"\\\n]*)*")*''')
+# Tekst template literalu do ` lub ${ oraz kod wyrażenia ${...} do nawiasu, napisu lub `
+_JS_TEMPLATE_TEXT = re.compile(r'[^`\\$]*(?:(?:\\.|\$(?!\{))[^`\\$]*)*', re.DOTALL)
+_JS_EXPRESSION = re.compile(r'''[^{}`'"]*''')
+_JS_STRING = re.compile(r'''('|")(?:(?!\1)[^\\\n]|\\.)*\1?''')
+# Kod listy parametrów do nawiasu, napisu, template literalu lub komentarza; typ zwracany przed '=>'
+_JS_PARAMS_CODE = re.compile(r'''[^()'"`/]*''')
+_JS_ARROW_TAIL = re.compile(r'\s*(?::[^=;{]+?)?=>')
+
+
+def _js_in_code(text, pos):
+    """Czy pozycja leży w kodzie swojej linii (nie w napisie i nie za //)."""
+    return _JS_LINE_CODE.match(text, text.rfind('\n', 0, pos) + 1, pos).end() == pos
+
+
+def _js_template_end(text, pos):
+    """Koniec template literalu otwartego przed `pos`, z zagnieżdżonymi ${...} i `...` w środku."""
+    size = len(text)
+    while True:
+        pos = _JS_TEMPLATE_TEXT.match(text, pos).end()
+        if pos >= size:
+            return size
+        if text[pos] == '`':
+            return pos + 1
+        # ${ wyrażenie } - do domykającego nawiasu, z pominięciem napisów i zagnieżdżonych template
+        pos += 2
+        depth = 1
+        while depth and pos < size:
+            pos = _JS_EXPRESSION.match(text, pos).end()
+            if pos >= size:
+                break
+            char = text[pos]
+            if char == '`':
+                pos = _js_template_end(text, pos + 1)
+            elif char in '\'"':
+                pos = _JS_STRING.match(text, pos).end()
+            else:
+                depth += 1 if char == '{' else -1
+                pos += 1
+
+
+def _js_arrow_params(text, pos):
+    """Czy lista parametrów otwarta tuż przed `pos` jest funkcją strzałkową.
+
+    Nawiasy są zliczane z pominięciem napisów, template literali i komentarzy, więc
+    `({ onClose = () => {} }: { onClose: () => void }) =>` jest rozpoznawane tak jak `(x) =>`.
+    """
+    size, depth = len(text), 1
+    while depth:
+        pos = _JS_PARAMS_CODE.match(text, pos).end()
+        if pos >= size:
+            return False
+        char = text[pos]
+        if char == '(' or char == ')':
+            depth += 1 if char == '(' else -1
+            pos += 1
+        elif char == '`':
+            pos = _js_template_end(text, pos + 1)
+        elif char != '/':
+            pos = _JS_STRING.match(text, pos).end()
+        elif text.startswith('//', pos):
+            pos = text.find('\n', pos)
+            if pos == -1:
+                return False
+        elif text.startswith('/*', pos):
+            pos = text.find('*/', pos + 2)
+            if pos == -1:
+                return False
+            pos += 2
+        else:
+            pos += 1
+    return _JS_ARROW_TAIL.match(text, pos) is not None
+
+
+def _js_masked_spans(text):
+    """Kolejne zakresy (start, koniec) komentarzy blokowych i template literali - jedynych
+    konstrukcji, w których może leżeć cała linia wyglądająca jak deklaracja.
+
+    Otwarcia /* i ` są wyszukiwane przez str.find; otwarcie wewnątrz napisu lub komentarza //
+    (sprawdzane tylko od początku jego linii) jest pomijane. Generator: wywołujący pobiera
+    zakresy tylko do ostatniej deklaracji, więc JSX za nią nie jest w ogóle analizowany.
+    """
+    find = text.find
+    comment, template = find('/*'), find('`')
+    while comment != -1 or template != -1:
+        start = comment if template == -1 or (comment != -1 and comment < template) else template
+        if not _js_in_code(text, start):
+            end = start + 1
+        elif start == comment:
+            end = find('*/', start + 2)
+            end = len(text) if end == -1 else end + 2
+            yield start, end
+        else:
+            end = _js_template_end(text, start + 1)
+            yield start, end
+        if comment != -1 and comment < end:
+            comment = find('/*', end)
+        if template != -1 and template < end:
+            template = find('`', end)
+
+
+_JS_TYPE_KINDS = {'interface': 'interface', 'type': 'type', 'enum': 'enum', 'const enum': 'enum',
+                  'namespace': 'namespace'}
+
+
+def _js_export_names(names):
+    """Wyciąga nazwy z listy `{ a, b as c, type D }` (nazwa widoczna na zewnątrz)."""
+    result = []
+    for part in names.split(','):
+        part = part.strip()
+        if part.startswith('type '):
+            part = part[5:].strip()
+        if not part:
+            continue
+        result.append(part.split(' as ')[-1].strip())
+    return result
+
+
+def extract_js_symbols(content):
+    """Zbiera importy, eksporty, funkcje, komponenty, klasy i typy z kodu JS/JSX/TS/TSX.
+
+    Deklaracje to dopasowania _JS_DECLARATION na początkach linii; linie leżące wewnątrz
+    komentarzy blokowych i template literali (_js_masked_spans) są odrzucane, a numery linii
+    liczone przyrostowo od poprzedniej deklaracji.
+    """
+    symbols = {'imports': [], 'exports': [], 'functions': [], 'classes': [], 'types': []}
+    imports, exports = symbols['imports'], symbols['exports']
+    functions, classes, types = symbols['functions'], symbols['classes'], symbols['types']
+    # Wiodący '\n' pozwala rozpoznać deklarację także w pierwszej linii pliku
+    text = '\n' + content
+    spans = _js_masked_spans(text)
+    span = next(spans, None)
+    line, last_pos = 0, 0
+
+    # import('x') / require('x'): rzadkie, więc sprawdzane osobno i tylko gdy w ogóle występują
+    calls = []
+    if 'import(' in content or 'require(' in content:
+        masked = list(_js_masked_spans(text))
+        masked_starts = [start for start, _ in masked]
+        for match in _JS_CALL.finditer(text):
+            pos = match.start()
+            i = bisect.bisect_right(masked_starts, pos) - 1
+            if (i < 0 or pos >= masked[i][1]) and _js_in_code(text, pos):
+                calls.append((pos, match.group('call')))
+    import_positions = [] if calls else None
+
+    for match in _JS_DECLARATION.finditer(text):
+        if span is not None:
+            newline = match.start()
+            while span is not None and span[1] <= newline:
+                span = next(spans, None)
+            if span is not None and span[0] < newline:
+                continue  # linia wewnątrz komentarza blokowego lub template literalu
+        group = match.lastgroup
+
+        if group == 'import':
+            imports.append(match.group('import_src'))
+            if import_positions is not None:
+                import_positions.append(match.start(group))
+        elif group == 'decl':
+            kind, name, export, assign = match.group('kind', 'name', 'export', 'assign')
+            if match.group('arrow_params') and not _js_arrow_params(text, match.end()):
+                assign = None  # wyrażenie w nawiasach, a nie lista parametrów
+            if export:
+                exports.append(name)
+            if not (assign or kind):
+                continue  # eksportowana zmienna - tylko nazwa eksportu
+            # Numer linii liczony tylko dla symboli, które go zapisują
+            start = match.start(group)
+            line += text.count('\n', last_pos, start)
+            last_pos = start
+            if assign or kind.startswith('function'):
+                functions.append({'name': name, 'line': line,
+                                  'type': 'component' if name[0].isupper() else 'function'})
+            elif kind == 'class':
+                classes.append({'name': name, 'line': line})
+            else:
+                types.append({'name': name, 'kind': _JS_TYPE_KINDS[kind], 'line': line})
+        elif group == 'reexport':
+            imports.append(match.group('reexport_src'))
+            if import_positions is not None:
+                import_positions.append(match.start(group))
+            names, namespace = match.group('reexport_names', 'reexport_ns')
+            if names is not None:
+                exports.extend(_js_export_names(names))
+            elif namespace:
+                exports.append(namespace)
+        elif group == 'exportlist':
+            exports.extend(_js_export_names(match.group('export_names')))
+        else:
+            exports.append(match.group('default_name'))
+
+    if calls:
+        # Importy statyczne i wywołania w kolejności występowania w pliku
+        merged = sorted(list(zip(import_positions, imports)) + calls)
+        imports[:] = [source for _, source in merged]
+    return symbols
+
+
+# --- Notatki TODO/FIXME z numerami linii ---
+
+TODO_PATTERN = re.compile(r'(?://|#|/\*)\s*(TODO|FIXME)[\s:](.*)', re.IGNORECASE)
+
+
+def line_starts(content):
+    """Tablica przesunięć początków linii - numer linii dla pozycji to bisect, bez dzielenia treści."""
+    starts = [0]
+    find = content.find
+    pos = find('\n')
+    while pos != -1:
+        starts.append(pos + 1)
+        pos = find('\n', pos + 1)
+    return starts
+
+
+def extract_todos(content):
+    """Zwraca [{type, text, line}] dla komentarzy TODO/FIXME (linie numerowane od 1)."""
+    todos = []
+    starts = None
+    for match in TODO_PATTERN.finditer(content):
+        if starts is None:
+            starts = line_starts(content)  # tylko gdy plik w ogóle ma notatki
+        todos.append({'type': match.group(1).upper(), 'text': match.group(2).strip(),
+                      'line': bisect.bisect_right(starts, match.start())})
+    return todos
+
+
+# --- Analiza Python: jedno przejście po instrukcjach z zagnieżdżoną tablicą symboli ---
+
+class PythonSymbolVisitor(ast.NodeVisitor):
+    """Zbiera symbole modułu Python w jednym przejściu.
+
+    Odwiedzane są tylko instrukcje (definicje nie mogą leżeć w wyrażeniach), więc przejście
+    jest tańsze niż ast.walk po wszystkich węzłach. Wynik: funkcje (także async i metody),
+    klasy z metodami, importy (import i from ... import), stałe modułu i docstring, z zakresami linii.
+    """
+
+    # Pola z listami instrukcji w instrukcjach złożonych (if/for/while/with/try/match, except, case)
+    BODY_FIELDS = ('body', 'orelse', 'finalbody', 'handlers', 'cases')
+
+    def __init__(self):
+        self.functions = []
+        self.classes = []
+        self.imports = []
+        self.constants = []
+        self._constant_names = set()
+        self.scope = []  # stos otaczających definicji: ('class', rekord) / ('function', rekord)
+
+    def generic_visit(self, node):
+        for field in self.BODY_FIELDS:
+            statements = getattr(node, field, None)
+            if isinstance(statements, list):
+                for statement in statements:
+                    self.visit(statement)
+
+    def _visit_function(self, node, is_async):
+        kind = 'async function' if is_async else 'function'
+        parent = self.scope[-1] if self.scope else None
+        record = {'name': node.name, 'line': node.lineno, 'end_line': node.end_lineno}
+        if parent and parent[0] == 'class':
+            kind = 'async method' if is_async else 'method'
+            record['class'] = parent[1]['name']
+            parent[1]['methods'].append({'name': node.name, 'line': node.lineno,
+                                         'end_line': node.end_lineno, 'async': is_async})
+        elif parent:
+            record['parent'] = parent[1]['name']
+        record['type'] = kind
+        self.functions.append(record)
+        self.scope.append(('function', record))
+        self.generic_visit(node)
+        self.scope.pop()
+
+    def visit_FunctionDef(self, node):
+        self._visit_function(node, False)
+
+    def visit_AsyncFunctionDef(self, node):
+        self._visit_function(node, True)
+
+    def visit_ClassDef(self, node):
+        record = {'name': node.name, 'line': node.lineno, 'end_line': node.end_lineno,
+                  'bases': [ast.unparse(base) for base in node.bases], 'methods': []}
+        if self.scope:
+            record['parent'] = self.scope[-1][1]['name']
+        self.classes.append(record)
+        self.scope.append(('class', record))
+        self.generic_visit(node)
+        self.scope.pop()
+
+    def visit_Import(self, node):
+        self.imports.extend(alias.name for alias in node.names)
+
+    def visit_ImportFrom(self, node):
+        # Import względny zachowuje kropki: from .models import X -> '.models'
+        self.imports.append('.' * node.level + (node.module or ''))
+
+    def _visit_assign(self, node, targets):
+        if self.scope:
+            return
+        for target in targets:
+            if isinstance(target, ast.Name) and target.id.isupper() and target.id not in self._constant_names:
+                self._constant_names.add(target.id)
+                self.constants.append({'name': target.id, 'line': node.lineno})
+
+    def visit_Assign(self, node):
+        self._visit_assign(node, node.targets)
+
+    def visit_AnnAssign(self, node):
+        self._visit_assign(node, [node.target])
+
+
+def extract_python_symbols(content):
+    """Tablica symboli modułu Python (SyntaxError propaguje do wywołującego)."""
+    tree = ast.parse(content)
+    visitor = PythonSymbolVisitor()
+    visitor.visit(tree)
+    docstring = ast.get_docstring(tree, clean=True)
+    return {
+        'functions': visitor.functions, 'classes': visitor.classes, 'imports': visitor.imports,
+        'constants': visitor.constants,
+        'docstring': docstring.strip().splitlines()[0][:200] if docstring and docstring.strip() else None,
+    }
+
+
+# --- Analiza migracji Supabase: strumieniowy podział SQL na instrukcje i katalog schematu ---
+
+# Tylko fragmenty, które zmieniają znaczenie ';' - reszta tekstu jest przeskakiwana przez finditer
+_SQL_SPECIAL = re.compile(
+    r"--[^\n]*|/\*.*?\*/"
+    r"|\$(?P<tag>(?:[A-Za-z_]\w*)?)\$.*?\$(?P=tag)\$"
+    r"|'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|;",
+    re.S)
+
+_SQL_NAME = r'(?:"[^"]+"|[\w$]+)(?:\.(?:"[^"]+"|[\w$]+))?'
+_SQL_NAMES = rf'{_SQL_NAME}(?:\s*,\s*{_SQL_NAME})*'
+_SQL_STATEMENTS = [(kind, re.compile(pattern, re.I | re.S)) for kind, pattern in [
+    ('create_table', rf'CREATE (?:(?:GLOBAL |LOCAL )?(?:TEMP|TEMPORARY|UNLOGGED) )?TABLE (?P<ine>IF NOT EXISTS )?(?P<name>{_SQL_NAME})\s*(?P<rest>.*)'),
+    ('alter_table', rf'ALTER TABLE (?:IF EXISTS )?(?:ONLY )?(?P<name>{_SQL_NAME}) (?P<rest>.*)'),
+    ('drop_table', rf'DROP TABLE (?:IF EXISTS )?(?P<names>{_SQL_NAMES})'),
+    ('create_index', rf'CREATE (?P<unique>UNIQUE )?INDEX (?:CONCURRENTLY )?(?:IF NOT EXISTS )?(?P<name>{_SQL_NAME} )?ON (?:ONLY )?(?P<table>{_SQL_NAME})(?: USING \w+)?\s*\((?P<columns>.*?)\)'),
+    ('drop_index', rf'DROP INDEX (?:CONCURRENTLY )?(?:IF EXISTS )?(?P<names>{_SQL_NAMES})'),
+    ('create_policy', rf'CREATE POLICY (?P<name>{_SQL_NAME}) ON (?P<table>{_SQL_NAME})(?: AS \w+)?(?: FOR (?P<command>\w+))?'),
+    ('drop_policy', rf'DROP POLICY (?:IF EXISTS )?(?P<name>{_SQL_NAME}) ON (?P<table>{_SQL_NAME})'),
+    ('create_function', rf'CREATE (?:OR REPLACE )?FUNCTION (?P<name>{_SQL_NAME})\s*\((?P<args>[^)]*)\)(?:\s*RETURNS\s+(?P<returns>.+?)(?=\s+(?:LANGUAGE|AS|SECURITY|STABLE|IMMUTABLE|VOLATILE|STRICT|SET|PARALLEL|COST)\b|$))?'),
+    ('drop_function', rf'DROP FUNCTION (?:IF EXISTS )?(?P<name>{_SQL_NAME})'),
+    ('create_trigger', rf'CREATE (?:OR REPLACE )?(?:CONSTRAINT )?TRIGGER (?P<name>{_SQL_NAME}) (?P<timing>BEFORE|AFTER|INSTEAD OF) (?P<events>.+?) ON (?P<table>{_SQL_NAME}).*?EXECUTE (?:FUNCTION|PROCEDURE) (?P<function>{_SQL_NAME})'),
+    ('drop_trigger', rf'DROP TRIGGER (?:IF EXISTS )?(?P<name>{_SQL_NAME}) ON (?P<table>{_SQL_NAME})'),
+    ('create_view', rf'CREATE (?:OR REPLACE )?(?:MATERIALIZED )?VIEW (?:IF NOT EXISTS )?(?P<name>{_SQL_NAME})'),
+    ('drop_view', rf'DROP (?:MATERIALIZED )?VIEW (?:IF EXISTS )?(?P<names>{_SQL_NAMES})'),
+]]
+_SQL_CONSTRAINT_WORDS = {'constraint', 'primary', 'foreign', 'unique', 'check', 'exclude', 'like'}
+_SQL_COLUMN_STOP = re.compile(
+    r'\s+(?:NOT|NULL|DEFAULT|REFERENCES|PRIMARY|UNIQUE|CHECK|GENERATED|CONSTRAINT|COLLATE)\b.*', re.I | re.S)
+
+
+def iter_sql_statements(content):
+    """Zwraca kolejne (linia, instrukcja) pliku SQL bez wczytywania całości do struktur pośrednich.
+
+    Komentarze są usuwane, ciała $$...$$ zwijane, a ';' w napisach i ciałach funkcji nie dzielą instrukcji.
+    """
+    parts, stmt_line, pos, line = [], None, 0, 1
+    for match in _SQL_SPECIAL.finditer(content):
+        chunk = content[pos:match.start()]
+        if stmt_line is None and chunk.strip():
+            stmt_line = line + chunk.count('\n', 0, len(chunk) - len(chunk.lstrip()))
+        parts.append(chunk)
+        line += chunk.count('\n')
+        token = match.group()
+        if token == ';':
+            statement = ' '.join(''.join(parts).split())
+            if statement:
+                yield stmt_line or line, statement
+            parts, stmt_line = [], None
+        elif token.startswith(('--', '/*')):
+            parts.append(' ')
+        else:
+            if stmt_line is None:
+                stmt_line = line
+            parts.append('$$...$$' if token.startswith('$') else token)
+        line += token.count('\n')
+        pos = match.end()
+    chunk = content[pos:]
+    if stmt_line is None and chunk.strip():
+        stmt_line = line + chunk.count('\n', 0, len(chunk) - len(chunk.lstrip()))
+    parts.append(chunk)
+    statement = ' '.join(''.join(parts).split())
+    if statement:
+        yield stmt_line or line, statement
+
+
+def sql_name(raw):
+    """Normalizuje identyfikator: bez cudzysłowów, małe litery (jak Postgres), bez schematu public."""
+    raw = raw.strip()
+    if '"' not in raw and '.' not in raw:
+        return raw.lower()
+    parts = [p[1:-1] if p.startswith('"') else p.lower() for p in re.findall(r'"[^"]+"|[^.]+', raw)]
+    if len(parts) > 1 and parts[0] == 'public':
+        parts = parts[1:]
+    return '.'.join(parts)
+
+
+_SQL_PUNCT = re.compile(r"[(),]")
+
+
+def _split_top_level(text):
+    """Dzieli po przecinkach leżących poza nawiasami (skacze tylko po znakach ( ) ,)."""
+    items, depth, start = [], 0, 0
+    for match in _SQL_PUNCT.finditer(text):
+        char = match.group()
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif depth == 0:
+            items.append(text[start:match.start()].strip())
+            start = match.end()
+    items.append(text[start:].strip())
+    return [item for item in items if item]
+
+
+def _paren_body(text):
+    """Zawartość pierwszego nawiasu na początku text (z uwzględnieniem zagnieżdżeń) albo None."""
+    if not text.startswith('('):
+        return None
+    depth = 0
+    for match in _SQL_PUNCT.finditer(text):
+        char = match.group()
+        if char == ',':
+            continue
+        depth += 1 if char == '(' else -1
+        if depth == 0:
+            return text[1:match.start()]
+    return text[1:]
+
+
+def _sql_column(definition):
+    """[nazwa, typ] z definicji kolumny albo None dla ograniczeń tabeli."""
+    name, _, rest = definition.partition(' ')
+    if not rest or name.lower() in _SQL_CONSTRAINT_WORDS:
+        return None
+    return [sql_name(name), _SQL_COLUMN_STOP.sub('', rest).strip()]
+
+
+def _sql_alter_actions(table, rest):
+    ops = []
+    for action in _split_top_level(rest):
+        words = action.split()
+        head = [w.lower() for w in words[:3]]
+        if head[:2] == ['add', 'constraint'] or head[:2] in (['add', 'primary'], ['add', 'foreign'], ['add', 'unique'], ['add', 'check']):
+            continue
+        if head[0] == 'add':
+            column = re.sub(r'^ADD (?:COLUMN )?(?:IF NOT EXISTS )?', '', action, flags=re.I)
+            parsed = _sql_column(column)
+            if parsed:
+                ops.append({'op': 'add_column', 'table': table, 'column': parsed[0], 'type': parsed[1]})
+        elif head[0] == 'drop' and head[1] != 'constraint':
+            column = re.sub(r'^DROP (?:COLUMN )?(?:IF EXISTS )?', '', action, flags=re.I).split()
+            if column:
+                ops.append({'op': 'drop_column', 'table': table, 'column': sql_name(column[0])})
+        elif head[0] == 'rename' and len(words) >= 3:
+            if head[1] == 'to':
+                ops.append({'op': 'rename_table', 'table': table, 'new_name': sql_name(words[2])})
+            elif head[1] != 'constraint':
+                names = [w for w in words[1:] if w.lower() not in ('column', 'to')]
+                if len(names) == 2:
+                    ops.append({'op': 'rename_column', 'table': table, 'column': sql_name(names[0]),
+                                'new_name': sql_name(names[1])})
+        elif head[0] in ('enable', 'disable', 'force') and 'row level security' in action.lower():
+            ops.append({'op': 'rls', 'table': table, 'enabled': head[0] != 'disable'})
+        elif head[0] == 'alter':
+            match = re.match(rf'ALTER (?:COLUMN )?(?P<column>{_SQL_NAME}) (?:SET DATA )?TYPE (?P<type>.+?)(?: USING .*)?$', action, re.I)
+            if match:
+                ops.append({'op': 'alter_column', 'table': table, 'column': sql_name(match['column']),
+                            'type': match['type']})
+    return ops
+
+
+def extract_sql_schema(content):
+    """Lista operacji na schemacie (tabele, kolumny, indeksy, polityki RLS, funkcje, triggery) w kolejności pliku."""
+    ops = []
+    for line, statement in iter_sql_statements(content):
+        if statement[:6].lower() not in ('create', 'alter ', 'drop i', 'drop t', 'drop f', 'drop p', 'drop v', 'drop m'):
+            continue  # INSERT, GRANT, COMMENT, DO $$...$$ itp. nie zmieniają katalogu
+        for kind, pattern in _SQL_STATEMENTS:
+            match = pattern.match(statement)
+            if not match:
+                continue
+            if kind == 'create_table':
+                body = _paren_body(match['rest'])
+                columns = [c for c in map(_sql_column, _split_top_level(body or '')) if c]
+                ops.append({'op': kind, 'table': sql_name(match['name']), 'columns': columns,
+                            'if_not_exists': bool(match['ine']), 'line': line})
+            elif kind == 'alter_table':
+                ops.extend(_sql_alter_actions(sql_name(match['name']), match['rest']))
+            elif kind in ('drop_table', 'drop_index', 'drop_view'):
+                for name in _split_top_level(match['names']):
+                    ops.append({'op': kind, 'name': sql_name(name)})
+            elif kind == 'create_index':
+                ops.append({'op': kind, 'name': sql_name(match['name']) if match['name'] else None,
+                            'table': sql_name(match['table']), 'columns': match['columns'].strip(),
+                            'unique': bool(match['unique']), 'line': line})
+            elif kind == 'create_policy':
+                ops.append({'op': kind, 'name': sql_name(match['name']), 'table': sql_name(match['table']),
+                            'command': (match['command'] or 'ALL').upper(), 'line': line})
+            elif kind in ('drop_policy', 'drop_trigger'):
+                ops.append({'op': kind, 'name': sql_name(match['name']), 'table': sql_name(match['table'])})
+            elif kind == 'create_function':
+                ops.append({'op': kind, 'name': sql_name(match['name']), 'args': ' '.join(match['args'].split()),
+                            'returns': (match['returns'] or '').strip(), 'line': line})
+            elif kind == 'create_trigger':
+                ops.append({'op': kind, 'name': sql_name(match['name']), 'table': sql_name(match['table']),
+                            'timing': match['timing'].upper(), 'events': match['events'].upper(),
+                            'function': sql_name(match['function']), 'line': line})
+            else:  # drop_function, create_view
+                ops.append({'op': kind, 'name': sql_name(match['name']), 'line': line})
+            break
+    return ops
+
+
+def build_schema_catalog(all_files, migrations_dir='supabase/migrations/'):
+    """Skumulowany schemat po zastosowaniu migracji w kolejności nazw plików (jak supabase db push)."""
+    tables, functions, views, index_owner = {}, {}, {}, {}
+    migrations = sorted(path for path in all_files
+                        if path.replace('\\', '/').startswith(migrations_dir) and path.endswith('.sql'))
+
+    def table(name, path):
+        return tables.setdefault(name, {'columns': {}, 'rls': False, 'policies': {}, 'indexes': [],
+                                        'triggers': {}, 'defined_in': path, 'changed_in': path})
+
+    for path in migrations:
+        for op in all_files[path].get('sql', []):
+            kind = op['op']
+            if kind == 'create_table':
+                if op['table'] in tables and op['if_not_exists']:
+                    continue
+                tables.pop(op['table'], None)
+                record = table(op['table'], f"{path}:{op['line']}")
+                record['columns'] = dict(op['columns'])
+            elif kind == 'drop_table':
+                tables.pop(op['name'], None)
+            elif kind == 'drop_view':
+                views.pop(op['name'], None)
+            elif kind == 'create_view':
+                views[op['name']] = f"{path}:{op['line']}"
+            elif kind == 'create_function':
+                functions[op['name']] = {'args': op['args'], 'returns': op['returns'], 'defined_in': f"{path}:{op['line']}"}
+            elif kind == 'drop_function':
+                functions.pop(op['name'], None)
+            elif kind == 'drop_index':
+                owner = index_owner.pop(op['name'], None)
+                if owner in tables and op['name'] in tables[owner]['indexes']:
+                    tables[owner]['indexes'].remove(op['name'])
+            elif kind == 'rename_table':
+                if op['table'] in tables:
+                    tables[op['new_name']] = tables.pop(op['table'])
+            else:
+                record = table(op['table'], path)
+                record['changed_in'] = path
+                if kind == 'add_column':
+                    record['columns'][op['column']] = op['type']
+                elif kind == 'alter_column' and op['column'] in record['columns']:
+                    record['columns'][op['column']] = op['type']
+                elif kind == 'drop_column':
+                    record['columns'].pop(op['column'], None)
+                elif kind == 'rename_column' and op['column'] in record['columns']:
+                    record['columns'] = {op['new_name'] if c == op['column'] else c: t
+                                         for c, t in record['columns'].items()}
+                elif kind == 'rls':
+                    record['rls'] = op['enabled']
+                elif kind == 'create_index':
+                    name = op['name'] or f"{op['table']}({op['columns']})"
+                    if name not in record['indexes']:
+                        record['indexes'].append(name)
+                    index_owner[name] = op['table']
+                elif kind == 'create_policy':
+                    record['policies'][op['name']] = op['command']
+                elif kind == 'drop_policy':
+                    record['policies'].pop(op['name'], None)
+                elif kind == 'create_trigger':
+                    record['triggers'][op['name']] = op['function']
+                elif kind == 'drop_trigger':
+                    record['triggers'].pop(op['name'], None)
+
+    return {'migrations': len(migrations), 'tables': dict(sorted(tables.items())),
+            'functions': dict(sorted(functions.items())), 'views': dict(sorted(views.items()))}
+
+
+# --- Rozwiązywanie importów (graf połączeń) ---
+
+def load_tsconfig_paths(root):
+    """Czyta baseUrl i paths z tsconfig.json (dopuszcza komentarze i końcowe przecinki)."""
+    tsconfig = Path(root) / 'tsconfig.json'
+    try:
+        with open(tsconfig, 'r', encoding='utf-8') as f:
+            raw = f.read()
+    except OSError:
+        return '.', {}
+    raw = re.sub(r'"(?:\\.|[^"\\])*"|//[^\n]*|/\*.*?\*/',
+                 lambda m: m.group(0) if m.group(0).startswith('"') else '', raw, flags=re.DOTALL)
+    raw = re.sub(r',(\s*[}\]])', r'\1', raw)
+    try:
+        options = json.loads(raw).get('compilerOptions', {})
+    except ValueError:
+        return '.', {}
+    return options.get('baseUrl', '.'), options.get('paths', {})
+
+
+class ImportResolver:
+    """Mapuje specyfikatory importów JS/TS na pliki projektu (z pamięcią podręczną wyników)."""
+
+    EXTENSIONS = ('.ts', '.tsx', '.js', '.jsx', '.d.ts', '.json')
+    SOURCE_EXTENSIONS = ('.js', '.jsx', '.ts', '.tsx')
+
+    def __init__(self, root, file_keys):
+        # Klucze stanu mogą zawierać '\' (Windows) - wyszukiwanie odbywa się po ścieżkach posix
+        self.files = {key.replace('\\', '/'): key for key in file_keys}
+        base_url, paths = load_tsconfig_paths(root)
+        self.base_url = posixpath.normpath(base_url.replace('\\', '/'))
+        self.aliases = []
+        for pattern, targets in paths.items():
+            prefix, star, suffix = pattern.partition('*')
+            self.aliases.append((prefix, suffix if star else None, targets))
+        # Najdłuższy prefiks wygrywa, jak w TypeScript
+        self.aliases.sort(key=lambda alias: len(alias[0]), reverse=True)
+        self.cache = {}
+
+    def probe(self, candidate):
+        """Zwraca klucz pliku dla ścieżki kandydującej (rozszerzenia, pliki index)."""
+        candidate = posixpath.normpath(candidate)
+        if candidate.startswith('../'):
+            return None
+        if candidate in self.files:
+            return self.files[candidate]
+        for ext in self.EXTENSIONS:
+            if candidate + ext in self.files:
+                return self.files[candidate + ext]
+        for ext in self.EXTENSIONS:
+            index = f"{candidate}/index{ext}"
+            if index in self.files:
+                return self.files[index]
+        return None
+
+    def resolve(self, specifier, from_file):
+        """Rozwiązuje import z pliku from_file; None dla pakietów zewnętrznych i nieznanych ścieżek."""
+        from_dir = posixpath.dirname(from_file.replace('\\', '/'))
+        relative = specifier.startswith('.')
+        cache_key = (from_dir, specifier) if relative else specifier
+        if cache_key in self.cache:
+            return self.cache[cache_key]
+
+        result = None
+        if relative:
+            result = self.probe(posixpath.join(from_dir, specifier))
+        else:
+            for prefix, suffix, targets in self.aliases:
+                if suffix is None:
+                    if specifier != prefix:
+                        continue
+                    wildcard = ''
+                elif specifier.startswith(prefix) and specifier.endswith(suffix) and \
+                        len(specifier) >= len(prefix) + len(suffix):
+                    wildcard = specifier[len(prefix):len(specifier) - len(suffix)]
+                else:
+                    continue
+                for target in targets:
+                    result = self.probe(posixpath.join(self.base_url, target.replace('*', wildcard)))
+                    if result:
+                        break
+                if result:
+                    break
+            # Importy względem baseUrl (np. 'components/ui/Button')
+            if not result:
+                result = self.probe(posixpath.join(self.base_url, specifier))
+
+        self.cache[cache_key] = result
+        return result
+
+    def build_graph(self, all_files):
+        """Zwraca (lista połączeń from/to/import, odwrotny indeks: plik -> pliki, które go importują)."""
+        connections = []
+        reverse_deps = {}
+        if isinstance(all_files, StoredFilesView):
+            # Importy z indeksowanej tabeli - bez dekodowania pełnych rekordów
+            imports_by_file = all_files.store.iter_imports()
+        else:
+            imports_by_file = ((key, all_files[key].get('imports', [])) for key in sorted(all_files))
+        for key, imports in imports_by_file:
+            if not key.endswith(self.SOURCE_EXTENSIONS):
+                continue
+            seen = set()
+            for specifier in imports:
+                target = self.resolve(specifier, key)
+                if not target or target == key or target in seen:
+                    continue
+                seen.add(target)
+                connections.append({'from': key, 'to': target, 'import': specifier})
+                reverse_deps.setdefault(target, []).append(key)
+        return connections, reverse_deps
+
+# --- Magazyn stanu w SQLite (alternatywa dla monolitycznego CURRENT_STATE.json) ---
+
+class StoredFilesView(Mapping):
+    """Leniwy widok plików w SQLiteStateStore - rekordy czytane pojedynczo, na żądanie."""
+
+    def __init__(self, store):
+        self.store = store
+
+    def __getitem__(self, path):
+        info = self.store.get_file(path)
+        if info is None:
+            raise KeyError(path)
+        return info
+
+    def __iter__(self):
+        return iter(self.store.paths())
+
+    def __len__(self):
+        return self.store.count()
+
+    def stamps(self):
+        return self.store.iter_stamps()
+
+    # Pełne przejścia jednym kursorem zamiast zapytania na każdy plik
+    def values(self):
+        return self.store.iter_files()
+
+    def items(self):
+        return ((info['file'], info) for info in self.store.iter_files())
+
+
+class SQLiteStateStore:
+    """Stan projektu w SQLite: pliki, symbole, importy, TODO i połączenia z indeksami."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS files (
+            path TEXT PRIMARY KEY, dir TEXT NOT NULL, lines INTEGER, size INTEGER,
+            n_functions INTEGER, n_classes INTEGER,
+            fp_size INTEGER, fp_mtime_ns INTEGER, fp_hash TEXT, analyzer INTEGER,
+            info TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_files_dir ON files(dir);
+        CREATE TABLE IF NOT EXISTS symbols (path TEXT NOT NULL, name TEXT NOT NULL, kind TEXT, line INTEGER);
+        CREATE INDEX IF NOT EXISTS idx_symbols_name ON symbols(name);
+        CREATE INDEX IF NOT EXISTS idx_symbols_path ON symbols(path);
+        CREATE TABLE IF NOT EXISTS imports (path TEXT NOT NULL, specifier TEXT NOT NULL);
+        CREATE INDEX IF NOT EXISTS idx_imports_path ON imports(path);
+        CREATE TABLE IF NOT EXISTS todos (path TEXT NOT NULL, type TEXT, text TEXT, line INTEGER);
+        CREATE INDEX IF NOT EXISTS idx_todos_path ON todos(path);
+        CREATE TABLE IF NOT EXISTS connections (from_path TEXT NOT NULL, to_path TEXT NOT NULL, specifier TEXT);
+        CREATE INDEX IF NOT EXISTS idx_connections_from ON connections(from_path);
+        CREATE INDEX IF NOT EXISTS idx_connections_to ON connections(to_path);
+        CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+    """
+
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self.conn = sqlite3.connect(str(self.db_path))
+        # WAL: czytelnicy (quick_fix, edytor) widzą poprzednią wersję do końca transakcji zapisu
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(self.SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    # Odczyt
+
+    def count(self):
+        return self.conn.execute('SELECT COUNT(*) FROM files').fetchone()[0]
+
+    def paths(self):
+        return [row[0] for row in self.conn.execute('SELECT path FROM files ORDER BY path')]
+
+    def get_file(self, path):
+        row = self.conn.execute('SELECT info FROM files WHERE path = ?', (path,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def iter_files(self, prefix=''):
+        """Strumieniowo zwraca rekordy plików, opcjonalnie tylko z katalogu o danym prefiksie."""
+        # Prefiks to katalog: 'app' nie może obejmować rodzeństwa 'apple/...'
+        prefix = str(Path(prefix)) if prefix else '.'
+        if prefix != '.':
+            prefix += os.sep
+            cursor = self.conn.execute(
+                'SELECT info FROM files WHERE path >= ? AND path < ? ORDER BY path',
+                (prefix, prefix + '\uffff'))
+        else:
+            cursor = self.conn.execute('SELECT info FROM files ORDER BY path')
+        for (info,) in cursor:
+            yield json.loads(info)
+
+    def iter_folders(self):
+        """Rekordy pogrupowane wg katalogu, w kolejności mapy (katalog główny na końcu).
+
+        W pamięci jest naraz tylko jeden katalog.
+        """
+        cursor = self.conn.execute("SELECT dir, info FROM files ORDER BY dir = '.', dir, path")
+        for folder, rows in groupby(cursor, key=lambda row: row[0]):
+            yield folder, [json.loads(info) for _, info in rows]
+
+    def iter_imports(self):
+        """Pary (plik, [specyfikatory]) w kolejności ścieżek; pliki bez importów są pomijane."""
+        cursor = self.conn.execute('SELECT path, specifier FROM imports ORDER BY path, rowid')
+        for path, rows in groupby(cursor, key=lambda row: row[0]):
+            yield path, [specifier for _, specifier in rows]
+
+    def iter_stamps(self):
+        """Pary (plik, stamp odcisku jak SymbolIndex.stamp) bez dekodowania rekordów."""
+        for path, size, mtime_ns, fp_hash, analyzer in self.conn.execute(
+                'SELECT path, fp_size, fp_mtime_ns, fp_hash, analyzer FROM files'):
+            yield path, f"{size}:{mtime_ns}:{fp_hash}:{analyzer}"
+
+    def fingerprints(self, paths):
+        """Zapisane odciski {ścieżka: (size, mtime_ns, hash, analyzer)} dla paczki ścieżek."""
+        result = {}
+        for i in range(0, len(paths), 500):  # limit parametrów SQLite
+            part = paths[i:i + 500]
+            result.update((row[0], row[1:]) for row in self.conn.execute(
+                'SELECT path, fp_size, fp_mtime_ns, fp_hash, analyzer FROM files '
+                f'WHERE path IN ({",".join("?" * len(part))})', part))
+        return result
+
+    def importers(self, path):
+        """Pliki importujące path (indeks na connections.to_path)."""
+        return [row[0] for row in self.conn.execute(
+            'SELECT DISTINCT from_path FROM connections WHERE to_path = ? ORDER BY from_path', (path,))]
+
+    def reverse_deps(self):
+        """Odwrotny indeks zależności {plik: [importujące]} odtworzony z tabeli connections."""
+        reverse_deps = {}
+        for from_path, to_path in self.conn.execute('SELECT from_path, to_path FROM connections ORDER BY rowid'):
+            reverse_deps.setdefault(to_path, []).append(from_path)
+        return reverse_deps
+
+    def get_meta(self, key, default=None):
+        row = self.conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    # Zapis
+
+    def _delete_file_rows(self, path):
+        for table in ('files', 'symbols', 'imports', 'todos'):
+            self.conn.execute(f'DELETE FROM {table} WHERE path = ?', (path,))
+
+    def upsert_file(self, info):
+        """Zapisuje (lub nadpisuje) rekord pliku razem z jego symbolami, importami i TODO."""
+        path = info['file']
+        fingerprint = info.get('fingerprint', {})
+        self._delete_file_rows(path)
+        self.conn.execute(
+            'INSERT INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (path, str(Path(path).parent), info.get('lines', 0), info.get('size', 0),
+             len(info.get('functions', [])), len(info.get('classes', [])),
+             fingerprint.get('size'), fingerprint.get('mtime_ns'), fingerprint.get('hash'),
+             fingerprint.get('analyzer'), json.dumps(info)))
+        symbols = [(path, f['name'], f.get('type', 'function'), f.get('line')) for f in info.get('functions', [])]
+        symbols += [(path, c['name'], 'class', c.get('line')) for c in info.get('classes', [])]
+        symbols += [(path, t['name'], t.get('kind', 'type'), t.get('line')) for t in info.get('types', [])]
+        self.conn.executemany('INSERT INTO symbols VALUES (?, ?, ?, ?)', symbols)
+        self.conn.executemany('INSERT INTO imports VALUES (?, ?)',
+                              [(path, spec) for spec in info.get('imports', [])])
+        self.conn.executemany('INSERT INTO todos VALUES (?, ?, ?, ?)',
+                              [(path, t.get('type'), t.get('text'), t.get('line'))
+                               for t in info.get('todos', [])])
+
+    def delete_file(self, path):
+        self._delete_file_rows(path)
+
+    # Skan strumieniowy: widziane ścieżki w tabeli tymczasowej zamiast zbioru w pamięci
+
+    def begin_scan(self):
+        self.conn.execute('CREATE TEMP TABLE IF NOT EXISTS seen (path TEXT PRIMARY KEY)')
+        self.conn.execute('DELETE FROM seen')
+
+    def mark_seen(self, paths):
+        self.conn.executemany('INSERT OR IGNORE INTO seen VALUES (?)', [(path,) for path in paths])
+
+    def unseen_paths(self):
+        return [row[0] for row in self.conn.execute(
+            'SELECT path FROM files WHERE path NOT IN (SELECT path FROM seen) ORDER BY path')]
+
+    def replace_state(self, all_files, connections, stats, scores=None, schema=None):
+        """Podmienia cały stan w jednej transakcji; zapisywane są tylko zmienione pliki.
+
+        Dla widoku tego samego magazynu (potok --stream zapisał już pliki) podmienia tylko graf i metadane.
+        """
+        streamed = isinstance(all_files, StoredFilesView) and all_files.store is self
+        stored = {} if streamed else {row[0]: row[1:] for row in self.conn.execute(
+            'SELECT path, fp_size, fp_mtime_ns, fp_hash, analyzer FROM files')}
+        written = 0
+        with self.conn:
+            for path in stored.keys() - all_files.keys():
+                self._delete_file_rows(path)
+            for path, info in ({} if streamed else all_files).items():
+                fingerprint = info.get('fingerprint', {})
+                key = (fingerprint.get('size'), fingerprint.get('mtime_ns'),
+                       fingerprint.get('hash'), fingerprint.get('analyzer'))
+                if stored.get(path) == key and fingerprint:
+                    continue
+                self.upsert_file(info)
+                written += 1
+            self.conn.execute('DELETE FROM connections')
+            self.conn.executemany('INSERT INTO connections VALUES (?, ?, ?)',
+                                  [(c['from'], c['to'], c.get('import')) for c in connections])
+            self.conn.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)', ('stats', json.dumps(stats)))
+            self.conn.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)', ('scores', json.dumps(scores or {})))
+            self.conn.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)', ('schema', json.dumps(schema or {})))
+        return written
+
+    def export_json(self, json_path):
+        """Strumieniowo eksportuje stan do starego formatu CURRENT_STATE.json."""
+        def indented(value, level):
+            return json.dumps(value, indent=2).replace('\n', '\n' + ' ' * level)
+
+        with atomic_open(json_path) as f:
+            f.write('{\n  "files": {')
+            first = True
+            for info in self.iter_files():
+                f.write(('\n' if first else ',\n') + f'    {json.dumps(info["file"])}: {indented(info, 4)}')
+                first = False
+            f.write('\n  },\n  "connections": [' if not first else '},\n  "connections": [')
+            first = True
+            reverse_deps = {}
+            for from_path, to_path, specifier in self.conn.execute(
+                    'SELECT from_path, to_path, specifier FROM connections ORDER BY rowid'):
+                connection = {'from': from_path, 'to': to_path, 'import': specifier}
+                f.write(('\n' if first else ',\n') + f'    {indented(connection, 4)}')
+                first = False
+                reverse_deps.setdefault(to_path, []).append(from_path)
+            f.write('\n  ],\n' if not first else '],\n')
+            f.write(f'  "reverse_deps": {indented(reverse_deps, 2)},\n')
+            f.write(f'  "stats": {indented(self.get_meta("stats", {}), 2)},\n')
+            f.write(f'  "scores": {indented(self.get_meta("scores", {}), 2)},\n')
+            f.write(f'  "schema": {indented(self.get_meta("schema", {}), 2)}\n}}')
+        return json_path
+
+
+def default_cache_dir():
+    """Katalog współdzielonej pamięci podręcznej analiz (XDG_CACHE_HOME lub ~/.cache)."""
+    base = os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache'
+    return Path(base) / 'oremus-brain'
+
+
+class AnalysisCache:
+    """Pamięć podręczna wyników analyze_code_file kluczowana hashem treści i wersją analizatora.
+
+    Wspólna dla wszystkich worktree i gałęzi: identyczny plik jest parsowany tylko raz.
+    Rozmiar jest ograniczony - przy przekroczeniu usuwane są najdawniej używane wpisy (LRU).
+    """
+
+    # Czas użycia odświeżamy najwyżej raz na godzinę - odczyt nie musi być zapisem
+    TOUCH_INTERVAL = 3600
+
+    def __init__(self, cache_dir=None, max_bytes=256 * 1024 * 1024):
+        self.db_path = Path(cache_dir or default_cache_dir()) / 'analysis.sqlite'
+        self.max_bytes = max_bytes
+        self._conn = None
+
+    def __getstate__(self):
+        # Połączenie nie przechodzi do procesów roboczych - każdy otwiera własne
+        return dict(self.__dict__, _conn=None)
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.execute('CREATE TABLE IF NOT EXISTS entries ('
+                               'key TEXT PRIMARY KEY, info TEXT NOT NULL, '
+                               'size INTEGER NOT NULL, last_used REAL NOT NULL)')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_entries_last_used ON entries(last_used)')
+        return self._conn
+
+    @staticmethod
+    def make_key(digest, ext):
+        """Klucz wpisu: wersja analizatora + rozszerzenie (wybiera analizator) + hash treści."""
+        return f'{ANALYZER_VERSION}:{ext}:{digest}'
+
+    def get(self, key):
+        """Zwraca zapisane info (bez pola 'file') albo None."""
+        try:
+            row = self.conn.execute('SELECT info, last_used FROM entries WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            if now - row[1] > self.TOUCH_INTERVAL:
+                self.conn.execute('UPDATE entries SET last_used = ? WHERE key = ?', (now, key))
+            return json.loads(row[0])
+        except sqlite3.Error:
+            return None
+
+    def put(self, key, info):
+        """Zapisuje wynik analizy; błędy pamięci podręcznej nigdy nie przerywają analizy."""
+        data = json.dumps({k: v for k, v in info.items() if k != 'file'})
+        try:
+            self.conn.execute('INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)',
+                              (key, data, len(data), time.time()))
+        except sqlite3.Error:
+            pass
+
+    def evict(self):
+        """Usuwa najdawniej używane wpisy, aż rozmiar spadnie do 90% limitu. Zwraca liczbę usuniętych."""
+        try:
+            total = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+            if total <= self.max_bytes:
+                return 0
+            to_free = total - int(self.max_bytes * 0.9)
+            freed = 0
+            victims = []
+            for key, size in self.conn.execute('SELECT key, size FROM entries ORDER BY last_used'):
+                if freed >= to_free:
+                    break
+                victims.append((key,))
+                freed += size
+            with self.conn:
+                self.conn.execute('BEGIN')
+                self.conn.executemany('DELETE FROM entries WHERE key = ?', victims)
+            return len(victims)
+        except sqlite3.Error:
+            return 0
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+# Budżet tokenów mapy dla danego AI (część okna kontekstu; None = pełna mapa)
+AI_TOKEN_BUDGETS = {'claude': 60000, 'chatgpt': 24000, 'gemini': 120000, 'universal': None}
+# Rezerwa budżetu na listę katalogów pominiętych w przyciętej mapie
+OMITTED_SECTION_TOKENS = 400
+
+# Wagi składowych ważności pliku
+IMPORTANCE_WEIGHTS = {'centrality': 0.4, 'symbols': 0.25, 'recency': 0.2, 'size': 0.15}
+RECENCY_HALF_LIFE_DAYS = 14
+
+
+def estimate_tokens(text):
+    """Przybliżona liczba tokenów (~4 znaki na token - wystarczy do planowania budżetu)."""
+    return len(text) // 4 + 1
+
+
+def compute_importance(all_files, reverse_deps):
+    """Ocena ważności plików 0..1: centralność w grafie importów, liczba symboli, świeżość, rozmiar."""
+    # Jedno przejście po rekordach - dalej liczone są już tylko małe krotki
+    facts = {path: (len(info.get('functions', [])) + len(info.get('classes', [])) + len(info.get('types', [])),
+                    (info.get('fingerprint') or {}).get('mtime_ns') or 0, info.get('lines', 0))
+             for path, info in all_files.items()}
+    if not facts:
+        return {}
+    in_degree = {path: len(reverse_deps.get(path, ())) for path in facts}
+    newest = max(mtime for _, mtime, _ in facts.values())
+    max_in = math.log1p(max(in_degree.values())) or 1.0
+    max_symbols = math.log1p(max(symbols for symbols, _, _ in facts.values())) or 1.0
+    max_lines = math.log1p(max(lines for _, _, lines in facts.values())) or 1.0
+    half_life_ns = RECENCY_HALF_LIFE_DAYS * 86400 * 1e9
+
+    scores = {}
+    for path, (symbols, mtime, lines) in facts.items():
+        parts = {
+            'centrality': math.log1p(in_degree[path]) / max_in,
+            'symbols': math.log1p(symbols) / max_symbols,
+            'recency': 0.5 ** ((newest - mtime) / half_life_ns) if mtime else 0.0,
+            'size': math.log1p(lines) / max_lines,
+        }
+        scores[path] = round(sum(IMPORTANCE_WEIGHTS[name] * value for name, value in parts.items()), 4)
+    return scores
+
+
+def symbol_match_score(query, name):
+    """Ocena dopasowania nazwy do zapytania (mniej = lepiej; None = brak dopasowania).
+
+    0 - identyczna, 1 - prefiks, 2 - inicjały camelCase (np. 'mis' -> MassIntentionService),
+    3 - podciąg, 4 - litery zapytania w kolejności (podsekwencja).
+    """
+    lq, ln = query.lower(), name.lower()
+    if ln == lq:
+        return 0
+    if ln.startswith(lq):
+        return 1
+    initials = ''.join(c for i, c in enumerate(name) if c.isupper() or i == 0).lower()
+    if initials.startswith(lq):
+        return 2
+    if lq in ln:
+        return 3
+    position = 0
+    for char in lq:
+        position = ln.find(char, position) + 1
+        if not position:
+            return None
+    return 4
+
+
+def file_stamps(all_files):
+    """Pary (plik, stamp odcisku) - dla widoku SQLite prosto z kolumn, bez wczytywania rekordów."""
+    if isinstance(all_files, StoredFilesView):
+        return all_files.stamps()
+    return ((path, SymbolIndex.stamp(info)) for path, info in all_files.items())
+
+
+class SymbolIndex:
+    """Trwały indeks odwrócony nazwa symbolu -> plik:linia (.ai-brain/SYMBOLS.sqlite).
+
+    Aktualizowany przyrostowo przy każdym zapisie mapy (tylko pliki o zmienionym odcisku),
+    więc zapytania z edytora czy czatu nie muszą wczytywać całego stanu.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS indexed_files (path TEXT PRIMARY KEY, stamp TEXT NOT NULL);
+        CREATE TABLE IF NOT EXISTS symbols (
+            name TEXT NOT NULL, lname TEXT NOT NULL, kind TEXT, path TEXT NOT NULL, line INTEGER
+        );
+        CREATE INDEX IF NOT EXISTS idx_symbols_lname ON symbols(lname);
+        CREATE INDEX IF NOT EXISTS idx_symbols_path ON symbols(path);
+    """
+
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self.conn = sqlite3.connect(str(self.db_path))
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(self.SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    @staticmethod
+    def stamp(info):
+        fingerprint = info.get('fingerprint') or {}
+        return f"{fingerprint.get('size')}:{fingerprint.get('mtime_ns')}:{fingerprint.get('hash')}:{fingerprint.get('analyzer')}"
+
+    @staticmethod
+    def symbols_of(info):
+        """Symbole zdefiniowane w pliku: funkcje/komponenty, klasy, typy i eksporty bez definicji."""
+        path = info['file']
+        rows = [(f['name'], f.get('type', 'function'), f.get('line')) for f in info.get('functions', [])]
+        rows += [(c['name'], 'class', c.get('line')) for c in info.get('classes', [])]
+        rows += [(t['name'], t.get('kind', 'type'), t.get('line')) for t in info.get('types', [])]
+        rows += [(c['name'], 'constant', c.get('line')) for c in info.get('constants', [])]
+        rows += [(op['table'], 'table', op['line']) for op in info.get('sql', []) if op['op'] == 'create_table']
+        rows += [(op['name'], 'sql function', op['line']) for op in info.get('sql', []) if op['op'] == 'create_function']
+        defined = {name for name, kind, line in rows}
+        rows += [(name, 'export', None) for name in info.get('exports', []) if name not in defined]
+        return [(name, name.lower(), kind, path, line) for name, kind, line in rows]
+
+    def sync(self, all_files):
+        """Doprowadza indeks do zgodności ze stanem; zwraca liczbę przeindeksowanych plików."""
+        indexed = dict(self.conn.execute('SELECT path, stamp FROM indexed_files'))
+        changed = 0
+        with self.conn:
+            for path in indexed.keys() - all_files.keys():
+                self.conn.execute('DELETE FROM symbols WHERE path = ?', (path,))
+                self.conn.execute('DELETE FROM indexed_files WHERE path = ?', (path,))
+                changed += 1
+            for path, stamp in file_stamps(all_files):
+                if indexed.get(path) == stamp:
+                    continue
+                self.conn.execute('DELETE FROM symbols WHERE path = ?', (path,))
+                self.conn.executemany('INSERT INTO symbols VALUES (?, ?, ?, ?, ?)', self.symbols_of(all_files[path]))
+                self.conn.execute('INSERT OR REPLACE INTO indexed_files VALUES (?, ?)', (path, stamp))
+                changed += 1
+        return changed
+
+    def is_empty(self):
+        return self.conn.execute('SELECT 1 FROM indexed_files LIMIT 1').fetchone() is None
+
+    def find(self, query, limit=20, fuzzy=False):
+        """Szuka symboli po prefiksie (bez rozróżniania wielkości liter, po indeksie).
+
+        Przy fuzzy=True lub braku wyników prefiksu dopasowuje też inicjały camelCase,
+        podciągi i podsekwencje liter. Zwraca listę słowników {name, kind, file, line}.
+        """
+        lq = query.lower()
+        rows = self.conn.execute(
+            'SELECT rowid, name, kind, path, line FROM symbols WHERE lname >= ? AND lname < ? '
+            'ORDER BY lname = ? DESC, length(name), name, path LIMIT ?',
+            (lq, lq + '\uffff', lq, limit)).fetchall()
+        if fuzzy or not rows:
+            # Trafienia dokładne i prefiksowe zawsze biorą udział w rankingu - limit kandydatów
+            # LIKE nie może ich wyciąć; ranking obejmuje obie listy, a limit stosowany jest na końcu
+            seen = {row[0] for row in rows}
+            escaped = [c if c not in '%_\\' else '\\' + c for c in lq]
+            candidates = rows + [row for row in self.conn.execute(
+                "SELECT rowid, name, kind, path, line FROM symbols WHERE lname LIKE ? ESCAPE '\\' LIMIT 5000",
+                ('%' + '%'.join(escaped) + '%',)) if row[0] not in seen]
+            scored = [(symbol_match_score(query, row[1]), row) for row in candidates]
+            scored = sorted((score, len(row[1]), row[1], row[3], row) for score, row in scored if score is not None)
+            rows = [entry[-1] for entry in scored[:limit]]
+        return [{'name': name, 'kind': kind, 'file': path, 'line': line} for rowid, name, kind, path, line in rows]
+
+
+class TodoIndex:
+    """Przyrostowy indeks notatek TODO/FIXME z datą pierwszego pojawienia się (.ai-brain/TODOS.sqlite).
+
+    Notatka jest rozpoznawana po (plik, typ, tekst, numer wystąpienia), więc przesunięcie jej
+    o kilka linii nie zmienia daty first_seen - lista najstarszych TODO nie wymaga historii gita.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS indexed_files (path TEXT PRIMARY KEY, stamp TEXT NOT NULL);
+        CREATE TABLE IF NOT EXISTS todos (
+            path TEXT NOT NULL, type TEXT NOT NULL, text TEXT NOT NULL, occurrence INTEGER NOT NULL,
+            line INTEGER, first_seen REAL NOT NULL,
+            PRIMARY KEY (path, type, text, occurrence)
+        );
+        CREATE INDEX IF NOT EXISTS idx_todos_first_seen ON todos(first_seen);
+    """
+
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self.conn = sqlite3.connect(str(self.db_path))
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(self.SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    @staticmethod
+    def keyed(info):
+        """Notatki pliku jako {(typ, tekst, wystąpienie): linia}."""
+        keys, seen = {}, {}
+        for todo in info.get('todos', []):
+            base = (todo.get('type', 'TODO'), todo.get('text', ''))
+            seen[base] = seen.get(base, 0) + 1
+            keys[base + (seen[base],)] = todo.get('line')
+        return keys
+
+    def sync(self, all_files, now=None):
+        """Doprowadza indeks do zgodności ze stanem; nowe notatki dostają first_seen = now."""
+        now = time.time() if now is None else now
+        indexed = dict(self.conn.execute('SELECT path, stamp FROM indexed_files'))
+        changed = 0
+        with self.conn:
+            for path in indexed.keys() - all_files.keys():
+                self.conn.execute('DELETE FROM todos WHERE path = ?', (path,))
+                self.conn.execute('DELETE FROM indexed_files WHERE path = ?', (path,))
+                changed += 1
+            for path, stamp in file_stamps(all_files):
+                if indexed.get(path) == stamp:
+                    continue
+                first_seen = {(kind, text, occurrence): seen for kind, text, occurrence, seen in self.conn.execute(
+                    'SELECT type, text, occurrence, first_seen FROM todos WHERE path = ?', (path,))}
+                self.conn.execute('DELETE FROM todos WHERE path = ?', (path,))
+                self.conn.executemany('INSERT INTO todos VALUES (?, ?, ?, ?, ?, ?)', [
+                    (path, kind, text, occurrence, line, first_seen.get((kind, text, occurrence), now))
+                    for (kind, text, occurrence), line in self.keyed(all_files[path]).items()])
+                self.conn.execute('INSERT OR REPLACE INTO indexed_files VALUES (?, ?)', (path, stamp))
+                changed += 1
+        return changed
+
+    def is_empty(self):
+        return self.conn.execute('SELECT 1 FROM indexed_files LIMIT 1').fetchone() is None
+
+    def oldest(self, limit=20):
+        """Najstarsze notatki: [{type, text, file, line, first_seen}] (po indeksie first_seen)."""
+        rows = self.conn.execute('SELECT type, text, path, line, first_seen FROM todos '
+                                 'ORDER BY first_seen, path, line LIMIT ?', (limit,))
+        return [{'type': kind, 'text': text, 'file': path, 'line': line, 'first_seen': first_seen}
+                for kind, text, path, line, first_seen in rows]
+
+
+def delta_count(items):
+    """Liczba pozycji delty - lista albo sama liczba (delta pierwszej analizy)."""
+    return items if isinstance(items, int) else len(items)
+
+
+def compute_state_delta(changed, all_files, baseline=True):
+    """Różnica stanów policzona tylko dla zmienionych rekordów.
+
+    changed: {ścieżka: poprzednie info lub None dla nowego pliku}; all_files: nowy stan.
+    Pliki, których analiza wyszła identyczna (np. sam touch), są pomijane. Bez poprzedniego
+    stanu (baseline=False) render_delta pokazuje tylko liczby, więc zwracane są same liczniki
+    plików zamiast list plików i symboli całego projektu.
+    """
+    if not baseline:
+        counts = {'added': 0, 'modified': 0, 'removed': 0}
+        for path, old in changed.items():
+            if path in all_files:
+                counts['added' if old is None else 'modified'] += 1
+            elif old is not None:
+                counts['removed'] += 1
+        return counts
+    delta = {'added': [], 'modified': [], 'removed': [], 'symbols_added': [], 'symbols_removed': [],
+             'imports': []}
+    for path, old in sorted(changed.items()):
+        new = all_files.get(path)
+        if old is None and new is None:
+            continue
+        if old is not None and new is not None:
+            if {k: v for k, v in old.items() if k != 'fingerprint'} == \
+               {k: v for k, v in new.items() if k != 'fingerprint'}:
+                continue
+            delta['modified'].append({'file': path, 'lines': (old.get('lines', 0), new.get('lines', 0))})
+        elif new is not None:
+            delta['added'].append({'file': path, 'lines': new.get('lines', 0)})
+        else:
+            delta['removed'].append({'file': path, 'lines': old.get('lines', 0)})
+
+        old_symbols = {(name, kind): line for name, _, kind, _, line in SymbolIndex.symbols_of(old)} if old else {}
+        new_symbols = {(name, kind): line for name, _, kind, _, line in SymbolIndex.symbols_of(new)} if new else {}
+        delta['symbols_added'] += [{'name': name, 'kind': kind, 'file': path, 'line': new_symbols[(name, kind)]}
+                                   for name, kind in sorted(new_symbols.keys() - old_symbols.keys())]
+        delta['symbols_removed'] += [{'name': name, 'kind': kind, 'file': path, 'line': old_symbols[(name, kind)]}
+                                     for name, kind in sorted(old_symbols.keys() - new_symbols.keys())]
+        old_imports = set(old.get('imports', [])) if old else set()
+        new_imports = set(new.get('imports', [])) if new else set()
+        if old is not None and new is not None and old_imports != new_imports:
+            delta['imports'].append({'file': path, 'added': sorted(new_imports - old_imports),
+                                     'removed': sorted(old_imports - new_imports)})
+    return delta
+
+
+class StepTimer:
+    """Stoper etapów analizy jednego pliku (read/cache/parse/todos) używany w trybie --profile."""
+
+    def __init__(self):
+        self.laps = {}
+        self._last = time.perf_counter()
+
+    def lap(self, step):
+        now = time.perf_counter()
+        self.laps[step] = self.laps.get(step, 0.0) + now - self._last
+        self._last = now
+
+
+class BrainProfiler:
+    """Zbiera czasy faz, koszt analizy per rozszerzenie i najwolniejsze pliki; zapisuje PROFILE.json."""
+
+    def __init__(self, top_n=25):
+        self.top_n = top_n
+        self.phases = {}
+        self.steps = {}
+        self.extensions = {}
+        self.slowest = []  # kopiec (czas, plik) - top_n najwolniejszych
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def record_file(self, path, size, laps):
+        seconds = sum(laps.values())
+        ext = posixpath.splitext(path)[1].lower() or '(brak)'
+        cost = self.extensions.setdefault(ext, {'files': 0, 'seconds': 0.0, 'bytes': 0})
+        cost['files'] += 1
+        cost['seconds'] += seconds
+        cost['bytes'] += size
+        for step, step_seconds in laps.items():
+            self.steps[step] = self.steps.get(step, 0.0) + step_seconds
+        if len(self.slowest) < self.top_n:
+            heapq.heappush(self.slowest, (seconds, path))
+        elif seconds > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, (seconds, path))
+
+    def report(self, cprofile=None):
+        ms = lambda seconds: round(seconds * 1000, 3)
+        report = {
+            'generated': datetime.now().isoformat(timespec='seconds'),
+            'total_ms': ms(time.perf_counter() - self.started),
+            'phases_ms': {name: ms(seconds) for name, seconds in self.phases.items()},
+            'analysis_steps_ms': {step: ms(seconds) for step, seconds in self.steps.items()},
+            'extensions': [
+                {'ext': ext, 'files': cost['files'], 'bytes': cost['bytes'], 'total_ms': ms(cost['seconds']),
+                 'avg_ms': ms(cost['seconds'] / cost['files'])}
+                for ext, cost in sorted(self.extensions.items(), key=lambda item: -item[1]['seconds'])
+            ],
+            'slowest_files': [{'file': path, 'ms': ms(seconds)} for seconds, path in sorted(self.slowest, reverse=True)],
+        }
+        if cprofile is not None:
+            stats = pstats.Stats(cprofile).stats
+            top = sorted(stats.items(), key=lambda item: -item[1][3])[:self.top_n]
+            report['cprofile_top'] = [
+                {'function': f"{Path(filename).name}:{line}({func})", 'calls': nc,
+                 'tottime_ms': ms(tt), 'cumtime_ms': ms(ct)}
+                for (filename, line, func), (cc, nc, tt, ct, callers) in top
+            ]
+        return report
+
+
 class UniversalAIBrain:
     """Uniwersalny mózg projektu - poprawiona wersja"""
     
-    def __init__(self, project_root=None, ai_type="universal"):
+    def __init__(self, project_root=None, ai_type="universal", incremental=True, verify_hash=False,
+                 jobs=1, respect_gitignore=True, state_backend='json', export_json=False,
+                 analysis_cache=True, cache_dir=None, cache_size_mb=256, profile=False, cprofile=False,
+                 token_budget=None, shard=None, shard_by='hash', stream=None):
         self.root = Path(project_root or os.getcwd())
         self.brain_dir = self.root / '.ai-brain'
         self.brain_dir.mkdir(exist_ok=True)
         self.ai_type = ai_type.lower()
+        # Budżet tokenów mapy: jawny (0 = pełna mapa) lub domyślny dla wybranego AI (None = pełna mapa)
+        self.token_budget = AI_TOKEN_BUDGETS.get(self.ai_type) if token_budget is None else (token_budget or None)
+        # Co pominęło ostatnie renderowanie mapy z budżetem: {'shown', 'total', 'omitted': {folder: liczba}}
+        self.map_truncation = None
+        # Tryb przyrostowy: ponowna analiza tylko zmienionych plików
+        self.incremental = incremental
+        # Dodatkowa weryfikacja hashem, gdy zmienił się tylko mtime
+        self.verify_hash = verify_hash
+        # Liczba procesów analizy (0 = wszystkie rdzenie)
+        self.jobs = jobs if jobs and jobs > 0 else (os.cpu_count() or 1)
+        # Przycinanie katalogów według plików .gitignore projektu
+        self.respect_gitignore = respect_gitignore
+        # Magazyn stanu: 'json' (CURRENT_STATE.json) lub 'sqlite' (CURRENT_STATE.sqlite)
+        self.state_backend = state_backend
+        # W trybie sqlite dodatkowo eksportuj CURRENT_STATE.json dla starszych narzędzi
+        self.export_json = export_json
+        self._state_store = None
+        self._symbol_index = None
+        self._todo_index = None
+        # Tryb części (shard): (K, N) - analizuj tylko pliki części K z N, podział wg 'hash' lub 'dir'
+        self.shard = shard
+        self.shard_by = shard_by
+        # Zmiany od ostatniego zapisu mapy (dla PROJECT_DELTA.md): {'baseline': czy był poprzedni stan,
+        # 'files': {ścieżka: poprzednie info lub None}}; None = brak skanu (np. --render-only)
+        self.changes = None
+        # Tryb potokowy (--stream, tylko sqlite): rozmiar paczki zapisu; None = klasyczny słownik w pamięci
+        self.stream = stream
+        # Wspólna (między worktree/gałęziami) pamięć podręczna analiz kluczowana hashem treści
+        self.analysis_cache = AnalysisCache(cache_dir, cache_size_mb * 1024 * 1024) if analysis_cache else None
+        # Profilowanie (--profile): czasy faz i plików do PROFILE.json, opcjonalnie cProfile
+        self.profile = profile or cprofile
+        self.cprofile = cprofile
+        self.profiler = BrainProfiler() if self.profile else None
         
         print(f"🔍 Katalog główny: {self.root}")
         print(f"🧠 Katalog brain: {self.brain_dir}")
@@ -46,56 +1670,175 @@ class UniversalAIBrain:
             '.rs': 'Rust', '.vue': 'Vue', '.svelte': 'Svelte',
             '.html': 'HTML', '.css': 'CSS', '.scss': 'SCSS',
             '.json': 'JSON', '.xml': 'XML', '.yaml': 'YAML', '.yml': 'YAML',
-            '.md': 'Markdown', '.txt': 'Text'
+            '.md': 'Markdown', '.txt': 'Text', '.sql': 'SQL'
         }
 
-    def scan_files(self, verbose=True):
-        """Skanuje wszystkie pliki w projekcie, uwzględniając ignorowane katalogi i pliki."""
-        if verbose: print(f"🔎 Skanowanie plików w: {self.root}")
-        found_files = []
-        for root, dirs, files in os.walk(self.root, topdown=True):
-            # Usuń ignorowane foldery, aby os.walk do nich nie wchodził
-            dirs[:] = [d for d in dirs if d not in self.ignore_dirs]
-            
-            for file in files:
-                if file in self.ignore_files:
-                    continue
-                
-                filepath = Path(root) / file
-                
-                # Sprawdź, czy ścieżka nie zawiera ignorowanego folderu (dodatkowe zabezpieczenie)
-                is_ignored = False
-                for part in filepath.parts:
-                    if part in self.ignore_dirs:
-                        is_ignored = True
-                        break
-                if is_ignored:
+        # Pliki konfiguracyjne analizowane niezależnie od rozszerzenia
+        self.special_files = {
+            'package.json', 'requirements.txt', 'dockerfile', 'tsconfig.json',
+            'next.config.js', '.gitignore'
+        }
+
+    def __getstate__(self):
+        # Do procesów roboczych puli nie przekazujemy połączenia z bazą stanu
+        return dict(self.__dict__, _state_store=None, _symbol_index=None, _todo_index=None, profiler=None)
+
+    def is_ignored(self, rel_path, is_dir, gitignores):
+        """Sprawdza ścieżkę względem stosu reguł .gitignore (wygrywa ostatnie dopasowanie)."""
+        ignored = False
+        for rules in gitignores:
+            result = rules.match(rel_path, is_dir)
+            if result is not None:
+                ignored = result
+        return ignored
+
+    def is_candidate_name(self, filename):
+        """Czy plik o tej nazwie jest plikiem kodu, dokumentacji lub konfiguracji."""
+        name = filename.lower()
+        return os.path.splitext(name)[1] in self.important_files or name in self.special_files
+
+    def is_tracked(self, filepath):
+        """Sprawdza pojedynczą ścieżkę tymi samymi regułami co iter_files (dla trybu --watch)."""
+        try:
+            rel_parts = Path(filepath).relative_to(self.root).parts
+        except ValueError:
+            return False
+        if not rel_parts or any(part in self.ignore_dirs for part in rel_parts[:-1]):
+            return False
+        if rel_parts[-1] in self.ignore_files or not self.is_candidate_name(rel_parts[-1]):
+            return False
+        if not self.respect_gitignore:
+            return True
+
+        gitignores = ()
+        rel_dir = ''
+        for part in rel_parts[:-1] + (None,):
+            rules = self._gitignore_for(rel_dir)
+            if rules:
+                gitignores = gitignores + (rules,)
+            if part is None:
+                break
+            rel_dir = f"{rel_dir}/{part}" if rel_dir else part
+            if self.is_ignored(rel_dir, True, gitignores):
+                return False
+        return not self.is_ignored('/'.join(rel_parts), False, gitignores)
+
+    def _gitignore_for(self, rel_dir):
+        """Reguły .gitignore katalogu (z pamięcią podręczną, czyszczoną przy zmianie .gitignore)."""
+        cache = self.__dict__.setdefault('_gitignore_cache', {})
+        if rel_dir not in cache:
+            path = self.root / rel_dir / '.gitignore'
+            rules = GitIgnoreRules.from_file(path, rel_dir) if path.is_file() else None
+            cache[rel_dir] = rules if rules and rules.rules else None
+        return cache[rel_dir]
+
+    def iter_files(self):
+        """Leniwie zwraca krotki (ścieżka, stat) plików projektu - jedno przejście os.scandir.
+
+        Ignorowane katalogi (ignore_dirs i .gitignore) są przycinane, zanim walker do nich wejdzie,
+        a stat z DirEntry jest przekazywany dalej, więc analiza nie musi go powtarzać.
+        """
+        # Stos: (katalog absolutny, ścieżka względna posix, reguły .gitignore przodków)
+        stack = [(str(self.root), '', ())]
+        while stack:
+            dir_path, rel_dir, gitignores = stack.pop()
+            try:
+                with os.scandir(dir_path) as it:
+                    entries = sorted(it, key=lambda e: e.name)
+            except OSError:
+                continue
+
+            if self.respect_gitignore and any(e.name == '.gitignore' for e in entries):
+                rules = GitIgnoreRules.from_file(os.path.join(dir_path, '.gitignore'), rel_dir)
+                if rules and rules.rules:
+                    gitignores = gitignores + (rules,)
+
+            subdirs = []
+            for entry in entries:
+                rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in self.ignore_dirs and \
+                           not self.is_ignored(rel_path, True, gitignores):
+                            subdirs.append((entry.path, rel_path, gitignores))
+                        continue
+                    if not entry.is_file() or entry.name in self.ignore_files:
+                        continue
+                except OSError:
                     continue
 
                 # Sprawdź, czy to plik kodu, dokumentacji lub konfiguracji
-                if filepath.suffix.lower() in self.important_files or \
-                   file.lower() in ['package.json', 'requirements.txt', 'dockerfile', 'tsconfig.json', 'next.config.js', '.gitignore']:
-                    found_files.append(filepath)
-                    
+                if not self.is_candidate_name(entry.name):
+                    continue
+                if gitignores and self.is_ignored(rel_path, False, gitignores):
+                    continue
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                yield Path(entry.path), st
+
+            # Odwrócona kolejność na stosie = przejście w porządku alfabetycznym
+            stack.extend(reversed(subdirs))
+
+    def scan_files(self, verbose=True):
+        """Skanuje wszystkie pliki w projekcie; zwraca listę krotek (ścieżka, stat)."""
+        if verbose: print(f"🔎 Skanowanie plików w: {self.root}")
+        found_files = list(self.iter_files())
         if verbose: print(f"📊 Znaleziono {len(found_files)} plików do analizy")
         return found_files
 
-    def analyze_code_file(self, filepath, verbose=False):
-        """Analizuje pojedynczy plik kodu."""
+    def _phase(self, name):
+        """Kontekst mierzący fazę w trybie --profile (bez profilowania nic nie robi)."""
+        return self.profiler.phase(name) if self.profiler else nullcontext()
+
+    def analyze_code_file(self, filepath, verbose=False, st=None, timer=None, fingerprint=False):
+        """Analizuje pojedynczy plik kodu (st - opcjonalny, już pobrany stat pliku; timer - StepTimer).
+
+        fingerprint=True dołącza odcisk pliku; hash treści (--verify-hash) liczony jest z bajtów
+        wczytanych do analizy, bez ponownego otwierania pliku.
+        """
         relative_path = filepath.relative_to(self.root)
         
         # Pomijaj zbyt duże pliki binarne lub pliki, które nie są tekstem
         try:
-            if filepath.stat().st_size > 1_000_000: # Limit 1MB
+            if st is None:
+                st = filepath.stat()
+            if st.st_size > 1_000_000: # Limit 1MB
                 if verbose: print(f"⚠️ Pomijam duży plik: {relative_path}")
                 return None
             
-            with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
+            with open(filepath, 'rb') as f:
+                raw = f.read()
         except (IOError, FileNotFoundError) as e:
             if verbose: print(f"⚠️ Błąd odczytu {relative_path}: {e}")
             return None
-            
+        if timer: timer.lap('read')
+
+        ext = filepath.suffix.lower()
+        digest = None
+        if self.analysis_cache is not None or (fingerprint and self.verify_hash):
+            digest = hashlib.sha1(raw).hexdigest()
+        cached = cache_key = None
+        if self.analysis_cache is not None:
+            cache_key = AnalysisCache.make_key(digest, ext)
+            cached = self.analysis_cache.get(cache_key)
+            if timer: timer.lap('cache')
+
+        if cached is not None:
+            info = {'file': str(relative_path), **cached}
+        else:
+            info = self.analyze_content(relative_path, ext, raw.decode('utf-8', errors='ignore'), verbose, timer)
+            if cache_key is not None:
+                self.analysis_cache.put(cache_key, info)
+        if fingerprint:
+            info['fingerprint'] = file_fingerprint(filepath, st, self.verify_hash, digest)
+        return info
+
+    def analyze_content(self, relative_path, ext, content, verbose=False, timer=None):
+        """Analizuje treść pliku (bez dostępu do dysku) - wynik zależy tylko od treści i rozszerzenia."""
+        # Jak przy odczycie w trybie tekstowym: ujednolicone końce linii
+        content = content.replace('\r\n', '\n').replace('\r', '\n')
         if not content.strip():
             return {'file': str(relative_path), 'lines': 0, 'size': 0, 'empty': True}
 
@@ -103,121 +1846,960 @@ class UniversalAIBrain:
             'file': str(relative_path), 'lines': len(content.splitlines()), 'size': len(content),
             'functions': [], 'classes': [], 'imports': [], 'exports': [], 'todos': [], 'empty': False
         }
-        ext = filepath.suffix.lower()
 
-        # Analiza Python za pomocą AST
+        # Analiza Python: jedno przejście NodeVisitor z zagnieżdżoną tablicą symboli
         if ext == '.py':
             try:
-                tree = ast.parse(content)
-                for node in ast.walk(tree):
-                    if isinstance(node, ast.FunctionDef):
-                        info['functions'].append({'name': node.name, 'line': node.lineno})
-                    elif isinstance(node, ast.ClassDef):
-                        info['classes'].append({'name': node.name, 'line': node.lineno})
-                    elif isinstance(node, ast.ImportFrom) and node.module:
-                        info['imports'].append(node.module)
-            except SyntaxError:
+                symbols = extract_python_symbols(content)
+                info['functions'] = symbols['functions']
+                info['classes'] = symbols['classes']
+                info['imports'] = symbols['imports']
+                info['constants'] = symbols['constants']
+                if symbols['docstring']:
+                    info['docstring'] = symbols['docstring']
+            except (SyntaxError, ValueError):
                 if verbose: print(f"⚠️ Błąd składni w pliku Python: {relative_path}")
 
-        # Analiza JS/TS za pomocą Regex (uproszczona)
-        elif ext in ['.js', '.jsx', 'ts', 'tsx']:
-            # Importy
-            for match in re.finditer(r'import(?:.*?)from\s+[\'"]([^\'"]+)[\'"]', content):
-                info['imports'].append(match.group(1))
-            # Funkcje i Komponenty (nazwy z wielkiej litery)
-            for match in re.finditer(r'function\s+([A-Z_]\w*)', content):
-                 info['functions'].append({'name': match.group(1), 'type': 'component' if match.group(1)[0].isupper() else 'function'})
-            for match in re.finditer(r'(?:const|let)\s+([A-Z_]\w*)\s*=\s*(?:React\.memo)?\((?:async\s*)?function', content):
-                 info['functions'].append({'name': match.group(1), 'type': 'component' if match.group(1)[0].isupper() else 'function'})
-            for match in re.finditer(r'(?:const|let)\s+([A-Z_]\w*)\s*=\s*(?:async\s*)?\([^)]*\)\s*=>', content):
-                 info['functions'].append({'name': match.group(1), 'type': 'component' if match.group(1)[0].isupper() else 'function'})
+        # Analiza JS/TS jednoprzebiegowym skanerem (pomija napisy i komentarze)
+        elif ext in ('.js', '.jsx', '.ts', '.tsx'):
+            symbols = extract_js_symbols(content)
+            info['imports'] = symbols['imports']
+            info['exports'] = symbols['exports']
+            info['functions'] = symbols['functions']
+            info['classes'] = symbols['classes']
+            info['types'] = symbols['types']
+
+        # Migracje SQL: lista operacji DDL (schemat składany później w build_schema_catalog)
+        elif ext == '.sql':
+            info['sql'] = extract_sql_schema(content)
+        if timer: timer.lap('parse')
 
         # Notatki TODO/FIXME
-        for match in re.finditer(r'(?://|#|/\*)\s*(TODO|FIXME)[\s:](.*)', content, re.IGNORECASE):
-            info['todos'].append({'type': match.group(1).upper(), 'text': match.group(2).strip()})
+        info['todos'] = extract_todos(content)
+        if timer: timer.lap('todos')
         
         return info
 
+    def load_state(self, state_file=None):
+        """Wczytuje CURRENT_STATE.json jako {'files', 'connections', 'reverse_deps', 'stats'}.
+
+        Starszy format (sam słownik plików) jest opakowywany w nową strukturę.
+        """
+        empty = {'files': {}, 'connections': [], 'reverse_deps': {}, 'stats': {}}
+        state_file = Path(state_file or self.brain_dir / 'CURRENT_STATE.json')
+        if not state_file.exists():
+            return empty
+        try:
+            with open(state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (IOError, ValueError):
+            return empty
+        if not isinstance(state, dict):
+            return empty
+        if not isinstance(state.get('files'), dict):
+            state = dict(empty, files=state)
+        return state
+
+    @property
+    def state_store(self):
+        """Połączenie z CURRENT_STATE.sqlite (otwierane przy pierwszym użyciu)."""
+        if self._state_store is None:
+            self._state_store = SQLiteStateStore(self.brain_dir / 'CURRENT_STATE.sqlite')
+        return self._state_store
+
+    @property
+    def symbol_index(self):
+        """Indeks symboli .ai-brain/SYMBOLS.sqlite (otwierany przy pierwszym użyciu)."""
+        if self._symbol_index is None:
+            self._symbol_index = SymbolIndex(self.brain_dir / 'SYMBOLS.sqlite')
+        return self._symbol_index
+
+    def find_symbol(self, query, limit=20, fuzzy=False):
+        """Gdzie zdefiniowano symbol? Zwraca [{name, kind, file, line}] z indeksu symboli."""
+        if self.symbol_index.is_empty():
+            # Indeks jeszcze nie istnieje (stan sprzed jego wprowadzenia) - zbuduj go ze stanu
+            self.symbol_index.sync(self.load_previous_state())
+        return self.symbol_index.find(query, limit, fuzzy)
+
+    @property
+    def todo_index(self):
+        """Indeks notatek TODO/FIXME .ai-brain/TODOS.sqlite (otwierany przy pierwszym użyciu)."""
+        if self._todo_index is None:
+            self._todo_index = TodoIndex(self.brain_dir / 'TODOS.sqlite')
+        return self._todo_index
+
+    def oldest_todos(self, limit=20):
+        """Najstarsze TODO/FIXME w projekcie: [{type, text, file, line, first_seen}]."""
+        if self.todo_index.is_empty():
+            self.todo_index.sync(self.load_previous_state())
+        return self.todo_index.oldest(limit)
+
+    def load_previous_state(self):
+        """Zwraca pliki z poprzedniego stanu (w trybie sqlite - leniwy widok, bez ładowania wszystkiego)."""
+        if self.shard:
+            return self.load_state(self.shard_state_file)['files']
+        if self.state_backend == 'sqlite':
+            return StoredFilesView(self.state_store)
+        return self.load_state()['files']
+
+    @staticmethod
+    def shard_of(rel_path, count, by='hash'):
+        """Numer części (1..count) dla ścieżki - stabilny między procesami i maszynami."""
+        key = rel_path.replace('\\', '/')
+        if by == 'dir':
+            key = key.split('/', 1)[0]
+        return int(hashlib.sha1(key.encode('utf-8')).hexdigest()[:8], 16) % count + 1
+
+    def in_shard(self, filepath):
+        index, count = self.shard
+        return self.shard_of(str(filepath.relative_to(self.root)), count, self.shard_by) == index
+
+    @property
+    def shard_state_file(self):
+        index, count = self.shard
+        return self.brain_dir / 'shards' / f'CURRENT_STATE.shard-{index}-of-{count}.json'
+
+    def generate_shard(self, verbose=True):
+        """Analizuje tylko pliki swojej części i zapisuje częściowy stan (graf i mapa powstają przy scalaniu)."""
+        index, count = self.shard
+        if verbose: print(f"🧩 Część {index}/{count} (podział: {self.shard_by})...")
+        all_files = self.build_project_graph(verbose)
+        partial = {'shard': {'index': index, 'count': count, 'by': self.shard_by}, 'files': all_files}
+        shard_file = self.shard_state_file
+        shard_file.parent.mkdir(exist_ok=True)
+        with atomic_open(shard_file) as f:
+            json.dump(partial, f, indent=2)
+        if verbose: print(f"💾 Stan częściowy: {shard_file} ({len(all_files)} plików)")
+        return shard_file
+
+    def merge_shards(self, shard_files=None, verbose=True):
+        """Scala stany częściowe w jeden stan i mapę; wynik nie zależy od kolejności plików części."""
+        shard_files = [Path(p) for p in shard_files or sorted((self.brain_dir / 'shards').glob('CURRENT_STATE.shard-*.json'))]
+        partials = []
+        for shard_file in shard_files:
+            with open(shard_file, 'r', encoding='utf-8') as f:
+                partials.append(json.load(f))
+        if not partials:
+            print("❌ Brak stanów częściowych do scalenia.")
+            return None, None
+
+        layouts = {(p['shard']['count'], p['shard']['by']) for p in partials}
+        if len(layouts) > 1:
+            raise ValueError(f"Części pochodzą z różnych podziałów: {sorted(layouts)}")
+        count = partials[0]['shard']['count']
+        missing = set(range(1, count + 1)) - {p['shard']['index'] for p in partials}
+        if missing:
+            print(f"⚠️ Brak części: {sorted(missing)} - mapa będzie niekompletna.")
+
+        merged, conflicts = {}, 0
+        for partial in sorted(partials, key=lambda p: p['shard']['index']):
+            for path, info in partial['files'].items():
+                if path in merged:
+                    conflicts += 1  # ten sam plik w dwóch częściach - wygrywa niższy numer części
+                    continue
+                merged[path] = info
+        if verbose:
+            print(f"🧩 Scalono {len(partials)}/{count} części: {len(merged)} plików"
+                  + (f", ⚠️ konflikty: {conflicts}" if conflicts else ""))
+        all_files = {path: merged[path] for path in sorted(merged)}
+        return self.write_project_map(all_files, verbose)
+
+    def who_imports(self, filepath):
+        """Zwraca listę plików importujących filepath (z odwrotnego indeksu w stanie)."""
+        key = str(Path(filepath))
+        if self.state_backend == 'sqlite':
+            return self.state_store.importers(key) or self.state_store.importers(key.replace('\\', '/'))
+        reverse_deps = self.load_state().get('reverse_deps', {})
+        return reverse_deps.get(key) or reverse_deps.get(key.replace('\\', '/'), [])
+
+    def reuse_previous_info(self, filepath, st, previous):
+        """Zwraca zapisane info pliku, jeśli jego odcisk się nie zmienił."""
+        if not previous:
+            return None
+        fingerprint = previous.get('fingerprint')
+        if not fingerprint or fingerprint.get('size') != st.st_size or \
+           fingerprint.get('analyzer') != ANALYZER_VERSION:
+            return None
+        if fingerprint.get('mtime_ns') == st.st_mtime_ns:
+            return previous
+        # Zmienił się tylko mtime (np. checkout, touch) - porównaj treść
+        if self.verify_hash and fingerprint.get('hash'):
+            if content_hash(filepath) == fingerprint['hash']:
+                info = dict(previous)
+                info['fingerprint'] = dict(fingerprint, mtime_ns=st.st_mtime_ns)
+                return info
+        return None
+
+    def analyze_with_fingerprint(self, filepath, st, timer=None):
+        """Analizuje plik i dołącza jego odcisk (używane także w procesach roboczych)."""
+        file_info = self.analyze_code_file(filepath, verbose=False, st=st, timer=timer, fingerprint=True)
+        if file_info:
+            if timer:
+                timer.lap('fingerprint')
+                # Czasy wracają z procesu roboczego razem z wynikiem; zdejmuje je _take_profile
+                file_info['_profile'] = timer.laps
+        return file_info
+
+    def _analyze_chunk(self, chunk):
+        """Analizuje paczkę plików w procesie roboczym puli."""
+        return [self.analyze_with_fingerprint(filepath, st, StepTimer() if self.profile else None)
+                for filepath, st in chunk]
+
+    def _take_profile(self, file_info):
+        """Przenosi czasy etapów z wyniku analizy do profilera (pole '_profile' nie trafia do stanu)."""
+        if file_info and '_profile' in file_info:
+            laps = file_info.pop('_profile')
+            if self.profiler:
+                self.profiler.record_file(file_info['file'], file_info.get('size', 0), laps)
+        return file_info
+
+    def analyze_pending(self, pending, verbose=True):
+        """Analizuje listę (ścieżka, stat) szeregowo lub w puli procesów; wyniki w kolejności wejścia."""
+        total = len(pending)
+        if self.jobs <= 1 or total < 2:
+            for i, (filepath, st) in enumerate(pending):
+                if verbose:
+                    print(f"  Analizuję: [{i+1}/{total}] {filepath.relative_to(self.root)}", end='\r')
+                yield self._take_profile(
+                    self.analyze_with_fingerprint(filepath, st, StepTimer() if self.profile else None))
+            return
+
+        # Paczki zamiast pojedynczych plików - mniej narzutu na IPC
+        chunk_size = max(1, min(256, total // (self.jobs * 4)))
+        chunks = [pending[i:i + chunk_size] for i in range(0, total, chunk_size)]
+        done = 0
+        with ProcessPoolExecutor(max_workers=self.jobs) as executor:
+            # executor.map oddaje wyniki strumieniowo, zachowując kolejność paczek
+            for results in executor.map(self._analyze_chunk, chunks):
+                done += len(results)
+                if verbose:
+                    print(f"  Analizuję: [{done}/{total}] ({self.jobs} procesów)", end='\r')
+                for file_info in results:
+                    yield self._take_profile(file_info)
+
     def build_project_graph(self, verbose=True):
-        """Buduje graf projektu, analizując wszystkie pliki."""
+        """Buduje graf projektu, analizując tylko nowe i zmienione pliki."""
         if verbose: print("🏗️ Budowanie grafu projektu...")
-        files_list = self.scan_files(verbose)
+        with self._phase('scan_files'):
+            files_list = self.scan_files(verbose)
+            if self.shard:
+                files_list = [(filepath, st) for filepath, st in files_list if self.in_shard(filepath)]
+        with self._phase('load_state'):
+            previous_state = self.load_previous_state() if self.incremental else {}
+        reused = analyzed = 0
+
+        # Najpierw odsiej pliki bez zmian, resztę zbierz do analizy
+        entries = []
+        pending = []
+        with self._phase('reuse_check'):
+            for filepath, st in files_list:
+                relative_path = str(filepath.relative_to(self.root))
+                file_info = self.reuse_previous_info(filepath, st, previous_state.get(relative_path))
+                if file_info:
+                    reused += 1
+                else:
+                    pending.append((filepath, st))
+                entries.append(file_info)
+
+        # Wyniki analizy trafiają na swoje miejsca - kolejność jak w trybie szeregowym
+        analyzed_infos = self.analyze_pending(pending, verbose)
         all_files = {}
+        with self._phase('analyze'):
+            for file_info in entries:
+                if file_info is None:
+                    file_info = next(analyzed_infos)
+                    if file_info:
+                        analyzed += 1
+                if file_info:
+                    all_files[file_info['file']] = file_info
         
-        total_files = len(files_list)
-        for i, filepath in enumerate(files_list):
-            if verbose:
-                print(f"  Analizuję: [{i+1}/{total_files}] {filepath.relative_to(self.root)}", end='\r')
-            file_info = self.analyze_code_file(filepath, verbose=False)
-            if file_info:
-                all_files[file_info['file']] = file_info
-        
+        removed_paths = set(previous_state) - set(all_files)
+        removed = len(removed_paths)
+        # Do delty trafiają tylko rekordy przeanalizowane ponownie lub usunięte
+        changed = {str(filepath.relative_to(self.root)): None for filepath, st in pending}
+        for path in list(changed) + list(removed_paths):
+            changed[path] = previous_state.get(path)
+        self.changes = {'baseline': bool(previous_state), 'files': changed}
+        if self.analysis_cache is not None:
+            evicted = self.analysis_cache.evict()
+            if verbose and evicted: print(f"🧹 Pamięć podręczna analiz: usunięto {evicted} najstarszych wpisów.")
         if verbose:
             print(" " * 120, end='\r') # Wyczyść linię postępu
-            print(f"✅ Przeanalizowano {len(all_files)} plików.")
+            print(f"✅ Przeanalizowano {len(all_files)} plików "
+                  f"(♻️ bez zmian: {reused}, 🔄 zmienione/nowe: {analyzed}, 🗑️ usunięte: {removed}).")
         return all_files
 
+    def analyze_stream(self, items, chunk_size=64):
+        """Analizuje strumień (ścieżka, stat) i zwraca pary (ścieżka, info lub None) w kolejności wejścia.
+
+        W puli procesów w locie jest najwyżej 2 * jobs paczek - ograniczona kolejka zamiast pełnej listy.
+        """
+        if self.jobs <= 1:
+            for filepath, st in items:
+                yield filepath, self._take_profile(
+                    self.analyze_with_fingerprint(filepath, st, StepTimer() if self.profile else None))
+            return
+        in_flight = deque()
+        with ProcessPoolExecutor(max_workers=self.jobs) as executor:
+            for chunk in batched(items, chunk_size):
+                in_flight.append((chunk, executor.submit(self._analyze_chunk, chunk)))
+                while len(in_flight) >= self.jobs * 2:
+                    done, future = in_flight.popleft()
+                    for (filepath, st), file_info in zip(done, future.result()):
+                        yield filepath, self._take_profile(file_info)
+            while in_flight:
+                done, future = in_flight.popleft()
+                for (filepath, st), file_info in zip(done, future.result()):
+                    yield filepath, self._take_profile(file_info)
+
+    def stream_project_graph(self, verbose=True):
+        """Potokowa wersja build_project_graph: odkrywanie -> analiza -> zapis do SQLite.
+
+        Etapy to generatory połączone paczkami, więc w pamięci są naraz tylko rekordy bieżącej
+        paczki (i paczek w puli procesów), a nie cały projekt. Zwraca leniwy widok magazynu.
+
+        Ograniczenie dotyczy tylko rekordów plików: write_project_map nadal buduje dla całego
+        projektu indeks ścieżek (ImportResolver), listę połączeń, odwrotne zależności i oceny -
+        pamięć rośnie z liczbą plików i krawędzi, tylko wolniej niż bez --stream.
+        """
+        if verbose: print(f"🏗️ Budowanie grafu projektu (potokowo, paczki po {self.stream})...")
+        store = self.state_store
+        baseline = self.incremental and store.count() > 0
+        counts = {'found': 0, 'reused': 0, 'analyzed': 0}
+        # Bez poprzedniego stanu delta to same liczniki - pamięć nie rośnie z rozmiarem projektu
+        delta = compute_state_delta({}, {}, baseline)
+        store.begin_scan()
+
+        def discovered():
+            for filepath, st in self.iter_files():
+                counts['found'] += 1
+                yield filepath, st
+
+        def pending():
+            # Odsiew plików bez zmian po odciskach z bazy - bez wczytywania ich rekordów
+            for batch in batched(discovered(), self.stream):
+                paths = [str(filepath.relative_to(self.root)) for filepath, st in batch]
+                store.mark_seen(paths)
+                stored = store.fingerprints(paths) if self.incremental else {}
+                for (filepath, st), path in zip(batch, paths):
+                    key = stored.get(path)
+                    if key and key[0] == st.st_size and key[1] == st.st_mtime_ns and key[3] == ANALYZER_VERSION:
+                        counts['reused'] += 1
+                        continue
+                    if key and self.verify_hash:
+                        reused = self.reuse_previous_info(filepath, st, store.get_file(path))
+                        if reused:
+                            store.upsert_file(reused)
+                            counts['reused'] += 1
+                            continue
+                    yield filepath, st
+
+        def record(path, old, new):
+            for name, items in compute_state_delta({path: old}, {path: new} if new else {}, baseline).items():
+                delta[name] += items
+
+        with self._phase('pipeline'):
+            for batch in batched(self.analyze_stream(pending()), self.stream):
+                with store.conn:
+                    for filepath, file_info in batch:
+                        path = str(filepath.relative_to(self.root))
+                        old = store.get_file(path) if baseline else None
+                        if file_info:
+                            store.upsert_file(file_info)
+                            counts['analyzed'] += 1
+                        else:
+                            store.delete_file(path)
+                        record(path, old, file_info)
+                if verbose:
+                    print(f"  Zapisano: {counts['analyzed']} (odkryte: {counts['found']})", end='\r')
+            removed = 0
+            with store.conn:
+                for path in store.unseen_paths():
+                    record(path, store.get_file(path), None)
+                    store.delete_file(path)
+                    removed += 1
+
+        self.changes = {'baseline': baseline, 'files': {}, 'delta': delta}
+        if self.analysis_cache is not None:
+            evicted = self.analysis_cache.evict()
+            if verbose and evicted: print(f"🧹 Pamięć podręczna analiz: usunięto {evicted} najstarszych wpisów.")
+        if verbose:
+            print(" " * 120, end='\r')
+            print(f"✅ Przeanalizowano {store.count()} plików "
+                  f"(♻️ bez zmian: {counts['reused']}, 🔄 zmienione/nowe: {counts['analyzed']}, 🗑️ usunięte: {removed}).")
+        return StoredFilesView(store)
+
+    def note_change(self, relative_path, previous):
+        """Zapamiętuje stan pliku sprzed pierwszej zmiany od ostatniego zapisu mapy."""
+        if self.changes is None:
+            self.changes = {'baseline': True, 'files': {}}
+        self.changes['files'].setdefault(relative_path, previous)
+
+    def refresh_paths(self, all_files, paths):
+        """Aktualizuje słownik plików tylko dla wskazanych ścieżek; zwraca liczbę zmian."""
+        changed = 0
+        for filepath in sorted(paths):
+            relative_path = str(filepath.relative_to(self.root))
+            try:
+                st = filepath.stat()
+                exists = filepath.is_file()
+            except OSError:
+                exists = False
+            if not exists or not self.is_tracked(filepath):
+                if relative_path in all_files:
+                    self.note_change(relative_path, all_files.pop(relative_path))
+                    changed += 1
+                continue
+            reused = self.reuse_previous_info(filepath, st, all_files.get(relative_path))
+            if reused:
+                all_files[relative_path] = reused
+                continue
+            self.note_change(relative_path, all_files.get(relative_path))
+            file_info = self.analyze_with_fingerprint(filepath, st)
+            if file_info:
+                all_files[relative_path] = file_info
+            else:
+                all_files.pop(relative_path, None)
+            changed += 1
+        return changed
+
+    def watch(self, debounce=1.0):
+        """Tryb demona: obserwuje projekt i odświeża mapę przyrostowo, najwyżej raz na okno debounce."""
+        if not WATCHDOG_AVAILABLE:
+            print("⚠️  watchdog nie jest zainstalowany. Uruchom: pip install watchdog")
+            return
+
+        print(f"👀 Tryb obserwacji (okno: {debounce:.1f}s). Naciśnij Ctrl+C aby zatrzymać...")
+        all_files = self.build_project_graph(verbose=True)
+        self.write_project_map(all_files, verbose=False)
+
+        handler = BrainWatchHandler(self)
+        observer = Observer()
+        observer.schedule(handler, str(self.root), recursive=True)
+        observer.start()
+        last_flush = 0.0
+        try:
+            while True:
+                time.sleep(min(0.1, debounce / 2))
+                paths, rescan, first_event, last_event = handler.peek()
+                if not paths and not rescan:
+                    continue
+                now = time.monotonic()
+                # Czekaj na ciszę po serii zdarzeń, ale nie dłużej niż dwa okna od pierwszego
+                quiet = now - last_event >= debounce
+                overdue = now - first_event >= 2 * debounce
+                if not (quiet or overdue) or now - last_flush < debounce:
+                    continue
+
+                paths, rescan = handler.drain()
+                started = time.perf_counter()
+                if rescan:
+                    # Zmiana katalogów lub .gitignore - przyrostowy przegląd drzewa (bez ponownej analizy)
+                    self.__dict__.pop('_gitignore_cache', None)
+                    all_files, changed = self._rescan(all_files)
+                else:
+                    changed = self.refresh_paths(all_files, paths)
+                if changed:
+                    self.write_project_map(all_files, verbose=False)
+                    print(f"🔄 {datetime.now().strftime('%H:%M:%S')} mapa odświeżona "
+                          f"({changed} zmian, {(time.perf_counter() - started) * 1000:.0f} ms)")
+                last_flush = time.monotonic()
+        except KeyboardInterrupt:
+            print("\n👋 Obserwacja zatrzymana")
+        finally:
+            observer.stop()
+            observer.join()
+
+    def _rescan(self, all_files):
+        """Przegląda drzewo, używając bieżącego słownika plików jako stanu poprzedniego.
+
+        Jak refresh_paths zapisuje (note_change) stan sprzed zmiany plików dodanych, zmienionych
+        i usuniętych; zwraca (nowy słownik plików, liczba zmian).
+        """
+        all_files_new = {}
+        seen = set()
+        changed = 0
+        for filepath, st in self.iter_files():
+            relative_path = str(filepath.relative_to(self.root))
+            seen.add(relative_path)
+            previous = all_files.get(relative_path)
+            file_info = self.reuse_previous_info(filepath, st, previous)
+            if not file_info:
+                file_info = self.analyze_with_fingerprint(filepath, st)
+                if file_info or previous:
+                    self.note_change(relative_path, previous)
+                    changed += 1
+            if file_info:
+                all_files_new[relative_path] = file_info
+        # Pliki, których nie ma już w drzewie (usunięte lub wykluczone nowym .gitignore)
+        for relative_path in sorted(all_files.keys() - seen):
+            self.note_change(relative_path, all_files[relative_path])
+            changed += 1
+        return all_files_new, changed
+
     def generate_project_map(self, verbose=True):
         """Generuje finalną mapę projektu."""
         if verbose: print(f"🗺️ Generowanie mapy projektu dla AI: {self.ai_type.upper()}...")
-        all_files = self.build_project_graph(verbose)
-        if not all_files:
-            print("❌ Brak plików do wygenerowania mapy!")
-            return None, None
+        profile = cProfile.Profile() if self.cprofile else None
+        if profile: profile.enable()
+        all_files = self.stream_project_graph(verbose) if self.stream else self.build_project_graph(verbose)
+        result = self.write_project_map(all_files, verbose)
+        if profile: profile.disable()
+        if self.profiler:
+            self.write_profile(profile, verbose)
+        return result
+
+    def render_saved_map(self, verbose=True):
+        """Odtwarza PROJECT_MAP.md z zapisanego stanu (np. dla innego AI/budżetu) bez skanowania plików."""
+        if self.state_backend == 'sqlite':
+            all_files = self.load_previous_state()
+            reverse_deps = self.state_store.reverse_deps()
+            stats = self.state_store.get_meta('stats', {})
+            scores = self.state_store.get_meta('scores', {})
+            schema = self.state_store.get_meta('schema', {})
+        else:
+            state = self.load_state()
+            all_files, reverse_deps = state['files'], state['reverse_deps']
+            stats, scores = state['stats'], state.get('scores', {})
+            schema = state.get('schema')
+        if not all_files or not stats:
+            print("❌ Brak zapisanego stanu - uruchom najpierw pełną analizę.")
+            return None
+        if not scores:
+            scores = compute_importance(all_files, reverse_deps)
+        if not schema:
+            schema = build_schema_catalog(all_files)
+        map_file = self.brain_dir / 'PROJECT_MAP.md'
+        with atomic_open(map_file) as f:
+            f.writelines(self.render_project_map(all_files, reverse_deps, stats, scores, self.token_budget, schema))
+        if verbose:
+            budget = f"~{self.token_budget:,} tokenów" if self.token_budget else "bez limitu"
+            print(f"🗺️ Mapa dla {self.ai_type.upper()} ({budget}) odtworzona ze stanu: {map_file}")
+            self.report_truncation()
+        return map_file
 
-        total_lines = sum(f.get('lines', 0) for f in all_files.values())
-        total_functions = sum(len(f.get('functions', [])) for f in all_files.values())
-        total_todos = sum(len(f.get('todos', [])) for f in all_files.values())
+    def write_profile(self, cprofile=None, verbose=True):
+        """Zapisuje PROFILE.json (obok PROJECT_MAP.md) i opcjonalnie surowy zrzut PROFILE.prof."""
+        report = self.profiler.report(cprofile)
+        profile_file = self.brain_dir / 'PROFILE.json'
+        with atomic_open(profile_file) as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        if cprofile is not None:
+            cprofile.dump_stats(str(self.brain_dir / 'PROFILE.prof'))
+        if verbose:
+            print(f"\n⏱️ Profil zapisany: {profile_file} (łącznie {report['total_ms']:.0f} ms)")
+            for name, phase_ms in sorted(report['phases_ms'].items(), key=lambda item: -item[1]):
+                print(f"  {name:<14} {phase_ms:>10.1f} ms")
+            for item in report['slowest_files'][:5]:
+                print(f"  🐢 {item['file']} ({item['ms']:.1f} ms)")
+        return profile_file
 
-        # Budowanie treści mapy
-        map_content = f"""# 🗺️ MAPA PROJEKTU (Wygenerowano: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')})
+    @staticmethod
+    def map_folder(filepath):
+        folder = str(Path(filepath).parent)
+        return '📁 ROOT' if folder == '.' else folder
+
+    @staticmethod
+    def render_file_entry(info):
+        """Wpis pliku w mapie (nazwa, rozmiar, do 3 przykładowych funkcji)."""
+        filename = Path(info['file']).name
+        details = f"{info['lines']} linii"
+        if info.get('functions'):
+            details += f", {len(info['functions'])} funkcji"
+        entry = f"- **📄 {filename}** ({details})\n"
+        if info.get('functions'):
+            # Pokaż do 3 funkcji jako przykład
+            func_names = [f"`{f['name']}`" for f in info['functions'][:3]]
+            entry += f"  - *Zawiera:* {', '.join(func_names)}{'...' if len(info['functions']) > 3 else ''}\n"
+        if info.get('docstring'):
+            entry += f"  - *Opis:* {info['docstring']}\n"
+        # Klasy Python z metodami (tablica symboli z PythonSymbolVisitor)
+        for cls in [c for c in info.get('classes', []) if c.get('methods')][:3]:
+            method_names = [f"`{m['name']}`" for m in cls['methods'][:5]]
+            more = '...' if len(cls['methods']) > 5 else ''
+            entry += f"  - *Klasa* `{cls['name']}` (linie {cls['line']}-{cls['end_line']}): {', '.join(method_names)}{more}\n"
+        return entry
+
+    def select_files_for_budget(self, all_files, scores, budget):
+        """Zachłannie wybiera pliki w kolejności ważności, dopóki mieszczą się w budżecie tokenów."""
+        selected, folders, used = set(), set(), 0
+        for path in sorted(all_files, key=lambda p: (-scores.get(p, 0.0), p)):
+            info = all_files[path]
+            if info.get('empty', False): continue
+            folder = self.map_folder(path)
+            cost = estimate_tokens(self.render_file_entry(info))
+            if folder not in folders:
+                cost += estimate_tokens(f"\n### {folder}/\n")
+            if used + cost > budget:
+                continue  # mniejsze pliki mogą się jeszcze zmieścić
+            used += cost
+            selected.add(path)
+            folders.add(folder)
+        return selected
+
+    @staticmethod
+    def render_schema_section(schema, max_tables=40, max_columns=8):
+        """Sekcja mapy ze schematem bazy złożonym z migracji Supabase (przycięta do max_tables tabel)."""
+        if not schema or not schema.get('tables'):
+            return ''
+        tables = schema['tables']
+        with_rls = sum(1 for t in tables.values() if t['rls'])
+        section = (f"\n## 🗄️ SCHEMAT BAZY (supabase/migrations: {schema['migrations']} migracji)\n"
+                   f"- **Tabel:** {len(tables)} (RLS: {with_rls}) | **Funkcji:** {len(schema.get('functions', {}))}"
+                   f" | **Widoków:** {len(schema.get('views', {}))}\n")
+        for name, table in list(tables.items())[:max_tables]:
+            columns = list(table['columns'])
+            column_text = ', '.join(columns[:max_columns]) + (f" … (+{len(columns) - max_columns})" if len(columns) > max_columns else '')
+            flags = ['🔒 RLS' if table['rls'] else '🔓 bez RLS']
+            if table['policies']: flags.append(f"{len(table['policies'])} polityk")
+            if table['indexes']: flags.append(f"{len(table['indexes'])} indeksów")
+            if table['triggers']: flags.append(f"{len(table['triggers'])} triggerów")
+            section += f"- **{name}** ({column_text}) - {', '.join(flags)} · `{table['defined_in']}`\n"
+        if len(tables) > max_tables:
+            section += f"- … i {len(tables) - max_tables} więcej tabel\n"
+        return section
+
+    def render_project_map(self, all_files, reverse_deps, stats, scores=None, budget=None, schema=None):
+        """Generator kolejnych fragmentów PROJECT_MAP.md - mapa nigdy nie jest sklejana w pamięci.
+
+        Z budżetem tokenów pokazuje tylko najważniejsze pliki (wg scores), aby mapa zmieściła się w kontekście AI.
+        """
+        header = f"""# 🗺️ MAPA PROJEKTU (Wygenerowano: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')})
 
 ## 📊 KLUCZOWE STATYSTYKI
-- **📁 Plików:** {len(all_files)}
-- **📝 Linii kodu:** {total_lines:,}
-- **⚙️ Funkcji/Komponentów:** {total_functions}
-- **⚠️ Zadań (TODO/FIXME):** {total_todos}
+- **📁 Plików:** {stats['files']}
+- **📝 Linii kodu:** {stats['lines']:,}
+- **⚙️ Funkcji/Komponentów:** {stats['functions']}
+- **⚠️ Zadań (TODO/FIXME):** {stats['todos']}
+- **🔗 Połączeń (importów):** {stats['connections']}
 
 ## 🏗️ STRUKTURA PROJEKTU
 """
-        folders = {}
-        for filepath, info in sorted(all_files.items()):
-            folder = str(Path(filepath).parent)
-            if folder == '.': folder = '📁 ROOT'
-            if folder not in folders: folders[folder] = []
-            folders[folder].append(info)
-
-        for folder, files in sorted(folders.items()):
-            map_content += f"\n### {folder}/\n"
+        # Schemat bazy i najczęściej importowane pliki
+        footer = self.render_schema_section(schema)
+        if reverse_deps:
+            footer += "\n## 🔗 NAJCZĘŚCIEJ IMPORTOWANE PLIKI\n"
+            most_imported = sorted(reverse_deps.items(), key=lambda item: (-len(item[1]), item[0]))[:15]
+            for target, importers in most_imported:
+                footer += f"- **{target}** ← {len(importers)} plików\n"
+
+        selected = None
+        self.map_truncation = None
+        if budget:
+            # Rezerwa na nagłówek o przycięciu i listę pominiętych katalogów
+            remaining = budget - estimate_tokens(header) - estimate_tokens(footer) - 40 - OMITTED_SECTION_TOKENS
+            selected = self.select_files_for_budget(all_files, scores or {}, max(remaining, 0))
+            shown = len(selected)
+            total = sum(1 for info in all_files.values() if not info.get('empty', False))
+            if shown < total:
+                header += (f"*Mapa dla {self.ai_type.upper()} przycięta do ~{budget:,} tokenów: "
+                           f"{shown} z {total} plików, wybranych wg ważności (pominięte katalogi na końcu).*\n")
+                self.map_truncation = {'shown': shown, 'total': total, 'omitted': {}}
+            else:
+                selected = None
+        yield header
+
+        if isinstance(all_files, StoredFilesView):
+            # Magazyn SQLite: katalog po katalogu, bez wczytywania wszystkich rekordów
+            groups = (('📁 ROOT' if folder == '.' else folder, files) for folder, files in all_files.store.iter_folders())
+        else:
+            folders = {}
+            for filepath, info in sorted(all_files.items()):
+                folders.setdefault(self.map_folder(filepath), []).append(info)
+            groups = sorted(folders.items())
+
+        for folder, files in groups:
+            if selected is not None:
+                kept = [info for info in files if info['file'] in selected]
+                dropped = sum(1 for info in files if info['file'] not in selected and not info.get('empty', False))
+                if dropped:
+                    self.map_truncation['omitted'][folder] = dropped
+                files = kept
+                if not files: continue
+            yield f"\n### {folder}/\n"
             for info in sorted(files, key=lambda x: x['file']):
                 if info.get('empty', False): continue
-                filename = Path(info['file']).name
-                details = f"{info['lines']} linii"
-                if info.get('functions'):
-                    details += f", {len(info['functions'])} funkcji"
-                map_content += f"- **📄 {filename}** ({details})\n"
-                if info.get('functions'):
-                     # Pokaż do 3 funkcji jako przykład
-                    func_names = [f"`{f['name']}`" for f in info['functions'][:3]]
-                    map_content += f"  - *Zawiera:* {', '.join(func_names)}{'...' if len(info['functions']) > 3 else ''}\n"
+                yield self.render_file_entry(info)
+
+        if self.map_truncation:
+            yield self.render_omitted_section(self.map_truncation['omitted'])
+        yield footer
+
+    def render_omitted_section(self, omitted, limit=25):
+        """Lista katalogów z plikami pominiętymi przez budżet tokenów (najwięcej pominięć najpierw)."""
+        text = f"\n## ✂️ POMINIĘTE PRZEZ BUDŻET TOKENÓW ({sum(omitted.values())} plików)\n"
+        ranked = sorted(omitted.items(), key=lambda item: (-item[1], item[0]))
+        for folder, count in ranked[:limit]:
+            text += f"- {folder}/ - {count} plików\n"
+        if len(ranked) > limit:
+            text += f"- … i {len(ranked) - limit} katalogów więcej\n"
+        return text + "*Pełna mapa: `--budget 0` lub `--ai universal`.*\n"
+
+    def report_truncation(self):
+        """Wypisuje w konsoli, co budżet tokenów wyciął z ostatnio zapisanej mapy."""
+        if not self.map_truncation:
+            return
+        truncation = self.map_truncation
+        ranked = sorted(truncation['omitted'].items(), key=lambda item: (-item[1], item[0]))
+        folders = ', '.join(f"{folder}/ ({count})" for folder, count in ranked[:5])
+        if len(ranked) > 5:
+            folders += f" i {len(ranked) - 5} innych"
+        print(f"✂️ Budżet ~{self.token_budget:,} tokenów ({self.ai_type}): w mapie {truncation['shown']} "
+              f"z {truncation['total']} plików, pominięto {truncation['total'] - truncation['shown']}: {folders}. "
+              f"Pełna mapa: --budget 0")
+
+    def render_delta(self, delta, baseline, limit=100):
+        """Generator fragmentów PROJECT_DELTA.md (każda lista przycięta do limit pozycji)."""
+        yield (f"# 🔄 ZMIANY OD POPRZEDNIEJ ANALIZY (Wygenerowano: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')})\n\n"
+               f"- **➕ Dodane:** {delta_count(delta['added'])} | **✏️ Zmienione:** {delta_count(delta['modified'])}"
+               f" | **🗑️ Usunięte:** {delta_count(delta['removed'])}\n")
+        if not baseline:
+            yield "\n*Pierwsza analiza - brak poprzedniego stanu do porównania.*\n"
+            return
+        if not any(delta.values()):
+            yield "\n*Brak zmian w analizowanych plikach.*\n"
+            return
+
+        def capped(title, items, render):
+            if not items:
+                return ''
+            text = f"\n## {title}\n" + ''.join(render(item) for item in items[:limit])
+            if len(items) > limit:
+                text += f"- … i {len(items) - limit} więcej\n"
+            return text
+
+        def symbol(sign):
+            return lambda s: f"- {sign} `{s['name']}` [{s['kind']}] - {s['file']}" + (f":{s['line']}\n" if s['line'] else "\n")
+
+        yield capped("➕ DODANE PLIKI", delta['added'], lambda f: f"- **{f['file']}** ({f['lines']} linii)\n")
+        yield capped("✏️ ZMIENIONE PLIKI", delta['modified'],
+                     lambda f: f"- **{f['file']}** ({f['lines'][0]} → {f['lines'][1]} linii)\n")
+        yield capped("🗑️ USUNIĘTE PLIKI", delta['removed'], lambda f: f"- **{f['file']}** ({f['lines']} linii)\n")
+        yield capped("🧩 NOWE SYMBOLE", delta['symbols_added'], symbol('➕'))
+        yield capped("🧩 USUNIĘTE SYMBOLE", delta['symbols_removed'], symbol('➖'))
+        yield capped("🔗 ZMIENIONE IMPORTY", delta['imports'], lambda f: f"- **{f['file']}**: " + ', '.join(
+            [f"+ `{spec}`" for spec in f['added']] + [f"− `{spec}`" for spec in f['removed']]) + "\n")
+
+    def write_project_map(self, all_files, verbose=True):
+        """Zapisuje PROJECT_MAP.md i CURRENT_STATE.json dla podanego słownika plików."""
+        if not all_files:
+            print("❌ Brak plików do wygenerowania mapy!")
+            return None, None
+
+        # Jedno przejście - przy widoku SQLite każde przejście to odczyt wszystkich rekordów
+        total_lines = total_functions = total_classes = total_todos = 0
+        for f in all_files.values():
+            total_lines += f.get('lines', 0)
+            total_functions += len(f.get('functions', []))
+            total_classes += len(f.get('classes', []))
+            total_todos += len(f.get('todos', []))
+
+        # Graf połączeń: rozwiązane importy + odwrotny indeks zależności
+        with self._phase('graph'):
+            connections, reverse_deps = ImportResolver(self.root, all_files).build_graph(all_files)
+            # Oceny ważności zapisywane w stanie - zmiana budżetu nie wymaga ponownego skanu
+            scores = compute_importance(all_files, reverse_deps)
+        with self._phase('schema'):
+            schema = build_schema_catalog(all_files)
+        if verbose: print(f"🔗 Rozwiązano {len(connections)} połączeń między plikami.")
+        if verbose and schema['migrations']:
+            print(f"🗄️ Schemat bazy: {len(schema['tables'])} tabel z {schema['migrations']} migracji.")
+
+        state = {
+            'files': all_files,
+            'connections': connections,
+            'reverse_deps': reverse_deps,
+            'stats': {
+                'files': len(all_files), 'lines': total_lines, 'functions': total_functions,
+                'classes': total_classes, 'todos': total_todos, 'connections': len(connections)
+            },
+            'scores': scores,
+            'schema': schema
+        }
 
         # Zapisywanie plików
         try:
             map_file = self.brain_dir / 'PROJECT_MAP.md'
-            with open(map_file, 'w', encoding='utf-8') as f: f.write(map_content)
+            with self._phase('render_map'), atomic_open(map_file) as f:
+                f.writelines(self.render_project_map(all_files, reverse_deps, state['stats'],
+                                                     scores, self.token_budget, schema))
             
             state_file = self.brain_dir / 'CURRENT_STATE.json'
-            with open(state_file, 'w', encoding='utf-8') as f: json.dump(all_files, f, indent=2)
+            with self._phase('write_state'):
+                if self.state_backend == 'sqlite':
+                    written = self.state_store.replace_state(all_files, connections, state['stats'], scores, schema)
+                    if verbose: print(f"🗃️ SQLite: zapisano {written} zmienionych rekordów")
+                    if self.export_json:
+                        self.state_store.export_json(state_file)
+                    else:
+                        state_file = self.state_store.db_path
+                else:
+                    with atomic_open(state_file) as f: json.dump(state, f, indent=2)
+            with self._phase('symbol_index'):
+                self.symbol_index.sync(all_files)
+            with self._phase('todo_index'):
+                self.todo_index.sync(all_files)
+            if self.changes is not None:
+                with self._phase('delta'):
+                    delta = self.changes.get('delta') or compute_state_delta(
+                        self.changes['files'], all_files, self.changes['baseline'])
+                    with atomic_open(self.brain_dir / 'PROJECT_DELTA.md') as f:
+                        f.writelines(self.render_delta(delta, self.changes['baseline']))
+                self.changes = {'baseline': True, 'files': {}}
+                if verbose and any(delta.values()):
+                    print(f"🔄 Delta: +{delta_count(delta['added'])} ✏️{delta_count(delta['modified'])} "
+                          f"-{delta_count(delta['removed'])} plików → PROJECT_DELTA.md")
             
-            print(f"\n🎉 SUKCES! Mapa projektu została zaktualizowana.")
-            print(f"📍 Zobacz plik: {map_file}")
+            if verbose:
+                print(f"\n🎉 SUKCES! Mapa projektu została zaktualizowana.")
+                print(f"📍 Zobacz plik: {map_file}")
+                self.report_truncation()
             return map_file, state_file
         except IOError as e:
             print(f"❌ Błąd podczas zapisywania plików: {e}")
             return None, None
             
-def main():
+if WATCHDOG_AVAILABLE:
+    class BrainWatchHandler(FileSystemEventHandler):
+        """Zbiera zdarzenia systemu plików; przetwarzanie odbywa się w pętli UniversalAIBrain.watch."""
+
+        def __init__(self, brain):
+            self.brain = brain
+            self.lock = threading.Lock()
+            self.paths = set()
+            self.rescan = False
+            self.first_event = self.last_event = 0.0
+
+        def _touch(self, path, is_directory):
+            path = Path(path)
+            try:
+                rel_parts = path.relative_to(self.brain.root).parts
+            except ValueError:
+                return
+            if any(part in self.brain.ignore_dirs for part in rel_parts):
+                return
+            now = time.monotonic()
+            with self.lock:
+                if not self.paths and not self.rescan:
+                    self.first_event = now
+                self.last_event = now
+                if is_directory or path.name == '.gitignore':
+                    self.rescan = True
+                self.paths.add(path)
+
+        def on_any_event(self, event):
+            if event.event_type not in ('created', 'modified', 'deleted', 'moved'):
+                return
+            if event.is_directory and event.event_type == 'modified':
+                return
+            self._touch(event.src_path, event.is_directory)
+            if event.event_type == 'moved':
+                self._touch(event.dest_path, event.is_directory)
+
+        def peek(self):
+            with self.lock:
+                return self.paths, self.rescan, self.first_event, self.last_event
+
+        def drain(self):
+            with self.lock:
+                paths, rescan = self.paths, self.rescan
+                self.paths, self.rescan = set(), False
+                return paths, rescan
+
+def parse_args(argv=None):
+    """Parsuje argumenty wiersza poleceń."""
+    parser = argparse.ArgumentParser(description="Universal AI Brain - mapa projektu dla AI")
+    parser.add_argument('--ai', choices=['claude', 'chatgpt', 'gemini', 'universal'],
+                        help="AI docelowe (bez pytania interaktywnego)")
+    parser.add_argument('--jobs', '-j', type=int, default=1, metavar='N',
+                        help="liczba procesów analizy (0 = wszystkie rdzenie, domyślnie 1)")
+    parser.add_argument('--watch', action='store_true',
+                        help="tryb demona: odświeżaj mapę przy każdej zmianie plików (wymaga watchdog)")
+    parser.add_argument('--debounce', type=float, default=1.0, metavar='SEK',
+                        help="okno grupowania zdarzeń w trybie --watch (domyślnie 1.0 s)")
+    parser.add_argument('--verify-hash', action='store_true',
+                        help="zapisuj hash treści w odciskach plików; plik ze zmienionym tylko mtime "
+                             "(checkout, touch) i tą samą treścią nie jest analizowany ponownie")
+    parser.add_argument('--state-backend', choices=['json', 'sqlite'], default='json',
+                        help="magazyn stanu: CURRENT_STATE.json (domyślnie) lub CURRENT_STATE.sqlite")
+    parser.add_argument('--export-json', action='store_true',
+                        help="przy --state-backend sqlite zapisz też CURRENT_STATE.json (stary format)")
+    parser.add_argument('--who-imports', metavar='PLIK',
+                        help="wypisz pliki importujące PLIK (z zapisanego stanu) i zakończ")
+    parser.add_argument('--budget', type=int, metavar='TOKENY',
+                        help="budżet tokenów mapy (domyślnie zależny od --ai: claude 60000, chatgpt 24000, "
+                             "gemini 120000, universal bez limitu; 0 = pełna mapa); pominięte katalogi są "
+                             "wypisywane i wymienione na końcu mapy")
+    parser.add_argument('--render-only', action='store_true',
+                        help="tylko odtwórz PROJECT_MAP.md z zapisanego stanu (bez skanowania)")
+    parser.add_argument('--shard', metavar='K/N',
+                        help="analizuj tylko część K z N i zapisz stan częściowy w .ai-brain/shards/")
+    parser.add_argument('--shard-by', choices=['hash', 'dir'], default='hash',
+                        help="podział na części: hash ścieżki pliku lub katalog najwyższego poziomu")
+    parser.add_argument('--merge-shards', nargs='*', metavar='PLIK',
+                        help="scal stany częściowe (domyślnie .ai-brain/shards/*.json) w stan i mapę")
+    parser.add_argument('--find', metavar='SYMBOL',
+                        help="wypisz definicje symboli o podanym prefiksie (plik:linia) i zakończ")
+    parser.add_argument('--fuzzy', action='store_true',
+                        help="przy --find dopasowuj też inicjały camelCase i podsekwencje liter")
+    parser.add_argument('--oldest-todos', type=int, nargs='?', const=20, metavar='N',
+                        help="wypisz N najstarszych notatek TODO/FIXME (wg pierwszego pojawienia się) i zakończ")
+    parser.add_argument('--stream', type=int, nargs='?', const=500, metavar='PACZKA',
+                        help="potok skan -> analiza -> zapis paczkami (domyślnie 500); pełne rekordy plików "
+                             "(symbole, importy, TODO) nie są trzymane w pamięci, ale indeks ścieżek, graf "
+                             "importów i oceny ważności nadal rosną z liczbą plików; wymaga --state-backend sqlite")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="nie używaj współdzielonej pamięci podręcznej analiz (~/.cache/oremus-brain)")
+    parser.add_argument('--cache-size', type=int, default=256, metavar='MB',
+                        help="limit rozmiaru pamięci podręcznej analiz (domyślnie 256 MB)")
+    parser.add_argument('--profile', action='store_true',
+                        help="zmierz fazy i najwolniejsze pliki, zapisz .ai-brain/PROFILE.json")
+    parser.add_argument('--cprofile', action='store_true',
+                        help="jak --profile, dodatkowo cProfile procesu głównego (PROFILE.prof)")
+    args = parser.parse_args(argv)
+    if args.shard:
+        try:
+            index, count = (int(part) for part in args.shard.split('/'))
+            if not 1 <= index <= count:
+                raise ValueError
+        except ValueError:
+            parser.error("--shard oczekuje K/N, gdzie 1 <= K <= N (np. 2/4)")
+        args.shard = (index, count)
+    if args.stream is not None:
+        if args.state_backend != 'sqlite':
+            parser.error("--stream wymaga --state-backend sqlite (stan zapisywany paczkami)")
+        if args.stream < 1:
+            parser.error("--stream oczekuje dodatniego rozmiaru paczki")
+        if args.watch or args.shard:
+            parser.error("--stream nie łączy się z --watch ani --shard")
+    return args
+
+def main(argv=None):
     """Główna funkcja uruchamiająca skrypt."""
+    args = parse_args(argv)
+    if args.who_imports:
+        importers = UniversalAIBrain(state_backend=args.state_backend).who_imports(args.who_imports)
+        print(f"🔗 {args.who_imports} jest importowany przez {len(importers)} plików:")
+        for importer in importers:
+            print(f"  ← {importer}")
+        return
+    if args.find:
+        brain = UniversalAIBrain(state_backend=args.state_backend)
+        start = time.perf_counter()
+        matches = brain.find_symbol(args.find, fuzzy=args.fuzzy)
+        print(f"🔎 {args.find}: {len(matches)} wyników ({(time.perf_counter() - start) * 1000:.1f} ms)")
+        for match in matches:
+            location = f"{match['file']}:{match['line']}" if match['line'] else match['file']
+            print(f"  {location}  [{match['kind']}] {match['name']}")
+        return
+    if args.oldest_todos:
+        todos = UniversalAIBrain(state_backend=args.state_backend).oldest_todos(args.oldest_todos)
+        print(f"⚠️ Najstarsze notatki TODO/FIXME ({len(todos)}):")
+        for todo in todos:
+            since = datetime.fromtimestamp(todo['first_seen']).strftime('%Y-%m-%d')
+            print(f"  {since}  {todo['file']}:{todo['line']}  [{todo['type']}] {todo['text'][:80]}")
+        return
+
     print("""
     🤖 UNIVERSAL AI BRAIN - WERSJA POPRAWIONA
     =========================================
@@ -225,20 +2807,38 @@ def main():
     """)
     
     # Wybór AI
-    ai_choices = {'1': 'claude', '2': 'chatgpt', '3': 'gemini', '4': 'universal'}
-    print("Wybierz AI, dla którego generujesz mapę:")
-    print("1. Claude (domyślny)")
-    print("2. ChatGPT")
-    print("3. Gemini")
-    print("4. Uniwersalny")
-    choice = input("Wybór (1-4): ").strip() or '1'
-    ai_type = ai_choices.get(choice, 'claude')
+    ai_type = args.ai
+    if not ai_type and args.shard:
+        ai_type = 'universal'  # część nie generuje mapy - bez pytania (CI)
+    if not ai_type:
+        ai_choices = {'1': 'claude', '2': 'chatgpt', '3': 'gemini', '4': 'universal'}
+        print("Wybierz AI, dla którego generujesz mapę:")
+        print("1. Claude (domyślny)")
+        print("2. ChatGPT")
+        print("3. Gemini")
+        print("4. Uniwersalny")
+        choice = input("Wybór (1-4): ").strip() or '1'
+        ai_type = ai_choices.get(choice, 'claude')
 
     print(f"\n✅ Wybrano AI: {ai_type.upper()}. Rozpoczynam analizę...\n")
     
     try:
-        brain = UniversalAIBrain(ai_type=ai_type)
-        brain.generate_project_map(verbose=True)
+        brain = UniversalAIBrain(ai_type=ai_type, jobs=args.jobs, verify_hash=args.verify_hash,
+                                 state_backend=args.state_backend,
+                                 export_json=args.export_json, analysis_cache=not args.no_cache,
+                                 cache_size_mb=args.cache_size, profile=args.profile,
+                                 cprofile=args.cprofile, token_budget=args.budget,
+                                 shard=args.shard, shard_by=args.shard_by, stream=args.stream)
+        if args.merge_shards is not None:
+            brain.merge_shards(args.merge_shards, verbose=True)
+        elif args.shard:
+            brain.generate_shard(verbose=True)
+        elif args.render_only:
+            brain.render_saved_map(verbose=True)
+        elif args.watch:
+            brain.watch(debounce=args.debounce)
+        else:
+            brain.generate_project_map(verbose=True)
     except KeyboardInterrupt:
         print("\n\n👋 Analiza przerwana przez użytkownika.")
     except Exception as e:
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+⏱️ BENCHMARK UNIVERSAL AI BRAIN
+Generuje syntetyczne repozytoria o kształcie oremus_web (app/(main), app/api/**/route.ts,
+components/, services/, supabase/migrations) i mierzy kolejne fazy auto-update.py:
+czas, pliki/s, szczytowe RSS procesu (i o ile podniosła je dana faza) oraz rozmiar stanu.
+
+Przykład:
+    python .ai-brain/benchmark.py --sizes 1000 10000 --jobs 4 --out bench.json
+    python .ai-brain/benchmark.py --js-extractor . --rounds 30
+"""
+
+import os
+import sys
+import json
+import time
+import re
+import random
+import shutil
+import argparse
+import tempfile
+import subprocess
+import importlib.util
+from contextlib import redirect_stdout
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows - brak pomiaru RSS
+    resource = None
+
+BRAIN_PATH = Path(__file__).with_name('auto-update.py')
+
+DOMAINS = ['mass', 'candle', 'prayer', 'payment', 'auth', 'notifications', 'analytics',
+           'parish', 'audio', 'admin', 'email', 'church']
+WORDS = ['List', 'Card', 'Form', 'Modal', 'Panel', 'Header', 'Item', 'Stats', 'Player',
+         'Dashboard', 'Settings', 'Details', 'Summary', 'Picker', 'Badge']
+VERBS = ['get', 'create', 'update', 'delete', 'fetch', 'validate', 'format', 'calculate', 'send']
+
+# Udział rodzajów plików w syntetycznym repozytorium (suma = 1.0)
+# (kolejność: najpierw pliki importowane, potem ich użytkownicy)
+LAYOUT = [
+    ('type', 0.08), ('service', 0.12), ('lib', 0.06), ('hook', 0.08),
+    ('component', 0.34), ('page', 0.14), ('route', 0.12), ('migration', 0.06),
+]
+
+
+def pascal(*parts):
+    return ''.join(p[:1].upper() + p[1:] for p in parts)
+
+
+class SyntheticRepo:
+    """Deterministyczny generator repozytorium Next.js + Supabase podobnego do oremus_web."""
+
+    def __init__(self, root, n_files, seed=42):
+        self.root = Path(root)
+        self.n_files = n_files
+        self.rng = random.Random(seed)
+        self.services = []   # ścieżki importu '@/services/...'
+        self.components = []  # ścieżki importu '@/components/...'
+        self.types = []       # ścieżki importu '@/types/...'
+
+    def write(self, rel_path, content):
+        path = self.root / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content, encoding='utf-8')
+
+    def functions(self, domain, count):
+        return [f"{self.rng.choice(VERBS)}{pascal(domain)}{self.rng.choice(WORDS)}{i}" for i in range(count)]
+
+    def imports(self, pool, count):
+        if not pool:
+            return ''
+        picked = self.rng.sample(pool, min(count, len(pool)))
+        return ''.join(f"import {{ {Path(p).name} }} from '{p}'\n" for p in picked)
+
+    def make_type(self, i):
+        domain = self.rng.choice(DOMAINS)
+        name = f"{domain}-{i}"
+        fields = '\n'.join(f"  field{j}: string" for j in range(self.rng.randint(3, 12)))
+        self.write(f"types/{name}.ts", f"export interface {pascal(domain)}{i} {{\n{fields}\n}}\n\n"
+                                         f"export type {pascal(domain)}{i}Id = string\n")
+        self.types.append(f"@/types/{name}")
+
+    def make_service(self, i):
+        domain = self.rng.choice(DOMAINS)
+        name = f"{pascal(domain)}Service{i}"
+        body = ''.join(f"  async {fn}(id: string) {{\n    // TODO: cache {fn}\n"
+                       f"    return supabase.from('{domain}').select('*').eq('id', id)\n  }}\n\n"
+                       for fn in self.functions(domain, self.rng.randint(3, 10)))
+        self.write(f"services/{domain}/{name}.ts",
+                   f"import {{ supabase }} from '@/lib/supabase'\n{self.imports(self.types, 2)}\n"
+                   f"export class {name} {{\n{body}}}\n\nexport const {name[0].lower()}{name[1:]} = new {name}()\n")
+        self.services.append(f"@/services/{domain}/{name}")
+
+    def make_component(self, i):
+        domain = self.rng.choice(DOMAINS)
+        group = self.rng.choice(['features', 'glass', 'admin', 'ui'])
+        name = f"{pascal(domain)}{self.rng.choice(WORDS)}{i}"
+        helpers = ''.join(f"function {fn}() {{\n  return null\n}}\n\n" for fn in self.functions(domain, self.rng.randint(0, 3)))
+        self.write(f"components/{group}/{domain}/{name}.tsx",
+                   f"'use client'\nimport React, {{ useState }} from 'react'\n"
+                   f"{self.imports(self.services, 2)}{self.imports(self.components, 2)}\n{helpers}"
+                   f"export function {name}({{ title }}: {{ title: string }}) {{\n"
+                   f"  const [open, setOpen] = useState(false)\n"
+                   f"  return <div className=\"glass\" onClick={{() => setOpen(!open)}}>{{title}}</div>\n}}\n\n"
+                   f"export default {name}\n")
+        self.components.append(f"@/components/{group}/{domain}/{name}")
+
+    def make_hook(self, i):
+        domain = self.rng.choice(DOMAINS)
+        name = f"use{pascal(domain)}{i}"
+        self.write(f"hooks/{name}.ts",
+                   f"import {{ useEffect, useState }} from 'react'\n{self.imports(self.services, 1)}\n"
+                   f"export const {name} = () => {{\n  const [data, setData] = useState(null)\n"
+                   f"  useEffect(() => {{ setData(null) }}, [])\n  return data\n}}\n")
+
+    def make_lib(self, i):
+        domain = self.rng.choice(DOMAINS)
+        fns = ''.join(f"export const {fn} = (value: string) => value.trim()\n"
+                      for fn in self.functions(domain, self.rng.randint(2, 6)))
+        self.write(f"lib/{domain}/utils{i}.ts", f"// FIXME: rozdzielić helpery {domain}\n{fns}")
+
+    def make_page(self, i):
+        domain = self.rng.choice(DOMAINS)
+        section = self.rng.choice(['(main)', '(main)', '(auth)', 'admin'])
+        name = f"{pascal(domain)}Page{i}"
+        self.write(f"app/{section}/{domain}/{domain}-{i}/page.tsx",
+                   f"{self.imports(self.components, 3)}{self.imports(self.services, 1)}\n"
+                   f"export default async function {name}() {{\n  return <main>{name}</main>\n}}\n")
+
+    def make_route(self, i):
+        domain = self.rng.choice(DOMAINS)
+        self.write(f"app/api/{domain}/{self.rng.choice(['list', 'create', 'webhook', 'stats'])}-{i}/route.ts",
+                   f"import {{ NextResponse }} from 'next/server'\n{self.imports(self.services, 1)}\n"
+                   f"export async function GET(request: Request) {{\n  return NextResponse.json({{ ok: true }})\n}}\n\n"
+                   f"export async function POST(request: Request) {{\n  const body = await request.json()\n"
+                   f"  return NextResponse.json(body)\n}}\n")
+
+    def make_migration(self, i):
+        domain = self.rng.choice(DOMAINS)
+        table = f"{domain}_{i}"
+        self.write(f"supabase/migrations/2024{i:08d}_create_{table}.sql",
+                   f"CREATE TABLE IF NOT EXISTS public.{table} (\n  id uuid PRIMARY KEY DEFAULT gen_random_uuid(),\n"
+                   f"  parish_id uuid REFERENCES public.parishes(id),\n  created_at timestamptz DEFAULT now()\n);\n\n"
+                   f"CREATE INDEX idx_{table}_parish ON public.{table}(parish_id);\n"
+                   f"ALTER TABLE public.{table} ENABLE ROW LEVEL SECURITY;\n"
+                   f"CREATE POLICY \"{table}_select\" ON public.{table} FOR SELECT USING (true);\n")
+
+    def generate(self):
+        """Tworzy repozytorium; pliki bazowe (typy, serwisy) powstają przed ich użytkownikami."""
+        self.write('package.json', json.dumps({'name': 'oremus-synthetic', 'private': True}, indent=2))
+        self.write('tsconfig.json', json.dumps({'compilerOptions': {'baseUrl': '.', 'paths': {'@/*': ['./*']}}}, indent=2))
+        self.write('lib/supabase.ts', "export const supabase = createClient(url, key)\n")
+        self.write('.gitignore', "node_modules/\n.next/\n")
+        budget = self.n_files - 4
+        for kind, share in LAYOUT:
+            for i in range(max(1, int(budget * share))):
+                getattr(self, f'make_{kind}')(i)
+        return self.root
+
+
+def peak_rss_mb():
+    """Szczytowe RSS procesu w MB (None, jeśli platforma tego nie wspiera).
+
+    To najwyższy poziom od startu procesu, a nie zużycie pojedynczej fazy - wartości kolejnych
+    faz nigdy nie maleją; koszt fazy pokazuje dopiero przyrost szczytu w jej trakcie.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux podaje KB, macOS bajty
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def load_brain_module():
+    """Ładuje auto-update.py jako moduł 'auto_update' (nazwa z myślnikiem nie da się zaimportować)."""
+    spec = importlib.util.spec_from_file_location('auto_update', BRAIN_PATH)
+    module = importlib.util.module_from_spec(spec)
+    # Rejestracja w sys.modules - procesy robocze (--jobs) muszą umieć odpiklować UniversalAIBrain
+    sys.modules['auto_update'] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+# Ładowane przy imporcie, aby także procesy uruchamiane metodą 'spawn' znały moduł
+brain_module = load_brain_module()
+
+
+def state_size(brain_dir):
+    return sum(p.stat().st_size for p in Path(brain_dir).glob('CURRENT_STATE.*'))
+
+
+def run_phases(root, jobs, state_backend):
+    """Uruchamia fazy na gotowym repozytorium; zwraca listę wyników (w tym samym procesie)."""
+    results = []
+
+    def measure(phase, func, files=None):
+        peak_before = peak_rss_mb()
+        start = time.perf_counter()
+        with open(os.devnull, 'w', encoding='utf-8') as devnull, redirect_stdout(devnull):
+            value = func()
+        elapsed = time.perf_counter() - start
+        if files is None:
+            files = len(value)
+        peak = peak_rss_mb()
+        results.append({
+            'phase': phase, 'seconds': round(elapsed, 4), 'files': files,
+            'files_per_sec': round(files / elapsed) if elapsed > 0 else None,
+            # Szczyt całego procesu oraz to, o ile faza go podniosła (0 = zmieściła się w starym szczycie)
+            'process_peak_rss_mb': peak,
+            'peak_rss_growth_mb': round(peak - peak_before, 1) if peak is not None else None,
+            'state_bytes': state_size(Path(root) / '.ai-brain'),
+        })
+        return value
+
+    def new_brain(incremental=True):
+        with open(os.devnull, 'w', encoding='utf-8') as devnull, redirect_stdout(devnull):
+            return brain_module.UniversalAIBrain(project_root=root, ai_type='claude', incremental=incremental,
+                                                 jobs=jobs, state_backend=state_backend, analysis_cache=False)
+
+    brain = new_brain(incremental=False)
+    files = measure('scan_files', lambda: brain.scan_files(verbose=False))
+    n = len(files)
+    measure('analyze_code_file', lambda: [brain.analyze_code_file(p, st=st) for p, st in files], n)
+    measure('build_project_graph', lambda: brain.build_project_graph(verbose=False), n)
+    measure('generate_project_map', lambda: brain.generate_project_map(verbose=False), n)
+    brain = new_brain(incremental=True)
+    measure('generate_project_map (bez zmian)', lambda: brain.generate_project_map(verbose=False), n)
+    return results
+
+
+# Poprzedni analizator JS/TS (stos regexów sprzed extract_js_symbols) - punkt odniesienia
+LEGACY_JS_PATTERNS = [
+    re.compile(r'import(?:.*?)from\s+[\'"]([^\'"]+)[\'"]'),
+    re.compile(r'function\s+([A-Z_]\w*)'),
+    re.compile(r'(?:const|let)\s+([A-Z_]\w*)\s*=\s*(?:React\.memo)?\((?:async\s*)?function'),
+    re.compile(r'(?:const|let)\s+([A-Z_]\w*)\s*=\s*(?:async\s*)?\([^)]*\)\s*=>'),
+]
+
+
+def legacy_js_symbols(content):
+    return [[match.group(1) for match in pattern.finditer(content)] for pattern in LEGACY_JS_PATTERNS]
+
+
+def bench_js_extractor(root, rounds):
+    """Mikrobenchmark ekstraktora JS/TS: MB/s starego stosu regexów i extract_js_symbols.
+
+    Obie wersje są mierzone naprzemiennie w tych samych rundach, a wynikiem jest najlepszy
+    czas z `rounds` - na zaszumionej maszynie porównanie pojedynczych przebiegów nic nie mówi.
+    """
+    sources = [p.read_text(encoding='utf-8', errors='ignore') for p in sorted(Path(root).rglob('*'))
+               if p.suffix in ('.js', '.jsx', '.ts', '.tsx') and 'node_modules' not in p.parts and p.is_file()]
+    megabytes = sum(len(c.encode('utf-8')) for c in sources) / 1e6
+    extractors = {'legacy_regex': legacy_js_symbols, 'extract_js_symbols': brain_module.extract_js_symbols}
+    best = dict.fromkeys(extractors, float('inf'))
+    for _ in range(rounds):
+        for name, extract in extractors.items():
+            start = time.perf_counter()
+            for content in sources:
+                extract(content)
+            best[name] = min(best[name], time.perf_counter() - start)
+    return {'files': len(sources), 'megabytes': round(megabytes, 3), 'rounds': rounds,
+            'mb_per_sec': {name: round(megabytes / seconds, 1) if seconds > 0 else None
+                           for name, seconds in best.items()}}
+
+
+def run_js_extractor(args):
+    """Mierzy ekstraktor JS/TS na podanym katalogu albo na syntetycznym repozytorium --sizes[0]."""
+    if args.js_extractor != '-':
+        return bench_js_extractor(args.js_extractor, args.rounds)
+    root = Path(tempfile.mkdtemp(prefix='brain-bench-js-', dir=args.workdir))
+    try:
+        SyntheticRepo(root, args.sizes[0], seed=args.seed).generate()
+        return bench_js_extractor(root, args.rounds)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def run_size(n_files, args):
+    """Generuje repozytorium i mierzy fazy w osobnym procesie (czyste szczytowe RSS)."""
+    root = Path(tempfile.mkdtemp(prefix=f'brain-bench-{n_files}-', dir=args.workdir))
+    try:
+        start = time.perf_counter()
+        SyntheticRepo(root, n_files, seed=args.seed).generate()
+        print(f"📦 {n_files} plików wygenerowano w {time.perf_counter() - start:.1f}s ({root})")
+        cmd = [sys.executable, __file__, '--run-phases', str(root), '--jobs', str(args.jobs),
+               '--state-backend', args.state_backend]
+        output = subprocess.run(cmd, check=True, capture_output=True, text=True, encoding='utf-8').stdout
+        return json.loads(output.strip().splitlines()[-1])
+    finally:
+        if args.keep:
+            print(f"📁 Zachowano: {root}")
+        else:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+def print_table(n_files, results):
+    print(f"\n### {n_files} plików")
+    print(f"{'faza':<36}{'czas [s]':>10}{'pliki/s':>10}{'szczyt RSS procesu [MB]':>25}"
+          f"{'przyrost [MB]':>15}{'stan [KB]':>11}")
+    for r in results:
+        print(f"{r['phase']:<36}{r['seconds']:>10.3f}{r['files_per_sec'] or 0:>10}"
+              f"{r['process_peak_rss_mb'] or 0:>25}{r['peak_rss_growth_mb'] or 0:>15}{r['state_bytes'] // 1024:>11}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Universal AI Brain na syntetycznych repozytoriach")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000], metavar='N',
+                        help="liczby plików w generowanych repozytoriach (domyślnie 1000 10000 100000)")
+    parser.add_argument('--jobs', '-j', type=int, default=1, metavar='N', help="liczba procesów analizy")
+    parser.add_argument('--state-backend', choices=['json', 'sqlite'], default='json')
+    parser.add_argument('--seed', type=int, default=42, help="ziarno generatora (powtarzalne repozytoria)")
+    parser.add_argument('--workdir', default=None, help="katalog na wygenerowane repozytoria (domyślnie TMP)")
+    parser.add_argument('--keep', action='store_true', help="nie usuwaj wygenerowanych repozytoriów")
+    parser.add_argument('--out', metavar='PLIK', help="zapisz wyniki jako JSON")
+    parser.add_argument('--js-extractor', nargs='?', const='-', metavar='KATALOG',
+                        help="tylko mikrobenchmark ekstraktora JS/TS (stary stos regexów vs extract_js_symbols) "
+                             "na KATALOGU lub na syntetycznym repozytorium pierwszego rozmiaru z --sizes")
+    parser.add_argument('--rounds', type=int, default=20, metavar='N',
+                        help="liczba naprzemiennych rund mikrobenchmarku (liczy się najlepsza)")
+    parser.add_argument('--run-phases', metavar='KATALOG', help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.run_phases:
+        # Tryb wewnętrzny: pojedynczy pomiar w świeżym procesie
+        print(json.dumps(run_phases(args.run_phases, args.jobs, args.state_backend)))
+        return
+    if args.js_extractor:
+        result = run_js_extractor(args)
+        print(f"🧪 Ekstraktor JS/TS: {result['files']} plików, {result['megabytes']} MB, "
+              f"najlepsza z {result['rounds']} rund")
+        for name, speed in result['mb_per_sec'].items():
+            print(f"   {name:<20}{speed:>8} MB/s")
+        if args.out:
+            with open(args.out, 'w', encoding='utf-8') as f:
+                json.dump(result, f, indent=2)
+        return
+
+    report = {'python': sys.version.split()[0], 'jobs': args.jobs, 'state_backend': args.state_backend, 'runs': []}
+    for n_files in args.sizes:
+        results = run_size(n_files, args)
+        print_table(n_files, results)
+        report['runs'].append({'size': n_files, 'phases': results})
+
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Wyniki zapisane: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
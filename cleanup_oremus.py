@@ -7,12 +7,212 @@ Usuwa duplikacje i niepotrzebne pliki z potwierdzeniem użytkownika
 """
 
 import os
+import re
 import sys
 import shutil
+import hashlib
 from pathlib import Path
 from datetime import datetime
 import json
 
+class DuplicateDetector:
+    """Wykrywa kopie plików w całym drzewie projektu (tylko analiza, nic nie usuwa).
+
+    Dokładne kopie: kubełki wg rozmiaru -> hash początku i końca pliku -> pełny SHA-1,
+    więc w całości czytane są tylko pliki, które przeszły oba tańsze sita.
+    Prawie-kopie: sygnatury MinHash nad shinglami tokenów, kandydaci z LSH (pasma sygnatur),
+    a podobieństwo kandydatów jest potwierdzane dokładnym współczynnikiem Jaccarda.
+    """
+
+    SKIP_DIRS = {'node_modules', '.git', '.next', 'dist', 'build', 'coverage', '__pycache__', '.ai-brain', '.vercel'}
+    EXTENSIONS = {'.ts', '.tsx', '.js', '.jsx', '.py', '.sql', '.css', '.scss', '.php', '.html',
+                  '.json', '.md', '.txt', '.yml', '.yaml'}
+    MAX_SIZE = 2 * 1024 * 1024
+    PARTIAL_BYTES = 4096
+    SHINGLE_TOKENS = 5      # tokenów w jednym shinglu
+    NUM_PERM = 64           # długość sygnatury MinHash
+    BANDS = 16              # pasma LSH po NUM_PERM // BANDS wartości (próg kandydata ok. 0.5)
+    MIN_SHINGLES = 50       # krótsze pliki dają przypadkowe podobieństwa
+    MAX_BUCKET = 200        # większe kubełki LSH to szablony (np. puste index.ts) - pomijane
+    TOKEN = re.compile(r'\w+|[^\w\s]')
+
+    def __init__(self, root, threshold=0.8):
+        self.root = Path(root)
+        self.threshold = threshold
+
+    def iter_files(self):
+        """Zwraca (ścieżka, rozmiar) plików tekstowych projektu, z pominięciem katalogów zależności."""
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = sorted(d for d in dirnames
+                                 if d not in self.SKIP_DIRS and not d.startswith('oremus_backup_'))
+            for name in sorted(filenames):
+                # Także kopie typu middleware.ts.new czy EmailService.new.ts
+                if not self.EXTENSIONS.intersection(suffix.lower() for suffix in Path(name).suffixes):
+                    continue
+                path = Path(dirpath) / name
+                try:
+                    size = path.stat().st_size
+                except OSError:
+                    continue
+                if 0 < size <= self.MAX_SIZE:
+                    yield path, size
+
+    def partial_hash(self, path, size):
+        """Hash początku i końca pliku - tanie sito przed pełnym hashem.
+
+        Plik do 2 * PARTIAL_BYTES jest czytany w całości, więc wtedy hash obejmuje cały plik.
+        """
+        try:
+            with open(path, 'rb') as f:
+                if size <= 2 * self.PARTIAL_BYTES:
+                    data = f.read()
+                else:
+                    data = f.read(self.PARTIAL_BYTES)
+                    f.seek(-self.PARTIAL_BYTES, os.SEEK_END)
+                    data += f.read(self.PARTIAL_BYTES)
+            return hashlib.sha1(data).hexdigest()
+        except OSError:
+            return None
+
+    @staticmethod
+    def full_hash(path):
+        digest = hashlib.sha1()
+        try:
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(block)
+        except OSError:
+            return None
+        return digest.hexdigest()
+
+    @staticmethod
+    def group_by(paths, key):
+        groups = {}
+        for path in paths:
+            value = key(path)
+            if value is not None:
+                groups.setdefault(value, []).append(path)
+        return [group for group in groups.values() if len(group) > 1]
+
+    def exact_groups(self, files):
+        """Grupy identycznych plików: [(rozmiar, [ścieżki])]."""
+        by_size = {}
+        for path, size in files:
+            by_size.setdefault(size, []).append(path)
+        groups = []
+        for size, paths in by_size.items():
+            if len(paths) < 2:
+                continue
+            for candidates in self.group_by(paths, lambda p: self.partial_hash(p, size)):
+                if size <= 2 * self.PARTIAL_BYTES:
+                    groups.append((size, candidates))  # partial_hash przeczytał cały plik
+                else:
+                    groups.extend((size, group) for group in self.group_by(candidates, self.full_hash))
+        return sorted(groups, key=lambda item: (-item[0] * (len(item[1]) - 1), item[1]))
+
+    def shingles(self, path):
+        """Zbiór hashy kolejnych SHINGLE_TOKENS tokenów (odporny na zmiany białych znaków)."""
+        try:
+            text = path.read_text(encoding='utf-8', errors='ignore')
+        except OSError:
+            return set()
+        tokens = self.TOKEN.findall(text)
+        # zip przesuniętych list buduje krotki shingli bez pętli w Pythonie
+        return set(map(hash, zip(*(tokens[i:] for i in range(self.SHINGLE_TOKENS)))))
+
+    def signature(self, shingles):
+        """Sygnatura MinHash metodą jednej permutacji: minimum w każdym z NUM_PERM koszy hashy.
+
+        Puste kosze przejmują wartość najbliższego niepustego (densyfikacja przez rotację),
+        dzięki czemu sygnatury małych plików nadal są porównywalne pasmami LSH.
+        """
+        n = self.NUM_PERM
+        bins = [None] * n
+        for h in shingles:
+            b, v = h % n, h // n
+            if bins[b] is None or v < bins[b]:
+                bins[b] = v
+        if None not in bins:
+            return bins
+        filled = list(bins)
+        for i in range(n):
+            offset = 1
+            while filled[i] is None:
+                source = bins[(i + offset) % n]
+                if source is not None:
+                    filled[i] = source + offset * (1 << 58)
+                offset += 1
+        return filled
+
+    def near_clusters(self, paths):
+        """Klastry prawie-kopii: [{'files', 'pairs': [(a, b, podobieństwo)], 'min_similarity', 'max_similarity'}]."""
+        rows = self.NUM_PERM // self.BANDS
+        kept, buckets = [], {}
+        for path in paths:
+            shingles = self.shingles(path)
+            if len(shingles) < self.MIN_SHINGLES:
+                continue
+            signature = self.signature(shingles)
+            index = len(kept)
+            kept.append(path)
+            for band in range(self.BANDS):
+                key = (band, tuple(signature[band * rows:(band + 1) * rows]))
+                buckets.setdefault(key, []).append(index)
+
+        candidates = set()
+        for members in buckets.values():
+            if 1 < len(members) <= self.MAX_BUCKET:
+                candidates.update((a, b) for i, a in enumerate(members) for b in members[i + 1:])
+
+        # Weryfikacja kandydatów dokładnym Jaccardem - shingle wczytywane tylko dla nich
+        cache = {}
+
+        def shingles_of(index):
+            if index not in cache:
+                cache[index] = self.shingles(kept[index])
+            return cache[index]
+
+        parent = list(range(len(kept)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        pairs = []
+        for a, b in sorted(candidates):
+            sa, sb = shingles_of(a), shingles_of(b)
+            similarity = len(sa & sb) / len(sa | sb)
+            if similarity >= self.threshold:
+                pairs.append((a, b, similarity))
+                parent[find(a)] = find(b)
+
+        clusters = {}
+        for a, b, similarity in pairs:
+            clusters.setdefault(find(a), []).append((a, b, similarity))
+        result = []
+        for edges in clusters.values():
+            members = sorted({i for a, b, _ in edges for i in (a, b)}, key=lambda i: kept[i])
+            similarities = [similarity for _, _, similarity in edges]
+            result.append({
+                'files': [kept[i] for i in members],
+                'pairs': [(kept[a], kept[b], round(similarity, 3)) for a, b, similarity in edges],
+                'min_similarity': round(min(similarities), 3),
+                'max_similarity': round(max(similarities), 3),
+            })
+        return sorted(result, key=lambda cluster: (-len(cluster['files']), -cluster['max_similarity'], cluster['files']))
+
+    def find(self):
+        """Pełna analiza drzewa: {'files', 'exact': [(rozmiar, [ścieżki])], 'near': [klastry]}."""
+        files = list(self.iter_files())
+        exact = self.exact_groups(files)
+        # Dokładne kopie do analizy podobieństwa wchodzą jednym reprezentantem
+        copies = {path for _, group in exact for path in sorted(group)[1:]}
+        near = self.near_clusters(path for path, _ in files if path not in copies)
+        return {'files': len(files), 'exact': exact, 'near': near}
+
+
 class OremusProjectCleaner:
     def __init__(self):
         self.root = Path.cwd()
@@ -20,6 +220,7 @@ class OremusProjectCleaner:
         self.removed_dirs = []
         self.total_size_saved = 0
         self.backup_created = False
+        self.duplicates = None
         
         print("🧹 OREMUS PROJECT CLEANER v1.0")
         print("=" * 50)
@@ -386,53 +587,48 @@ class OremusProjectCleaner:
             for empty_file in existing_empty:
                 self.remove_file(empty_file)
 
-    def analyze_services_duplicates(self):
-        """Analizuje duplikaty w services (nie usuwa, tylko informuje)"""
-        print("\n🔍 ANALIZA DUPLIKATÓW W SERVICES")
+    def analyze_duplicates(self):
+        """Szuka kopii i prawie-kopii plików w całym projekcie (nie usuwa, tylko informuje)"""
+        print("\n🔍 ANALIZA DUPLIKATÓW W PROJEKCIE")
         print("-" * 40)
         
-        duplicates = [
-            ("services/AuthService.ts", "services/auth/AuthService.ts"),
-            ("services/email/EmailService.ts", "services/email/EmailService.new.ts"),
-            ("services/notification/", "services/notifications/")
-        ]
-        
-        found_duplicates = []
+        result = DuplicateDetector(self.root).find()
+        rel = lambda path: str(path.relative_to(self.root))
+        self.duplicates = {
+            'exact': [{'size': size, 'files': [rel(p) for p in group]} for size, group in result['exact']],
+            'near': [{'files': [rel(p) for p in cluster['files']],
+                      'pairs': [(rel(a), rel(b), sim) for a, b, sim in cluster['pairs']],
+                      'min_similarity': cluster['min_similarity'],
+                      'max_similarity': cluster['max_similarity']} for cluster in result['near']]
+        }
+        print(f"📄 Przeanalizowano {result['files']} plików")
         
-        for old_path, new_path in duplicates:
-            old_full = self.root / old_path
-            new_full = self.root / new_path
-            
-            if old_full.exists() and new_full.exists():
-                old_size = old_full.stat().st_size if old_full.is_file() else self.get_folder_size(old_full)
-                new_size = new_full.stat().st_size if new_full.is_file() else self.get_folder_size(new_full)
-                
-                found_duplicates.append({
-                    'old': old_path,
-                    'new': new_path,
-                    'old_size': old_size,
-                    'new_size': new_size
-                })
-        
-        if not found_duplicates:
-            print("✅ Brak duplikatów w services/")
+        if not result['exact'] and not result['near']:
+            print("✅ Brak duplikatów")
             return
         
-        print("📋 Znalezione duplikaty w services/:")
-        for dup in found_duplicates:
-            print(f"\n📁 {dup['old']} ({self.format_size(dup['old_size'])})")
-            print(f"📁 {dup['new']} ({self.format_size(dup['new_size'])})")
-            
-            if dup['old_size'] == 0:
-                print("   ⚠️  Stary plik jest PUSTY - można usunąć")
-            elif dup['new_size'] > dup['old_size']:
-                print("   💡 Nowy plik jest większy - prawdopodobnie bardziej aktualny")
-            else:
-                print("   ⚠️  Wymaga ręcznego sprawdzenia")
+        if result['exact']:
+            wasted = sum(size * (len(group) - 1) for size, group in result['exact'])
+            print(f"\n📋 Identyczne kopie: {len(result['exact'])} grup ({self.format_size(wasted)} do odzyskania)")
+            for size, group in result['exact'][:20]:
+                print(f"\n📁 {len(group)} × {self.format_size(size)}")
+                for path in group:
+                    print(f"   • {rel(path)}")
+        
+        if result['near']:
+            print(f"\n📋 Prawie identyczne pliki: {len(result['near'])} klastrów")
+            for cluster in result['near'][:20]:
+                low, high = cluster['min_similarity'], cluster['max_similarity']
+                similarity = f"{low:.0%}" if f"{low:.0%}" == f"{high:.0%}" else f"{low:.0%}-{high:.0%}"
+                print(f"\n📁 podobieństwo {similarity}")
+                for path in cluster['files']:
+                    stat = path.stat()
+                    modified = datetime.fromtimestamp(stat.st_mtime).strftime('%Y-%m-%d')
+                    print(f"   • {rel(path)} ({self.format_size(stat.st_size)}, zmieniony {modified})")
         
         print("\n📝 REKOMENDACJA:")
-        print("Duplikaty w services/ wymagają ręcznego sprawdzenia.")
-        print("Zalecam sprawdzić kod w każdym pliku przed usunięciem.")
+        print("Identyczne kopie można usunąć po poprawieniu importów.")
+        print("Prawie-kopie wymagają ręcznego scalenia - nowszy plik jest zwykle bardziej aktualny.")
         print("Te pliki NIE zostały automatycznie usunięte.")
 
     def generate_report(self):
@@ -459,7 +655,8 @@ class OremusProjectCleaner:
             'removed_directories': self.removed_dirs,
             'removed_files': self.removed_files,
             'total_size_saved': self.total_size_saved,
-            'backup_created': self.backup_created
+            'backup_created': self.backup_created,
+            'duplicates': self.duplicates
         }
         
         report_file = self.root / f"cleanup_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
@@ -492,7 +689,7 @@ class OremusProjectCleaner:
         self.clean_external_folder()
         self.clean_src_duplicates()
         self.clean_empty_files()
-        self.analyze_services_duplicates()
+        self.analyze_duplicates()
         
         # Wygeneruj raport
         self.generate_report()
@@ -502,14 +699,17 @@ class OremusProjectCleaner:
         print("📋 Sprawdź raport powyżej i plik JSON z detalami.")
         print("\n💡 ZALECENIA PO OCZYSZCZENIU:")
         print("1. Sprawdź czy aplikacja nadal działa: npm run dev")
-        print("2. Przejrzyj duplikaty w services/ ręcznie")
+        print("2. Przejrzyj znalezione duplikaty ręcznie (lista w raporcie JSON)")
         print("3. Uruchom testy: npm test")
         print("4. Zaktualizuj dokumentację jeśli potrzeba")
 
 if __name__ == "__main__":
     cleaner = OremusProjectCleaner()
     try:
-        cleaner.run()
+        if '--duplicates' in sys.argv:
+            cleaner.analyze_duplicates()  # sam raport duplikatów, bez oczyszczania
+        else:
+            cleaner.run()
     except KeyboardInterrupt:
         print("\n\n⚠️  Przerwano przez użytkownika")
         print("Częściowe zmiany mogły zostać wykonane.")
@@ -6,6 +6,10 @@ Naprawka problemu z pustym PROJECT_MAP.md
 
 import os
 import json
+import stat
+import sqlite3
+import contextlib
+import tempfile
 from datetime import datetime
 from pathlib import Path
 
@@ -16,38 +20,92 @@ def quick_generate_map():
     brain_dir = root / '.ai-brain'
     brain_dir.mkdir(exist_ok=True)
     
-    # Sprawdź czy istnieją dane JSON
+    # Sprawdź czy istnieją dane (SQLite ma pierwszeństwo, jeśli jest nowszy niż JSON)
     state_file = brain_dir / 'CURRENT_STATE.json'
+    sqlite_file = brain_dir / 'CURRENT_STATE.sqlite'
     
-    if state_file.exists():
-        print("📊 Znaleziono zapisane dane, generuję mapę...")
+    with contextlib.ExitStack() as stack:
+        if sqlite_file.exists() and (not state_file.exists() or
+                                     sqlite_file.stat().st_mtime >= state_file.stat().st_mtime):
+            print("📊 Znaleziono bazę SQLite, generuję mapę (odczyt folder po folderze)...")
+            # Foldery i TODO są czytane z bazy dopiero przy renderowaniu - połączenie żyje do końca zapisu
+            db = stack.enter_context(contextlib.closing(sqlite3.connect(f"file:{sqlite_file}?mode=ro", uri=True)))
+            row = db.execute("SELECT value FROM meta WHERE key = 'stats'").fetchone()
+            stats = json.loads(row[0]) if row else {}
+            row = db.execute("SELECT value FROM meta WHERE key = 'scores'").fetchone()
+            scores = json.loads(row[0]) if row else {}
+            total_files = db.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+            connections = [{'from': r[0], 'to': r[1]} for r in db.execute(
+                "SELECT from_path, to_path FROM connections ORDER BY rowid LIMIT 20")]
+            connections_count = db.execute("SELECT COUNT(*) FROM connections").fetchone()[0]
+            folders = iter_folders_sqlite(db)
+            todo_rows = db.execute("SELECT path, type, text, line FROM todos ORDER BY path, rowid")
         
-        with open(state_file, 'r', encoding='utf-8') as f:
-            brain_state = json.load(f)
+        elif state_file.exists():
+            print("📊 Znaleziono zapisane dane, generuję mapę...")
         
-        all_files = brain_state.get('files', {})
-        connections = brain_state.get('connections', [])
-        stats = brain_state.get('stats', {})
+            with open(state_file, 'r', encoding='utf-8') as f:
+                brain_state = json.load(f)
         
-    else:
-        print("❌ Brak zapisanych danych. Uruchom najpierw pełną analizę.")
-        return None
+            all_files = brain_state.get('files', {})
+            connections = brain_state.get('connections', [])
+            connections_count = len(connections)
+            stats = brain_state.get('stats', {})
+            scores = brain_state.get('scores', {})
+            total_files = len(all_files)
+            folders = iter_folders(all_files)
+            todo_rows = ((info['file'], t.get('type', 'TODO'), t.get('text', ''), t.get('line', 0))
+                         for info in all_files.values() for t in info.get('todos', []))
+        
+        else:
+            print("❌ Brak zapisanych danych. Uruchom najpierw pełną analizę.")
+            return None
     
-    if not all_files:
-        print("❌ Brak danych o plikach w JSON!")
-        return None
+        if not total_files:
+            print("❌ Brak danych o plikach w stanie!")
+            return None
     
-    print(f"✅ Ładowanie {len(all_files)} plików z danych...")
+        print(f"✅ Ładowanie {total_files} plików z danych...")
     
-    # Generuj mapę
-    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    total_files = len(all_files)
+        # Generuj mapę
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        total_functions = stats.get('functions', 0)
+        total_classes = stats.get('classes', 0)
+    
+        # Zapisz mapę - sekcje trafiają wprost do pliku tymczasowego, podmienianego atomowo
+        map_file = brain_dir / 'PROJECT_MAP.md'
+        try:
+            with atomic_open(map_file) as f:
+                f.writelines(render_map_sections(
+                    timestamp, stats, total_files, connections, connections_count, folders, todo_rows, scores))
+        
+            print(f"✅ SUKCES! Mapa zapisana: {map_file}")
+            print(f"📊 {total_files} plików, {total_functions} funkcji, {total_classes} komponentów")
+        
+            # Sprawdź rozmiar pliku
+            file_size = map_file.stat().st_size
+            print(f"📁 Rozmiar pliku: {file_size:,} bajtów")
+        
+            if file_size < 1000:
+                print("⚠️ Plik wydaje się być zbyt mały!")
+            else:
+                print("✅ Plik wygląda na kompletny!")
+            
+            return map_file
+        
+        except Exception as e:
+            print(f"❌ Błąd zapisywania: {e}")
+            return None
+
+def render_map_sections(timestamp, stats, total_files, connections, connections_count, folders, todo_rows,
+                        scores=None):
+    """Generator kolejnych sekcji PROJECT_MAP.md (foldery czytane dopiero przy renderowaniu)."""
     total_lines = stats.get('lines', 0)
     total_functions = stats.get('functions', 0)
     total_classes = stats.get('classes', 0)
     total_todos = stats.get('todos', 0)
     
-    map_content = f"""# 🗺️ MAPA PROJEKTU OREMUS - KOMPLETNA ANALIZA
+    yield f"""# 🗺️ MAPA PROJEKTU OREMUS - KOMPLETNA ANALIZA
 *Wygenerowano: {timestamp} | Naprawka Quick Fix*
 
 ## 🎯 PROJEKT OREMUS
@@ -65,73 +123,33 @@ Aplikacja religijna Next.js + TypeScript z funkcjonalnościami:
 - **⚙️ Funkcji:** {total_functions}
 - **🏛️ Klas/Komponentów:** {total_classes}
 - **⚠️ TODO/FIXME:** {total_todos}
-- **🔗 Połączeń:** {len(connections)}
+- **🔗 Połączeń:** {connections_count}
 
 ## 🏗️ STRUKTURA PROJEKTU
 
 """
     
-    # Grupuj pliki po katalogach
-    folders = {}
-    for file_path, file_info in all_files.items():
-        folder = str(Path(file_path).parent)
-        if folder == '.':
-            folder = '📄 ROOT'
-        else:
-            # Kategoryzuj foldery
-            if folder.startswith('app/'):
-                if 'api' in folder:
-                    category = '🌐 API Routes'
-                elif 'admin' in folder:
-                    category = '👨‍💼 Admin Panel'
-                elif 'auth' in folder:
-                    category = '🔐 Autoryzacja'
-                else:
-                    category = '📱 App Pages'
-            elif folder.startswith('components/'):
-                if 'admin' in folder:
-                    category = '👨‍💼 Admin Components'
-                elif 'features' in folder:
-                    category = '🎯 Feature Components'
-                elif 'glass' in folder:
-                    category = '✨ Glass Design System'
-                else:
-                    category = '🎨 UI Components'
-            elif folder.startswith('services/'):
-                category = '⚙️ Business Services'
-            elif folder.startswith('hooks/'):
-                category = '🪝 React Hooks'
-            elif folder.startswith('lib/'):
-                category = '📚 Libraries & Utils'
-            elif folder.startswith('types/'):
-                category = '🏷️ TypeScript Types'
-            else:
-                category = f'📁 {folder.split("/")[0]}'
-            
-            folder = f'{category}/{folder}'
-        
-        if folder not in folders:
-            folders[folder] = []
-        folders[folder].append((file_path, file_info))
-    
     # Wyświetl strukturę
-    for folder, files in sorted(folders.items()):
+    for folder, files in folders:
         if not files:
             continue
             
-        map_content += f"\n### {folder}\n"
+        yield f"\n### {folder}\n"
         
         # Statystyki dla folderu
         folder_functions = sum(len(f[1].get('functions', [])) for f in files)
         folder_classes = sum(len(f[1].get('classes', [])) for f in files)
         folder_lines = sum(f[1].get('lines', 0) for f in files)
         
-        map_content += f"*{len(files)} plików | {folder_lines:,} linii | {folder_functions} funkcji | {folder_classes} komponentów*\n\n"
+        yield f"*{len(files)} plików | {folder_lines:,} linii | {folder_functions} funkcji | {folder_classes} komponentów*\n\n"
         
-        # Sortuj pliki po ważności (więcej funkcji = ważniejszy)
-        sorted_files = sorted(files, 
-                            key=lambda x: len(x[1].get('functions', [])) + len(x[1].get('classes', [])), 
-                            reverse=True)
+        # Sortuj pliki po ważności (ocena z auto-update.py; bez niej - więcej funkcji = ważniejszy)
+        if scores:
+            sorted_files = sorted(files, key=lambda x: scores.get(x[0], 0.0), reverse=True)
+        else:
+            sorted_files = sorted(files, 
+                                key=lambda x: len(x[1].get('functions', [])) + len(x[1].get('classes', [])), 
+                                reverse=True)
         
         # Pokaż najważniejsze pliki (max 8 na folder)
         for file_path, file_info in sorted_files[:8]:
@@ -139,35 +157,35 @@ Aplikacja religijna Next.js + TypeScript z funkcjonalnościami:
             file_type = file_info.get('type', 'Other')
             lines = file_info.get('lines', 0)
             
-            map_content += f"**📄 {filename}** ({file_type}, {lines} linii)\n"
+            yield f"**📄 {filename}** ({file_type}, {lines} linii)\n"
             
             # Dodaj opis funkcjonalności na podstawie nazwy
             desc = get_file_description(filename, file_path)
             if desc:
-                map_content += f"*{desc}*\n"
+                yield f"*{desc}*\n"
             
             # Komponenty/klasy
             classes = file_info.get('classes', [])
             if classes:
                 class_names = [c.get('name', c) if isinstance(c, dict) else c for c in classes[:3]]
-                map_content += f"*🏛️ Komponenty:* {', '.join(f'`{c}`' for c in class_names)}\n"
+                yield f"*🏛️ Komponenty:* {', '.join(f'`{c}`' for c in class_names)}\n"
             
             # Funkcje
             functions = file_info.get('functions', [])
             if functions:
                 func_names = [f.get('name', f) if isinstance(f, dict) else f for f in functions[:4]]
-                map_content += f"*⚙️ Funkcje:* {', '.join(f'`{f}()`' for f in func_names)}\n"
+                yield f"*⚙️ Funkcje:* {', '.join(f'`{f}()`' for f in func_names)}\n"
             
             # Eksporty
             exports = file_info.get('exports', [])
             if exports:
-                map_content += f"*📤 Eksporty:* {', '.join(f'`{e}`' for e in exports[:3])}\n"
+                yield f"*📤 Eksporty:* {', '.join(f'`{e}`' for e in exports[:3])}\n"
             
-            map_content += "\n"
+            yield "\n"
     
     # Sekcja połączeń
     if connections:
-        map_content += "\n## 🔗 KLUCZOWE POŁĄCZENIA\n"
+        yield "\n## 🔗 KLUCZOWE POŁĄCZENIA\n"
         
         # Grupuj połączenia według typów
         connection_summary = {}
@@ -181,28 +199,28 @@ Aplikacja religijna Next.js + TypeScript z funkcjonalnościami:
             connection_summary[conn_key] += 1
         
         for conn_key, count in sorted(connection_summary.items(), key=lambda x: x[1], reverse=True)[:10]:
-            map_content += f"- **{conn_key}** ({count} połączeń)\n"
+            yield f"- **{conn_key}** ({count} połączeń)\n"
     
     # TODO/FIXME
     if total_todos > 0:
-        map_content += "\n## ⚠️ WYMAGAJĄ UWAGI\n"
+        yield "\n## ⚠️ WYMAGAJĄ UWAGI\n"
         
         todo_files = []
-        for file_info in all_files.values():
-            todos = file_info.get('todos', [])
-            if todos:
-                filename = Path(file_info['file']).name
-                for todo in todos[:2]:  # Max 2 per plik
-                    todo_type = todo.get('type', 'TODO')
-                    todo_text = todo.get('text', '')[:60]
-                    todo_line = todo.get('line', 0)
-                    todo_files.append(f"- **{todo_type}** `{filename}:{todo_line}` - {todo_text}")
+        per_file = {}
+        for file_path, todo_type, todo_text, todo_line in todo_rows:
+            per_file[file_path] = per_file.get(file_path, 0) + 1
+            if per_file[file_path] > 2:  # Max 2 per plik
+                continue
+            filename = Path(file_path).name
+            todo_files.append(f"- **{todo_type or 'TODO'}** `{filename}:{todo_line or 0}` - {(todo_text or '')[:60]}")
+            if len(todo_files) >= 10:
+                break
         
         for todo_item in todo_files[:10]:  # Max 10 total
-            map_content += todo_item + "\n"
+            yield todo_item + "\n"
     
     # Przewodnik
-    map_content += """
+    yield """
 ## 🎯 PRZEWODNIK ROZWOJU OREMUS
 
 ### 📍 Gdzie dodawać kod:
@@ -259,30 +277,79 @@ Aplikacja religijna Next.js + TypeScript z funkcjonalnościami:
 3. API w `app/api/admin/`
 4. Analytics w `services/analytics/`
 """
-    
-    # Zapisz mapę
-    map_file = brain_dir / 'PROJECT_MAP.md'
+
+@contextlib.contextmanager
+def atomic_open(path):
+    """Otwiera plik tymczasowy obok `path` do zapisu; po sukcesie podmienia go atomowo (os.replace).
+
+    Jak atomic_open w .ai-brain/auto-update.py: przy błędzie stary plik zostaje, a plik tymczasowy
+    jest usuwany (jeśli jeszcze istnieje).
+    """
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
     try:
-        with open(map_file, 'w', encoding='utf-8') as f:
-            f.write(map_content)
-        
-        print(f"✅ SUKCES! Mapa zapisana: {map_file}")
-        print(f"📊 {total_files} plików, {total_functions} funkcji, {total_classes} komponentów")
-        
-        # Sprawdź rozmiar pliku
-        file_size = map_file.stat().st_size
-        print(f"📁 Rozmiar pliku: {file_size:,} bajtów")
-        
-        if file_size < 1000:
-            print("⚠️ Plik wydaje się być zbyt mały!")
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            yield f
+        try:
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+        except OSError:
+            mode = 0o644
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(tmp_path)
+        raise
+
+def categorize_folder(folder):
+    """Zwraca klucz grupy w mapie: kategoria/folder (lub ROOT)."""
+    if folder == '.':
+        return '📄 ROOT'
+    # Kategoryzuj foldery
+    if folder.startswith('app/'):
+        if 'api' in folder:
+            category = '🌐 API Routes'
+        elif 'admin' in folder:
+            category = '👨‍💼 Admin Panel'
+        elif 'auth' in folder:
+            category = '🔐 Autoryzacja'
         else:
-            print("✅ Plik wygląda na kompletny!")
-            
-        return map_file
-        
-    except Exception as e:
-        print(f"❌ Błąd zapisywania: {e}")
-        return None
+            category = '📱 App Pages'
+    elif folder.startswith('components/'):
+        if 'admin' in folder:
+            category = '👨‍💼 Admin Components'
+        elif 'features' in folder:
+            category = '🎯 Feature Components'
+        elif 'glass' in folder:
+            category = '✨ Glass Design System'
+        else:
+            category = '🎨 UI Components'
+    elif folder.startswith('services/'):
+        category = '⚙️ Business Services'
+    elif folder.startswith('hooks/'):
+        category = '🪝 React Hooks'
+    elif folder.startswith('lib/'):
+        category = '📚 Libraries & Utils'
+    elif folder.startswith('types/'):
+        category = '🏷️ TypeScript Types'
+    else:
+        category = f'📁 {folder.split("/")[0]}'
+    return f'{category}/{folder}'
+
+def iter_folders(all_files):
+    """Grupuje pliki ze stanu JSON po katalogach; zwraca posortowane (folder, [(ścieżka, info)])."""
+    folders = {}
+    for file_path, file_info in all_files.items():
+        folder = categorize_folder(str(Path(file_path).parent))
+        folders.setdefault(folder, []).append((file_path, file_info))
+    return sorted(folders.items())
+
+def iter_folders_sqlite(db):
+    """Jak iter_folders, ale czyta z CURRENT_STATE.sqlite po jednym katalogu naraz."""
+    dirs = sorted((categorize_folder(d), d) for (d,) in db.execute("SELECT DISTINCT dir FROM files"))
+    for folder, directory in dirs:
+        rows = db.execute("SELECT path, info FROM files WHERE dir = ?", (directory,))
+        yield folder, [(path, json.loads(info)) for path, info in rows]
 
 def get_file_description(filename, file_path):
     """Zwraca opis funkcjonalności pliku na podstawie nazwy"""
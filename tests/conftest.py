@@ -0,0 +1,65 @@
+"""Wspólne fixtures testów skryptów Pythona w repozytorium.
+
+Skrypty mają w nazwach myślniki i spacje, więc są ładowane z pliku (jak w .ai-brain/benchmark.py).
+"""
+
+import importlib.util
+import os
+import sys
+from contextlib import redirect_stdout
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def load_script(name, path):
+    """Ładuje skrypt jako moduł `name` i rejestruje go w sys.modules (potrzebne przy pickle)."""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(name, ROOT / path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope='session')
+def auto_update():
+    return load_script('auto_update', '.ai-brain/auto-update.py')
+
+
+@pytest.fixture(scope='session')
+def receiver_module():
+    return load_script('ultimate_smart_receiver', 'ultimate-smart-receiver.py')
+
+
+@pytest.fixture(scope='session')
+def cleanup_oremus():
+    return load_script('cleanup_oremus', 'cleanup_oremus.py')
+
+
+@pytest.fixture(scope='session')
+def quick_fix():
+    return load_script('quick_fix', 'python quick_fix.py')
+
+
+@pytest.fixture
+def make_receiver(receiver_module, tmp_path, monkeypatch):
+    """Fabryka UltimateSmartReceiver z projektem w tmp_path/project i Downloads w tmp_path."""
+    project = tmp_path / 'project'
+    project.mkdir()
+    monkeypatch.chdir(project)
+    monkeypatch.setenv('HOME', str(tmp_path))
+    monkeypatch.setenv('USERPROFILE', str(tmp_path))
+    monkeypatch.delenv('NEXT_PUBLIC_SUPABASE_URL', raising=False)
+    (tmp_path / 'Downloads').mkdir()
+    # Bez uruchamiania VS Code
+    monkeypatch.setattr(receiver_module.os, 'system', lambda command: 0)
+    monkeypatch.setattr(receiver_module.time, 'sleep', lambda seconds: None)
+
+    def make(force=False):
+        with open(os.devnull, 'w', encoding='utf-8') as devnull, redirect_stdout(devnull):
+            return receiver_module.UltimateSmartReceiver(force=force)
+    return make
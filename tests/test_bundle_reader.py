@@ -0,0 +1,74 @@
+"""Testy strumieniowego czytania bundle (_JsonCursor, ArtifactBundleReader) z ultimate-smart-receiver.py."""
+import io
+import itertools
+import json
+import os
+from contextlib import redirect_stdout
+
+import pytest
+
+
+def write_json(path, data):
+    path.write_text(json.dumps(data), encoding='utf-8')
+    return path
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 7, 1 << 20])
+def test_artifacts_and_metadata_survive_any_chunk_size(receiver_module, tmp_path, chunk_size):
+    artifacts = [{'title': 'a', 'content': 'x' * 50 + '\\"ąę\u2028', 'size': 12345, 'ratio': -2.5e-3},
+                 {'title': 'b', 'content': '', 'flags': [True, False, None]}]
+    bundle = write_json(tmp_path / 'bundle.json',
+                        {'version': [1, {'nested': '}'}], 'artifacts': artifacts, 'metadata': {'source': 'claude'}})
+
+    reader = receiver_module.ArtifactBundleReader(bundle, chunk_size)
+
+    assert list(reader.artifacts()) == artifacts
+    assert reader.bundle_metadata == {'source': 'claude'}
+    assert reader.metadata() == {'source': 'claude'}
+
+
+def test_empty_artifacts_still_reads_metadata(receiver_module, tmp_path):
+    bundle = write_json(tmp_path / 'bundle.json', {'artifacts': [], 'metadata': {'source': 'x'}})
+    reader = receiver_module.ArtifactBundleReader(bundle, 4)
+
+    assert list(reader.artifacts()) == []
+    assert reader.bundle_metadata == {'source': 'x'}
+
+
+def test_malformed_token_fails_without_reading_rest_of_file(receiver_module):
+    text = '{"artifacts": [{"title": nul1, "content": "' + 'x' * 1_000_000 + '"}]}'
+    f = io.StringIO(text)
+    cursor = receiver_module._JsonCursor(f, 64)
+    assert next(cursor.keys()) == 'artifacts'
+    cursor.expect('[')
+
+    with pytest.raises(json.JSONDecodeError):
+        cursor.value()
+    assert f.tell() < 1024
+
+
+def test_truncated_file_raises(receiver_module, tmp_path):
+    bundle = tmp_path / 'bundle.json'
+    bundle.write_text('{"artifacts": [{"title": "a"}, {"title": "b', encoding='utf-8')
+
+    with pytest.raises(json.JSONDecodeError):
+        list(receiver_module.ArtifactBundleReader(bundle, 8).artifacts())
+
+
+def test_stream_deploys_to_path_from_summary(make_receiver, receiver_module, monkeypatch):
+    receiver = make_receiver()
+    receiver.STREAM_BUNDLE_BYTES = 0
+    # Każde wywołanie time.time() zwraca inną sekundę - nazwa z czasem nie może się zmienić między przejściami
+    clock = itertools.count(1_700_000_000)
+    monkeypatch.setattr(receiver_module.time, 'time', lambda: next(clock))
+    bundle = write_json(receiver.downloads_dir / 'claude-artifacts-bundle.json', {'metadata': {}, 'artifacts': [
+        {'type': 'code_snippet', 'language': 'typescript', 'title': 'Unknown', 'content': 'export {}\n'}]})
+    brain_updates = []
+    monkeypatch.setattr(receiver, 'update_enhanced_brain', brain_updates.append)
+
+    with open(os.devnull, 'w', encoding='utf-8') as devnull, redirect_stdout(devnull):
+        assert receiver.process_artifacts_bundle(bundle)
+
+    [summary] = brain_updates[0]
+    deployed = list((receiver.project_root / 'lib' / 'utils').iterdir())
+    assert deployed == [summary['deploymentPath']]
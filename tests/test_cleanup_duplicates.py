@@ -0,0 +1,55 @@
+"""Testy DuplicateDetector z cleanup_oremus.py."""
+
+
+def write(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return path
+
+
+def test_exact_groups_finds_identical_copies(cleanup_oremus, tmp_path):
+    body = b'export const a = 1\n' * 50
+    write(tmp_path / 'lib' / 'a.ts', body)
+    write(tmp_path / 'lib' / 'a.ts.new', body)
+    write(tmp_path / 'lib' / 'b.ts', body + b'// inny\n')
+
+    detector = cleanup_oremus.DuplicateDetector(tmp_path)
+    groups = detector.exact_groups(detector.iter_files())
+
+    assert [sorted(p.name for p in paths) for _, paths in groups] == [['a.ts', 'a.ts.new']]
+
+
+def test_exact_groups_compares_whole_file_between_partial_and_double_partial_size(cleanup_oremus, tmp_path):
+    detector = cleanup_oremus.DuplicateDetector(tmp_path)
+    # Ten sam rozmiar i te same pierwsze PARTIAL_BYTES bajtów, różnica dopiero dalej
+    head = b'x' * detector.PARTIAL_BYTES
+    write(tmp_path / 'one.ts', head + b'a' * 2000)
+    write(tmp_path / 'two.ts', head + b'b' * 2000)
+
+    assert detector.exact_groups(detector.iter_files()) == []
+
+
+def test_exact_groups_compares_middle_of_large_files(cleanup_oremus, tmp_path):
+    detector = cleanup_oremus.DuplicateDetector(tmp_path)
+    edge = b'y' * detector.PARTIAL_BYTES
+    write(tmp_path / 'one.ts', edge + b'a' * 100 + edge)
+    write(tmp_path / 'two.ts', edge + b'b' * 100 + edge)
+
+    assert detector.exact_groups(detector.iter_files()) == []
+
+
+def test_near_clusters_groups_edited_copies(cleanup_oremus, tmp_path):
+    lines = [f'export function handler{i}(request) {{ return service.call{i}(request.body) }}\n'
+             for i in range(60)]
+    original = write(tmp_path / 'services' / 'EmailService.ts', ''.join(lines).encode())
+    lines[10] = 'export function changed(request) { return null }\n'
+    copy = write(tmp_path / 'services' / 'EmailService.new.ts', ''.join(lines).encode())
+    write(tmp_path / 'services' / 'Other.ts',
+          ''.join(f'const value{i} = compute({i}) * {i}\n' for i in range(80)).encode())
+
+    detector = cleanup_oremus.DuplicateDetector(tmp_path)
+    clusters = detector.near_clusters([path for path, _ in detector.iter_files()])
+
+    assert len(clusters) == 1
+    assert sorted(clusters[0]['files']) == sorted([original, copy])
+    assert clusters[0]['min_similarity'] >= detector.threshold
@@ -0,0 +1,90 @@
+"""Testy odcisków plików i ponownego użycia analiz z .ai-brain/auto-update.py."""
+import os
+from contextlib import redirect_stdout
+from io import StringIO
+
+import pytest
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / 'a.ts'
+    path.write_text("export function a() {}\n", encoding='utf-8')
+    return path
+
+
+def make_brain(auto_update, root, verify_hash):
+    with redirect_stdout(StringIO()):
+        return auto_update.UniversalAIBrain(project_root=root, verify_hash=verify_hash, analysis_cache=False)
+
+
+def touch(path):
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    return path.stat()
+
+
+def test_unchanged_file_is_reused(auto_update, source):
+    brain = make_brain(auto_update, source.parent, verify_hash=False)
+    st = source.stat()
+    info = brain.analyze_with_fingerprint(source, st)
+
+    assert brain.reuse_previous_info(source, st, info) is info
+
+
+@pytest.mark.parametrize('verify_hash', [False, True])
+def test_touched_file_is_reused_only_with_verify_hash(auto_update, source, verify_hash):
+    brain = make_brain(auto_update, source.parent, verify_hash)
+    info = brain.analyze_with_fingerprint(source, source.stat())
+    st = touch(source)
+
+    reused = brain.reuse_previous_info(source, st, info)
+
+    if verify_hash:
+        assert reused['functions'] == info['functions']
+        assert reused['fingerprint']['mtime_ns'] == st.st_mtime_ns
+    else:
+        assert reused is None
+
+
+def test_changed_content_or_analyzer_is_not_reused(auto_update, source):
+    brain = make_brain(auto_update, source.parent, verify_hash=True)
+    info = brain.analyze_with_fingerprint(source, source.stat())
+
+    stale = dict(info, fingerprint=dict(info['fingerprint'], analyzer=auto_update.ANALYZER_VERSION - 1))
+    assert brain.reuse_previous_info(source, source.stat(), stale) is None
+
+    # Ten sam rozmiar, inna treść - hash rozstrzyga
+    source.write_text("export function b() {}\n", encoding='utf-8')
+    assert brain.reuse_previous_info(source, touch(source), info) is None
+
+
+def test_verify_hash_flag_reaches_brain(auto_update, monkeypatch):
+    created = []
+
+    class Brain:
+        def __init__(self, **kwargs):
+            created.append(kwargs)
+
+        def generate_project_map(self, verbose=True):
+            pass
+    monkeypatch.setattr(auto_update, 'UniversalAIBrain', Brain)
+
+    with redirect_stdout(StringIO()):
+        auto_update.main(['--ai', 'claude', '--verify-hash'])
+        auto_update.main(['--ai', 'claude'])
+
+    assert [kwargs['verify_hash'] for kwargs in created] == [True, False]
+
+
+@pytest.mark.parametrize('analysis_cache', [False, True])
+def test_verify_hash_reads_the_file_once(auto_update, source, tmp_path, monkeypatch, analysis_cache):
+    with redirect_stdout(StringIO()):
+        brain = auto_update.UniversalAIBrain(project_root=source.parent, verify_hash=True,
+                                             analysis_cache=analysis_cache, cache_dir=tmp_path / 'cache')
+    expected = auto_update.content_hash(source)
+    monkeypatch.setattr(auto_update, 'content_hash', lambda path: pytest.fail(f"ponowny odczyt {path}"))
+
+    for _ in range(2):  # drugi przebieg z pamięci podręcznej analiz (gdy włączona)
+        info = brain.analyze_with_fingerprint(source, source.stat())
+        assert info['fingerprint']['hash'] == expected
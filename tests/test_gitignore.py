@@ -0,0 +1,55 @@
+"""Testy dopasowania reguł .gitignore i walkera iter_files z .ai-brain/auto-update.py."""
+from contextlib import redirect_stdout
+from io import StringIO
+
+import pytest
+
+
+@pytest.mark.parametrize('pattern, path, is_dir, expected', [
+    ('*.log', 'debug.log', False, True),
+    ('*.log', 'logs/deep/debug.log', False, True),
+    ('/build', 'build', True, True),
+    ('/build', 'app/build', True, None),
+    ('docs/*.md', 'docs/a.md', False, True),
+    ('docs/*.md', 'docs/sub/a.md', False, None),
+    ('**/generated', 'src/x/generated', True, True),
+    ('cache/**', 'cache/a/b.ts', False, True),
+    ('a/**/b', 'a/b', False, True),
+    ('a/**/b', 'a/x/y/b', False, True),
+    ('file?.ts', 'file1.ts', False, True),
+    ('file?.ts', 'file10.ts', False, None),
+    ('[!a]*.ts', 'b.ts', False, True),
+    ('[!a]*.ts', 'a.ts', False, None),
+    ('\\#literal', '#literal', False, True),
+    ('out/', 'out', False, None),
+    ('out/', 'out', True, True),
+])
+def test_single_rule(auto_update, pattern, path, is_dir, expected):
+    assert auto_update.GitIgnoreRules('', [pattern]).match(path, is_dir) is expected
+
+
+def test_negation_comments_and_nested_base(auto_update):
+    rules = auto_update.GitIgnoreRules('packages/web', ['# komentarz', '', '*.env', '!keep.env'])
+
+    assert rules.match('packages/web/.env', False) is True
+    assert rules.match('packages/web/a.env', False) is True
+    assert rules.match('packages/web/keep.env', False) is False
+    assert rules.match('packages/api/a.env', False) is None
+
+
+def test_iter_files_prunes_ignored_directories_and_reincludes(auto_update, tmp_path):
+    (tmp_path / '.gitignore').write_text("dist/\n*.gen.ts\n!keep.gen.ts\n", encoding='utf-8')
+    for rel in ('src/a.ts', 'src/b.gen.ts', 'src/keep.gen.ts', 'dist/bundle.js', 'src/dist/x.ts',
+                'lib/local/c.ts', 'lib/d.ts'):
+        path = tmp_path / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text('export {}\n', encoding='utf-8')
+    (tmp_path / 'lib' / '.gitignore').write_text("local/\n", encoding='utf-8')
+
+    with redirect_stdout(StringIO()):
+        brain = auto_update.UniversalAIBrain(project_root=tmp_path, analysis_cache=False)
+    found = sorted(str(path.relative_to(tmp_path)).replace('\\', '/') for path, _ in brain.iter_files())
+
+    assert [p for p in found if p.endswith('.ts') or p.endswith('.js')] == ['lib/d.ts', 'src/a.ts', 'src/keep.gen.ts']
+    assert brain.is_tracked(tmp_path / 'src' / 'a.ts')
+    assert not brain.is_tracked(tmp_path / 'lib' / 'local' / 'c.ts')
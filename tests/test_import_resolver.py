@@ -0,0 +1,75 @@
+"""Testy rozwiązywania importów (ImportResolver) i odwrotnego indeksu z .ai-brain/auto-update.py."""
+import os
+from contextlib import redirect_stdout
+
+import pytest
+
+TSCONFIG = """{
+  // komentarze i końcowe przecinki jak w tsconfig.json generowanym przez Next.js
+  "compilerOptions": {
+    "baseUrl": ".",
+    "paths": {
+      "@/*": ["./*"],
+      "@ui": ["components/ui/index.ts"],
+      "@services/*": ["missing/*", "services/*"],
+    },
+  },
+}
+"""
+
+FILES = ['app/page.tsx', 'components/ui/index.ts', 'lib/utils.ts', 'lib/data.json',
+         'services/candle/CandleService.ts', 'services/candle/index.ts', 'types/mass.d.ts']
+
+
+@pytest.fixture
+def resolver(auto_update, tmp_path):
+    (tmp_path / 'tsconfig.json').write_text(TSCONFIG, encoding='utf-8')
+    return auto_update.ImportResolver(tmp_path, [os.path.join(*path.split('/')) for path in FILES])
+
+
+def key(path):
+    return os.path.join(*path.split('/'))
+
+
+@pytest.mark.parametrize('specifier, expected', [
+    ('@/services/candle/CandleService', 'services/candle/CandleService.ts'),
+    ('@/services/candle', 'services/candle/index.ts'),  # plik index
+    ('@services/candle', 'services/candle/index.ts'),  # drugi cel aliasu, gdy pierwszy nie istnieje
+    ('@ui', 'components/ui/index.ts'),  # alias bez '*'
+    ('../lib/utils', 'lib/utils.ts'),
+    ('../lib/data.json', 'lib/data.json'),
+    ('@/types/mass', 'types/mass.d.ts'),
+    ('lib/utils', 'lib/utils.ts'),  # względem baseUrl
+    ('react', None),
+    ('./missing', None),
+    ('../../outside', None),
+])
+def test_resolve(resolver, specifier, expected):
+    assert resolver.resolve(specifier, key('app/page.tsx')) == (key(expected) if expected else None)
+
+
+def test_relative_results_are_cached_per_directory(resolver):
+    assert resolver.resolve('./index', key('services/candle/CandleService.ts')) == key('services/candle/index.ts')
+    assert resolver.resolve('./index', key('components/ui/index.ts')) == key('components/ui/index.ts')
+    assert resolver.cache[('services/candle', './index')] == key('services/candle/index.ts')
+
+
+def test_who_imports_from_reverse_index(auto_update, tmp_path):
+    (tmp_path / 'tsconfig.json').write_text(TSCONFIG, encoding='utf-8')
+    sources = {
+        'services/candle/CandleService.ts': "export class CandleService {}\n",
+        'services/candle/index.ts': "export * from './CandleService'\n",
+        'app/page.tsx': "import { CandleService } from '@/services/candle/CandleService'\n"
+                        "import '@services/candle'\nimport React from 'react'\n",
+    }
+    for path, content in sources.items():
+        (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / path).write_text(content, encoding='utf-8')
+    with open(os.devnull, 'w', encoding='utf-8') as devnull, redirect_stdout(devnull):
+        brain = auto_update.UniversalAIBrain(project_root=tmp_path, analysis_cache=False)
+        brain.write_project_map(brain.build_project_graph(verbose=False), verbose=False)
+
+    assert sorted(brain.who_imports('services/candle/CandleService.ts')) == [
+        key('app/page.tsx'), key('services/candle/index.ts')]
+    assert brain.who_imports('services/candle/index.ts') == [key('app/page.tsx')]
+    assert brain.who_imports('app/page.tsx') == []
@@ -0,0 +1,106 @@
+"""Testy extract_js_symbols z .ai-brain/auto-update.py."""
+
+
+def names(entries):
+    return [entry['name'] for entry in entries]
+
+
+def test_imports_reexports_and_calls_in_file_order(auto_update):
+    symbols = auto_update.extract_js_symbols(
+        "import React from 'react'\n"
+        "import type { Mass } from '@/types/mass'\n"
+        "import './styles.css'\n"
+        "const Chart = lazy(() => import('./Chart'))\n"
+        "export { formatDate, parse as parseDate } from '@/lib/date'\n"
+        "export * as api from './api'\n"
+        "const config = require(\"../config\")\n"
+    )
+
+    assert symbols['imports'] == ['react', '@/types/mass', './styles.css', './Chart', '@/lib/date', './api',
+                                  '../config']
+    assert symbols['exports'] == ['formatDate', 'parseDate', 'api']
+
+
+def test_functions_components_and_exports(auto_update):
+    symbols = auto_update.extract_js_symbols(
+        "export default function MassList({ items }) {\n"
+        "  const handleClick = () => setOpen(true)\n"
+        "  const total = items.length\n"
+        "}\n"
+        "export const CandleCard = React.memo(function CandleCard() {})\n"
+        "export const Panel = forwardRef<HTMLDivElement, Props>((props, ref) => null)\n"
+        "export const API_URL = '/api'\n"
+        "async function* stream() {}\n"
+        "const fetchMasses = async (id: string): Promise<Mass[]> => []\n"
+        "export { total as count }\n"
+    )
+
+    assert [(f['name'], f['type'], f['line']) for f in symbols['functions']] == [
+        ('MassList', 'component', 1), ('handleClick', 'function', 2), ('CandleCard', 'component', 5),
+        ('Panel', 'component', 6), ('stream', 'function', 8), ('fetchMasses', 'function', 9)]
+    assert symbols['exports'] == ['MassList', 'CandleCard', 'Panel', 'API_URL', 'count']
+
+
+def test_classes_and_types(auto_update):
+    symbols = auto_update.extract_js_symbols(
+        "export interface Mass { id: string }\n"
+        "type Props = { mass: Mass }\n"
+        "export const enum Status { Ok }\n"
+        "export abstract class Repository {}\n"
+        "declare namespace Oremus {}\n"
+        "export default MassList\n"
+    )
+
+    assert [(t['name'], t['kind'], t['line']) for t in symbols['types']] == [
+        ('Mass', 'interface', 1), ('Props', 'type', 2), ('Status', 'enum', 3), ('Oremus', 'namespace', 5)]
+    assert [(c['name'], c['line']) for c in symbols['classes']] == [('Repository', 4)]
+    assert symbols['exports'] == ['Mass', 'Status', 'Repository', 'MassList']
+
+
+def test_declarations_in_comments_strings_and_templates_are_ignored(auto_update):
+    symbols = auto_update.extract_js_symbols(
+        "/* przykład:\n"
+        "function Commented() {}\n"
+        "*/\n"
+        "const html = `\n"
+        "function InTemplate() {}\n"
+        "${items.map(i => `\n"
+        "class Nested {}\n"
+        "`)}\n"
+        "import x from 'template'\n"
+        "`\n"
+        "const url = '/*' // `\n"
+        "function Real() {}\n"
+        "// const lazy = import('./commented')\n"
+        "const label = \"import('./string')\"\n"
+    )
+
+    assert names(symbols['functions']) == ['Real']
+    assert symbols['functions'][0]['line'] == 12
+    assert symbols['classes'] == []
+    assert symbols['imports'] == []
+
+
+def test_arrow_components_with_nested_parentheses(auto_update):
+    symbols = auto_update.extract_js_symbols(
+        "const Calendar = ({\n"
+        "  availableDays,\n"
+        "}: { onDateSelect: (date: string) => void }) => {\n"
+        "}\n"
+        "const Button = ({ onClick }: { onClick: () => void }) => null\n"
+        "export const Modal = ({ onClose = () => {}, title = ')' /* ( */ }) => null\n"
+        "const identity = <T,>(x: T): T => x\n"
+        "const load = async ({ id }: { id: ReturnType<typeof getId> }): Promise<void> => {}\n"
+        "const total = (a + b) * 2\n"
+        "const wrapped = (useMemo(() => 1, []))\n"
+    )
+
+    assert [(f['name'], f['line']) for f in symbols['functions']] == [
+        ('Calendar', 1), ('Button', 5), ('Modal', 6), ('identity', 7), ('load', 8)]
+    assert symbols['exports'] == ['Modal']
+
+
+def test_repo_component_with_typed_callback_props(auto_update):
+    from conftest import ROOT
+    content = (ROOT / 'components' / 'features' / 'mass' / 'OrderMassScreen.tsx').read_text(encoding='utf-8')
+    assert 'Calendar' in names(auto_update.extract_js_symbols(content)['functions'])
@@ -0,0 +1,84 @@
+"""Testy extract_python_symbols (PythonSymbolVisitor) z .ai-brain/auto-update.py."""
+import ast
+
+import pytest
+
+SOURCE = '''"""Moduł płatności.
+
+Szczegóły w dokumentacji.
+"""
+import os, json as j
+from .models import Payment
+from .. import utils
+
+API_URL = "https://x"
+TIMEOUT: int = 30
+API_URL = "https://y"
+lowercase = 1
+
+
+class Gateway(Base, metaclass=Meta):
+    RETRIES = 3
+
+    def charge(self):
+        def inner():
+            pass
+
+    async def refund(self):
+        pass
+
+    class Config:
+        pass
+
+
+if os.name == 'nt':
+    def windows_only():
+        pass
+else:
+    try:
+        import winreg
+    except ImportError:
+        async def fallback():
+            pass
+'''
+
+
+def test_symbols_scopes_and_lines(auto_update):
+    symbols = auto_update.extract_python_symbols(SOURCE)
+
+    assert [(f['name'], f['type'], f.get('class'), f.get('parent')) for f in symbols['functions']] == [
+        ('charge', 'method', 'Gateway', None),
+        ('inner', 'function', None, 'charge'),
+        ('refund', 'async method', 'Gateway', None),
+        ('windows_only', 'function', None, None),
+        ('fallback', 'async function', None, None),
+    ]
+    gateway, config = symbols['classes']
+    assert (gateway['name'], gateway['line'], gateway['bases']) == ('Gateway', 15, ['Base'])
+    assert [(m['name'], m['async']) for m in gateway['methods']] == [('charge', False), ('refund', True)]
+    assert (config['name'], config['parent']) == ('Config', 'Gateway')
+    assert symbols['imports'] == ['os', 'json', '.models', '..', 'winreg']
+    assert symbols['constants'] == [{'name': 'API_URL', 'line': 9}, {'name': 'TIMEOUT', 'line': 10}]
+    assert symbols['docstring'] == 'Moduł płatności.'
+
+
+def test_function_line_ranges(auto_update):
+    charge = auto_update.extract_python_symbols(SOURCE)['functions'][0]
+    assert (charge['line'], charge['end_line']) == (18, 20)
+
+
+def test_matches_ast_walk_on_repo_scripts(auto_update):
+    # Ten sam zbiór definicji co pełne ast.walk - visitor tylko pomija wyrażenia
+    from conftest import ROOT
+    for path in (ROOT / '.ai-brain' / 'auto-update.py', ROOT / 'cleanup_oremus.py'):
+        content = path.read_text(encoding='utf-8')
+        tree = ast.parse(content)
+        expected = sorted(node.name for node in ast.walk(tree)
+                          if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)))
+        symbols = auto_update.extract_python_symbols(content)
+        assert sorted(f['name'] for f in symbols['functions']) == expected
+
+
+def test_syntax_error_propagates(auto_update):
+    with pytest.raises(SyntaxError):
+        auto_update.extract_python_symbols('def broken(:\n')
@@ -0,0 +1,71 @@
+"""Testy generowania mapy z zapisanego stanu (python quick_fix.py)."""
+import json
+import os
+import sqlite3
+from contextlib import redirect_stdout
+
+import pytest
+
+
+def write_sqlite_state(path):
+    db = sqlite3.connect(path)
+    db.executescript("""
+        CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+        CREATE TABLE files (path TEXT PRIMARY KEY, dir TEXT, info TEXT);
+        CREATE TABLE connections (from_path TEXT, to_path TEXT);
+        CREATE TABLE todos (path TEXT, type TEXT, text TEXT, line INTEGER);
+    """)
+    info = {'file': 'lib/a.ts', 'type': 'TypeScript', 'lines': 3, 'functions': [{'name': 'a'}]}
+    db.execute("INSERT INTO meta VALUES ('stats', ?)", (json.dumps({'lines': 3, 'functions': 1, 'todos': 1}),))
+    db.execute("INSERT INTO files VALUES ('lib/a.ts', 'lib', ?)", (json.dumps(info),))
+    db.execute("INSERT INTO connections VALUES ('lib/a.ts', 'lib/b.ts')")
+    db.execute("INSERT INTO todos VALUES ('lib/a.ts', 'TODO', 'sprawdzić', 2)")
+    db.commit()
+    db.close()
+
+
+def test_sqlite_state_is_rendered_and_connection_closed(quick_fix, tmp_path, monkeypatch):
+    (tmp_path / '.ai-brain').mkdir()
+    write_sqlite_state(tmp_path / '.ai-brain' / 'CURRENT_STATE.sqlite')
+    monkeypatch.chdir(tmp_path)
+    connections = []
+    connect = sqlite3.connect
+    monkeypatch.setattr(quick_fix.sqlite3, 'connect', lambda *args, **kwargs: connections.append(
+        connect(*args, **kwargs)) or connections[-1])
+
+    with open(os.devnull, 'w', encoding='utf-8') as devnull, redirect_stdout(devnull):
+        map_file = quick_fix.quick_generate_map()
+
+    text = map_file.read_text(encoding='utf-8')
+    assert '**📄 a.ts**' in text and 'sprawdzić' in text
+    with pytest.raises(sqlite3.ProgrammingError):
+        connections[0].execute('SELECT 1')
+
+
+def test_atomic_open_keeps_old_file_on_error(quick_fix, tmp_path):
+    target = tmp_path / 'PROJECT_MAP.md'
+    target.write_text('stara mapa', encoding='utf-8')
+    target.chmod(0o640)
+
+    with pytest.raises(RuntimeError):
+        with quick_fix.atomic_open(target) as f:
+            f.write('połowa')
+            raise RuntimeError('błąd renderowania')
+
+    assert target.read_text(encoding='utf-8') == 'stara mapa'
+    assert [p.name for p in tmp_path.iterdir()] == ['PROJECT_MAP.md']
+
+    with quick_fix.atomic_open(target) as f:
+        f.write('nowa mapa')
+    assert target.read_text(encoding='utf-8') == 'nowa mapa'
+    assert target.stat().st_mode & 0o777 == 0o640
+
+
+def test_atomic_open_reports_original_error_when_temp_file_is_gone(quick_fix, tmp_path):
+    target = tmp_path / 'PROJECT_MAP.md'
+
+    with pytest.raises(RuntimeError):
+        with quick_fix.atomic_open(target) as f:
+            [tmp_file] = tmp_path.glob('.PROJECT_MAP.md.*.tmp')
+            tmp_file.unlink()
+            raise RuntimeError('błąd renderowania')
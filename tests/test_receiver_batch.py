@@ -0,0 +1,51 @@
+"""Testy łączenia plików z jednego kliknięcia w paczkę (process_batch) z ultimate-smart-receiver.py."""
+from test_receiver_worker import fast_receiver, wait_for
+
+PIPELINE = ('archive_previous_session', 'cleanup_brain', 'sync_with_supabase', 'create_fresh_brain',
+            'archive_incoming_files')
+BURST = ('claude-artifacts-bundle.json', 'copilot-deployment-instructions.js', 'SUPABASE_SETUP.sql')
+
+
+def test_pipeline_runs_once_per_batch(make_receiver, receiver_module, monkeypatch):
+    receiver = make_receiver()
+    calls = {name: 0 for name in PIPELINE}
+    for name in PIPELINE:
+        monkeypatch.setattr(receiver, name, lambda *args, name=name: calls.__setitem__(name, calls[name] + 1))
+    monkeypatch.setattr(receiver, 'has_active_session', lambda: True)
+    commands = []
+    monkeypatch.setattr(receiver_module.os, 'system', lambda command: commands.append(command) or 0)
+
+    def handle(file_path):
+        # Handlery same otwierają VS Code - w paczce tylko zgłaszają pliki
+        receiver.open_vscode_with_file(file_path)
+        receiver.open_vscode()
+        return True
+    monkeypatch.setattr(receiver, 'process_incoming_file', handle)
+    files = []
+    for name in BURST:
+        files.append(receiver.downloads_dir / name)
+        files[-1].write_text(f'// {name}', encoding='utf-8')
+
+    receiver.process_batch(files)
+
+    assert calls == {name: 1 for name in PIPELINE}
+    assert commands.count('code .') == 1
+    assert [command for command in commands if command != 'code .'] == [f'code "{path}"' for path in files]
+    assert receiver.editor_requests is None
+    assert len(receiver.manifest['bundles']) == 3
+
+
+def test_burst_of_downloads_is_one_batch(make_receiver):
+    receiver = fast_receiver(make_receiver)
+    batches = []
+    receiver.process_batch = batches.append
+    files = [receiver.downloads_dir / name for name in BURST]
+
+    receiver.start_worker()
+    for file_path in files:
+        file_path.write_text('{}', encoding='utf-8')
+        receiver.enqueue_file(file_path, closed=True)
+    assert wait_for(lambda: batches)
+    receiver.stop_worker()
+
+    assert [sorted(batch) for batch in batches] == [sorted(files)]
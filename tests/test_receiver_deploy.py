@@ -0,0 +1,22 @@
+"""Testy atomowego wdrażania plików (deploy_files) z ultimate-smart-receiver.py."""
+import stat
+
+
+def test_deploy_files_keeps_target_mode_and_does_not_touch_umask(receiver_module, make_receiver, monkeypatch):
+    receiver = make_receiver()
+    existing = receiver.project_root / 'scripts' / 'run.sh'
+    existing.parent.mkdir()
+    existing.write_text('echo stary\n', encoding='utf-8')
+    existing.chmod(0o750)
+    new = receiver.project_root / 'lib' / 'new.ts'
+
+    def umask(mask):
+        raise AssertionError('os.umask zmienia stan całego procesu - nie wolno go wołać przy wdrożeniu')
+    monkeypatch.setattr(receiver_module.os, 'umask', umask)
+    failed = receiver.deploy_files([(1, existing, 'echo nowy\n', 'a'), (2, new, 'export {}\n', 'b')])
+
+    assert failed == {}
+    assert existing.read_text(encoding='utf-8') == 'echo nowy\n'
+    assert stat.S_IMODE(existing.stat().st_mode) == 0o750
+    assert stat.S_IMODE(new.stat().st_mode) == receiver.default_file_mode
+    assert list(new.parent.glob('.*.tmp')) == []
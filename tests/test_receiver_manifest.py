@@ -0,0 +1,85 @@
+"""Testy manifestu wdrożeń UltimateSmartReceiver z ultimate-smart-receiver.py."""
+import json
+import os
+from contextlib import redirect_stdout
+
+
+def write_bundle(receiver, text):
+    bundle = receiver.downloads_dir / 'claude-artifacts-bundle.json'
+    bundle.write_text(text, encoding='utf-8')
+    return bundle
+
+
+def bundle_json(content="export const a = 1\n"):
+    return json.dumps({'metadata': {}, 'artifacts': [
+        {'type': 'code_snippet', 'language': 'typescript', 'title': 'a', 'suggestedPath': 'lib/a.ts', 'content': content}]})
+
+
+def run_batch(receiver, bundle):
+    digest = receiver.file_hash(bundle)
+    with open(os.devnull, 'w', encoding='utf-8') as devnull, redirect_stdout(devnull):
+        receiver.process_batch([bundle])
+    return digest
+
+
+def test_successful_deploy_is_recorded(make_receiver):
+    receiver = make_receiver()
+    digest = run_batch(receiver, write_bundle(receiver, bundle_json()))
+
+    assert digest in receiver.load_manifest()['bundles']
+    assert (receiver.project_root / 'lib' / 'a.ts').read_text(encoding='utf-8').endswith("export const a = 1\n")
+
+
+def test_invalid_json_is_not_recorded(make_receiver):
+    receiver = make_receiver()
+    digest = run_batch(receiver, write_bundle(receiver, '{"artifacts": ['))
+
+    assert digest not in receiver.load_manifest()['bundles']
+
+
+def test_declined_auto_deploy_is_not_recorded(make_receiver, monkeypatch):
+    receiver = make_receiver()
+    monkeypatch.setattr(receiver, 'should_auto_deploy', lambda artifacts: False)
+    digest = run_batch(receiver, write_bundle(receiver, bundle_json()))
+
+    assert digest not in receiver.load_manifest()['bundles']
+    assert not (receiver.project_root / 'lib' / 'a.ts').exists()
+
+
+def test_failed_artifact_is_not_recorded(make_receiver, monkeypatch):
+    receiver = make_receiver()
+    monkeypatch.setattr(receiver, 'deploy_files', lambda planned: {i: OSError('dysk pełny') for i, *_ in planned})
+    digest = run_batch(receiver, write_bundle(receiver, bundle_json()))
+
+    assert digest not in receiver.load_manifest()['bundles']
+
+
+def spy_deploy(receiver):
+    """Zapisuje treści przekazywane do deploy_files (None = plik bez zmian)."""
+    contents = []
+    original = receiver.deploy_files
+
+    def deploy_files(planned):
+        contents.extend(content for _, _, content, _ in planned)
+        return original(planned)
+    receiver.deploy_files = deploy_files
+    return contents
+
+
+def test_force_redeploys_recorded_bundle(make_receiver):
+    receiver = make_receiver()
+    digest = run_batch(receiver, write_bundle(receiver, bundle_json()))
+
+    # Bez --force identyczny bundle jest tylko archiwizowany
+    receiver = make_receiver()
+    contents = spy_deploy(receiver)
+    run_batch(receiver, write_bundle(receiver, bundle_json()))
+    assert contents == []
+
+    # --force: bundle przetworzony ponownie, a artefakt zapisany mimo wpisu w manifeście
+    receiver = make_receiver(force=True)
+    receiver.should_auto_deploy = lambda artifacts: True  # konflikt z lib/a.ts - zgoda użytkownika
+    contents = spy_deploy(receiver)
+    run_batch(receiver, write_bundle(receiver, bundle_json()))
+    assert len(contents) == 1 and contents[0].endswith("export const a = 1\n")
+    assert digest in receiver.load_manifest()['bundles']
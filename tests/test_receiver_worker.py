@@ -0,0 +1,70 @@
+"""Testy wątku roboczego (process_events, stop_worker) z ultimate-smart-receiver.py."""
+import threading
+import time
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def fast_receiver(make_receiver):
+    receiver = make_receiver()
+    receiver.POLL_INTERVAL = 0.01
+    receiver.STABLE_SECONDS = 0.05
+    receiver.BATCH_WINDOW = 0.05
+    receiver.EMPTY_FILE_TIMEOUT = 0.2
+    receiver.STOP_TIMEOUT = 0.5
+    return receiver
+
+
+def test_empty_placeholder_is_dropped_and_picked_up_again(make_receiver, receiver_module, monkeypatch):
+    receiver = fast_receiver(make_receiver)
+    # Komunikaty wątku roboczego (capsys.readouterr w pętli gubi zapisy z innego wątku)
+    messages = []
+    monkeypatch.setattr(receiver_module, 'print', lambda *args, **kwargs: messages.append(' '.join(map(str, args))),
+                        raising=False)
+    batches = []
+    receiver.process_batch = batches.append
+    bundle = receiver.downloads_dir / 'claude-artifacts-bundle.json'
+    bundle.write_bytes(b'')
+
+    receiver.start_worker()
+    receiver.enqueue_file(bundle, closed=True)
+    assert wait_for(lambda: any('pomijam do kolejnej zmiany' in message for message in messages))
+
+    # Przeglądarka podmienia placeholder gotowym plikiem - zdarzenie zmiany nazwy
+    bundle.write_text('{"artifacts": []}', encoding='utf-8')
+    receiver.enqueue_file(bundle, closed=True)
+    assert wait_for(lambda: batches)
+    receiver.stop_worker()
+
+    assert batches == [[bundle]]
+
+
+def test_stop_worker_does_not_hang_on_blocked_batch(make_receiver):
+    receiver = fast_receiver(make_receiver)
+    started, release = threading.Event(), threading.Event()
+
+    def blocked_batch(file_paths):
+        started.set()
+        release.wait(10)  # jak input() czekające na odpowiedź użytkownika
+    receiver.process_batch = blocked_batch
+    bundle = receiver.downloads_dir / 'claude-artifacts-bundle.json'
+    bundle.write_text('{}', encoding='utf-8')
+
+    receiver.start_worker()
+    worker = receiver.worker
+    receiver.enqueue_file(bundle, closed=True)
+    assert started.wait(5)
+
+    begin = time.monotonic()
+    receiver.stop_worker()
+    assert time.monotonic() - begin < 5
+    assert receiver.worker is None and worker.daemon
+    release.set()
+    worker.join(5)
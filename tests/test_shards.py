@@ -0,0 +1,79 @@
+"""Testy podziału analizy na części (--shard) i ich scalania (--merge-shards)."""
+import json
+from contextlib import redirect_stdout
+from io import StringIO
+
+import pytest
+
+
+@pytest.fixture
+def project(tmp_path):
+    for i in range(12):
+        folder = tmp_path / ('src' if i % 2 else 'lib')
+        folder.mkdir(exist_ok=True)
+        (folder / f'm{i}.js').write_text(
+            f"import {{ x }} from './m{(i + 2) % 12}';\nexport function f{i}() {{}}\n", encoding='utf-8')
+    return tmp_path
+
+
+def make_brain(auto_update, root, **kwargs):
+    with redirect_stdout(StringIO()):
+        return auto_update.UniversalAIBrain(project_root=root, analysis_cache=False, jobs=1, **kwargs)
+
+
+def run_shards(auto_update, root, count, by='hash'):
+    shard_files = []
+    for index in range(1, count + 1):
+        brain = make_brain(auto_update, root, shard=(index, count), shard_by=by)
+        with redirect_stdout(StringIO()):
+            shard_files.append(brain.generate_shard(verbose=False))
+    return shard_files
+
+
+def state_files(root):
+    with open(root / '.ai-brain' / 'CURRENT_STATE.json', 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_shard_of_is_stable_and_in_range(auto_update):
+    shard_of = auto_update.UniversalAIBrain.shard_of
+    assert shard_of('src\\a.js', 4) == shard_of('src/a.js', 4)
+    assert {shard_of(f'src/{i}.js', 4) for i in range(200)} == {1, 2, 3, 4}
+    assert len({shard_of(f'src/{i}.js', 4, by='dir') for i in range(50)}) == 1
+
+
+@pytest.mark.parametrize('by', ['hash', 'dir'])
+def test_merged_shards_match_full_scan(auto_update, project, by):
+    with redirect_stdout(StringIO()):
+        make_brain(auto_update, project).write_project_map(
+            make_brain(auto_update, project).build_project_graph(verbose=False), verbose=False)
+    full = state_files(project)
+    assert len(full['files']) == 12 and full['connections']
+
+    shard_files = run_shards(auto_update, project, 3, by)
+    partials = [json.loads(path.read_text(encoding='utf-8'))['files'] for path in shard_files]
+    assert sum(len(files) for files in partials) == len(full['files'])
+
+    # Kolejność plików części nie wpływa na wynik
+    with redirect_stdout(StringIO()):
+        make_brain(auto_update, project).merge_shards(list(reversed(shard_files)), verbose=False)
+    merged = state_files(project)
+
+    assert list(merged['files']) == sorted(full['files'])
+    assert merged['files'] == full['files']
+    assert merged['connections'] == full['connections']
+    assert merged['reverse_deps'] == full['reverse_deps']
+
+
+def test_merge_rejects_mixed_layouts(auto_update, project):
+    shard_files = run_shards(auto_update, project, 2)[:1] + run_shards(auto_update, project, 3)[:1]
+    with pytest.raises(ValueError):
+        make_brain(auto_update, project).merge_shards(shard_files, verbose=False)
+
+
+def test_merge_warns_about_missing_parts(auto_update, project):
+    shard_files = run_shards(auto_update, project, 3)
+    output = StringIO()
+    with redirect_stdout(output):
+        make_brain(auto_update, project).merge_shards(shard_files[1:], verbose=False)
+    assert 'Brak części: [1]' in output.getvalue()
@@ -0,0 +1,79 @@
+"""Testy parsera migracji SQL (iter_sql_statements, extract_sql_schema, build_schema_catalog)."""
+
+
+def test_statements_skip_comments_strings_and_dollar_bodies(auto_update):
+    content = (
+        "-- nagłówek; z średnikiem\n"
+        "CREATE TABLE a (id int); /* blok; */\n"
+        "\n"
+        "INSERT INTO a VALUES ('x;y');\n"
+        "CREATE FUNCTION f() RETURNS void AS $body$ BEGIN; END; $body$ LANGUAGE plpgsql;\n"
+        "SELECT 1"
+    )
+    assert list(auto_update.iter_sql_statements(content)) == [
+        (2, 'CREATE TABLE a (id int)'),
+        (4, "INSERT INTO a VALUES ('x;y')"),
+        (5, 'CREATE FUNCTION f() RETURNS void AS $$...$$ LANGUAGE plpgsql'),
+        (6, 'SELECT 1'),
+    ]
+
+
+def test_sql_name_normalization(auto_update):
+    assert auto_update.sql_name('Public.Users') == 'users'
+    assert auto_update.sql_name('"MixedCase"') == 'MixedCase'
+    assert auto_update.sql_name('auth."Users"') == 'auth.Users'
+
+
+def test_extract_schema_operations(auto_update):
+    content = """
+CREATE TABLE IF NOT EXISTS public.profiles (
+    id uuid PRIMARY KEY REFERENCES auth.users(id),
+    price numeric(10, 2) NOT NULL DEFAULT 0,
+    CONSTRAINT price_positive CHECK (price >= 0)
+);
+ALTER TABLE profiles ADD COLUMN bio text, DROP COLUMN IF EXISTS legacy, ENABLE ROW LEVEL SECURITY;
+ALTER TABLE profiles RENAME COLUMN bio TO about;
+CREATE UNIQUE INDEX profiles_price_idx ON profiles USING btree (price);
+CREATE POLICY "Own rows" ON profiles FOR select USING (auth.uid() = id);
+CREATE TRIGGER touch BEFORE UPDATE ON profiles FOR EACH ROW EXECUTE FUNCTION touch_updated();
+GRANT ALL ON profiles TO anon;
+"""
+    ops = auto_update.extract_sql_schema(content)
+    assert [op['op'] for op in ops] == [
+        'create_table', 'add_column', 'drop_column', 'rls', 'rename_column',
+        'create_index', 'create_policy', 'create_trigger']
+    create = ops[0]
+    assert (create['table'], create['if_not_exists'], create['line']) == ('profiles', True, 2)
+    assert create['columns'] == [['id', 'uuid'], ['price', 'numeric(10, 2)']]
+    assert ops[1] == {'op': 'add_column', 'table': 'profiles', 'column': 'bio', 'type': 'text'}
+    assert ops[4]['new_name'] == 'about'
+    assert (ops[5]['name'], ops[5]['columns'], ops[5]['unique']) == ('profiles_price_idx', 'price', True)
+    assert (ops[6]['name'], ops[6]['command']) == ('Own rows', 'SELECT')
+    assert (ops[7]['timing'], ops[7]['events'], ops[7]['function']) == ('BEFORE', 'UPDATE', 'touch_updated')
+
+
+def test_catalog_applies_migrations_in_name_order(auto_update):
+    def migration(content):
+        return {'sql': auto_update.extract_sql_schema(content)}
+
+    all_files = {
+        'supabase/migrations/002_alter.sql': migration(
+            'ALTER TABLE items ADD COLUMN price int; ALTER TABLE items ALTER COLUMN price TYPE bigint;'
+            'CREATE INDEX ON items (price); DROP TABLE old;'),
+        'supabase/migrations/001_init.sql': migration(
+            'CREATE TABLE items (id int); CREATE TABLE old (id int);'
+            'CREATE FUNCTION f(a int) RETURNS int AS $$ SELECT a $$ LANGUAGE sql;'),
+        'supabase/migrations/003_rename.sql': migration(
+            'ALTER TABLE items RENAME TO products; DROP FUNCTION f;'),
+        'src/seed.sql': migration('CREATE TABLE ignored (id int);'),
+    }
+    catalog = auto_update.build_schema_catalog(all_files)
+
+    assert catalog['migrations'] == 3
+    assert list(catalog['tables']) == ['products']
+    products = catalog['tables']['products']
+    assert products['columns'] == {'id': 'int', 'price': 'bigint'}
+    assert products['indexes'] == ['items(price)']
+    assert products['defined_in'] == 'supabase/migrations/001_init.sql:1'
+    assert products['changed_in'] == 'supabase/migrations/002_alter.sql'
+    assert catalog['functions'] == {}
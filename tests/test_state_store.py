@@ -0,0 +1,25 @@
+"""Testy magazynu stanu SQLite (SQLiteStateStore) z .ai-brain/auto-update.py."""
+import os
+
+import pytest
+
+
+@pytest.fixture
+def store(auto_update, tmp_path):
+    store = auto_update.SQLiteStateStore(tmp_path / 'CURRENT_STATE.sqlite')
+    with store.conn:
+        for path in ('app/page.tsx', 'app/api/route.ts', 'apple/pie.ts', 'app.ts', 'lib/api.ts'):
+            store.upsert_file({'file': os.path.join(*path.split('/')), 'lines': 1})
+    yield store
+    store.close()
+
+
+@pytest.mark.parametrize('prefix', ['app', 'app/', os.path.join('app', '')])
+def test_iter_files_prefix_is_a_directory(store, prefix):
+    assert [info['file'] for info in store.iter_files(prefix)] == [
+        os.path.join('app', 'api', 'route.ts'), os.path.join('app', 'page.tsx')]
+
+
+@pytest.mark.parametrize('prefix', ['', '.'])
+def test_iter_files_without_prefix_returns_everything(store, prefix):
+    assert len(list(store.iter_files(prefix))) == 5
@@ -0,0 +1,51 @@
+"""Testy trybu potokowego (--stream) w .ai-brain/auto-update.py."""
+import os
+from contextlib import redirect_stdout
+
+import pytest
+
+
+@pytest.fixture
+def project(tmp_path):
+    for folder in ('app', 'lib'):
+        (tmp_path / folder).mkdir()
+    (tmp_path / 'lib' / 'api.ts').write_text("export function fetchMasses() {}\n", encoding='utf-8')
+    (tmp_path / 'lib' / 'old.ts').write_text("export const OLD = 1\n", encoding='utf-8')
+    (tmp_path / 'app' / 'page.tsx').write_text(
+        "import { fetchMasses } from '../lib/api'\nexport default function Page() {}\n", encoding='utf-8')
+    return tmp_path
+
+
+def make_brain(auto_update, root, **kwargs):
+    with open(os.devnull, 'w', encoding='utf-8') as devnull, redirect_stdout(devnull):
+        return auto_update.UniversalAIBrain(project_root=root, analysis_cache=False, **kwargs)
+
+
+def stream_run(auto_update, root):
+    brain = make_brain(auto_update, root, state_backend='sqlite', stream=2)
+    files = brain.stream_project_graph(verbose=False)
+    return brain, {path: info for path, info in files.items()}
+
+
+def test_stream_matches_batch_records(auto_update, project):
+    batch = make_brain(auto_update, project).build_project_graph(verbose=False)
+    brain, streamed = stream_run(auto_update, project)
+
+    assert streamed == batch
+    # Zimny start: delta to same liczniki, bez list plików i symboli
+    assert brain.changes['delta'] == {'added': 3, 'modified': 0, 'removed': 0}
+
+
+def test_stream_delta_against_stored_state(auto_update, project):
+    stream_run(auto_update, project)
+    (project / 'lib' / 'api.ts').write_text("export function fetchMasses() {}\nexport function cancel() {}\n",
+                                            encoding='utf-8')
+    (project / 'lib' / 'old.ts').unlink()
+
+    brain, streamed = stream_run(auto_update, project)
+    delta = brain.changes['delta']
+
+    assert sorted(streamed) == [os.path.join('app', 'page.tsx'), os.path.join('lib', 'api.ts')]
+    assert [d['file'] for d in delta['modified']] == [os.path.join('lib', 'api.ts')]
+    assert [d['file'] for d in delta['removed']] == [os.path.join('lib', 'old.ts')]
+    assert [s['name'] for s in delta['symbols_added']] == ['cancel']
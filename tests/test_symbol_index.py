@@ -0,0 +1,44 @@
+"""Testy indeksu symboli (SymbolIndex, symbol_match_score) z .ai-brain/auto-update.py."""
+import pytest
+
+
+def file_info(path, *names):
+    return {'file': path, 'functions': [{'name': name, 'line': i + 1} for i, name in enumerate(names)],
+            'fingerprint': {'size': len(names), 'mtime_ns': 1}}
+
+
+@pytest.fixture
+def index(auto_update, tmp_path):
+    index = auto_update.SymbolIndex(tmp_path / 'SYMBOLS.sqlite')
+    yield index
+    index.close()
+
+
+def test_match_score_tiers(auto_update):
+    score = auto_update.symbol_match_score
+    assert [score('useMass', name) for name in
+            ('useMass', 'useMassList', 'UseMassIntentionService', 'oldUseMass', 'useMyAss', 'other')] == \
+        [0, 1, 1, 3, 4, None]
+    assert score('mis', 'MassIntentionService') == 2
+
+
+def test_prefix_search_orders_exact_first(index):
+    index.sync({'a.ts': file_info('a.ts', 'useMassList', 'useMass', 'Other')})
+    assert [s['name'] for s in index.find('usemass')] == ['useMass', 'useMassList']
+
+
+def test_fuzzy_keeps_exact_match_beyond_candidate_cap(index):
+    # 6000 nazw pasujących do LIKE '%m%a%s%s%' jest wstawionych przed dokładnym trafieniem
+    noise = [f'myAssistant{i}' for i in range(6000)]
+    index.sync({'noise.ts': file_info('noise.ts', *noise)})
+    index.sync({'noise.ts': file_info('noise.ts', *noise), 'mass.ts': file_info('mass.ts', 'Mass', 'massCount')})
+
+    found = index.find('mass', limit=3, fuzzy=True)
+
+    assert [(s['name'], s['file'], s['line']) for s in found] == [
+        ('Mass', 'mass.ts', 1), ('massCount', 'mass.ts', 2), ('myAssistant0', 'noise.ts', 1)]
+
+
+def test_fuzzy_fallback_when_no_prefix_match(index):
+    index.sync({'svc.ts': file_info('svc.ts', 'MassIntentionService', 'mapItems')})
+    assert [s['name'] for s in index.find('mis')] == ['MassIntentionService', 'mapItems']
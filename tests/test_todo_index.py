@@ -0,0 +1,38 @@
+"""Testy notatek TODO/FIXME (extract_todos, TodoIndex) z .ai-brain/auto-update.py."""
+import os
+from contextlib import redirect_stdout
+
+
+def test_extract_todos_line_numbers(auto_update):
+    content = "# TODO: pierwsza\nx = 1\n\n// fixme druga\n/* TODO trzecia */\n"
+    assert auto_update.extract_todos(content) == [
+        {'type': 'TODO', 'text': 'pierwsza', 'line': 1},
+        {'type': 'FIXME', 'text': 'druga', 'line': 4},
+        {'type': 'TODO', 'text': 'trzecia */', 'line': 5},
+    ]
+    assert auto_update.extract_todos("bez notatek\n") == []
+
+
+def test_first_seen_survives_moves_and_reruns(auto_update, tmp_path):
+    source = tmp_path / 'service.ts'
+    source.write_text("// TODO: walidacja\nexport function save() {}\n", encoding='utf-8')
+    with open(os.devnull, 'w', encoding='utf-8') as devnull, redirect_stdout(devnull):
+        brain = auto_update.UniversalAIBrain(project_root=tmp_path, analysis_cache=False)
+    index = auto_update.TodoIndex(tmp_path / 'TODOS.sqlite')
+    try:
+        assert index.sync(brain.build_project_graph(verbose=False), now=100.0) == 1
+
+        # Notatka przesunięta o dwie linie i nowa notatka w tym samym pliku
+        source.write_text("import x from './x'\n\n// TODO: walidacja\nexport function save() {}\n"
+                          "// FIXME: obsługa błędów\n", encoding='utf-8')
+        st = source.stat()
+        os.utime(source, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        all_files = brain.build_project_graph(verbose=False)
+        assert index.sync(all_files, now=200.0) == 1
+        assert index.sync(all_files, now=300.0) == 0  # odcisk bez zmian - plik pominięty
+
+        assert [(t['text'], t['line'], t['first_seen']) for t in index.oldest()] == [
+            ('walidacja', 3, 100.0), ('obsługa błędów', 5, 200.0)]
+        assert [t['text'] for t in index.oldest(limit=1)] == ['walidacja']
+    finally:
+        index.close()
@@ -0,0 +1,53 @@
+"""Testy budżetu tokenów PROJECT_MAP.md z .ai-brain/auto-update.py."""
+import os
+import re
+from contextlib import redirect_stdout
+from io import StringIO
+
+
+def make_project(root):
+    for folder in ('lib', 'components', 'services'):
+        (root / folder).mkdir()
+        for i in range(30):
+            functions = ''.join(f"export function {folder}Helper{i}_{j}() {{}}\n" for j in range(6))
+            (root / folder / f"{folder}{i}.ts").write_text(functions, encoding='utf-8')
+
+
+def generate(auto_update, root, **kwargs):
+    out = StringIO()
+    with redirect_stdout(out):
+        brain = auto_update.UniversalAIBrain(project_root=root, ai_type='claude', analysis_cache=False, **kwargs)
+        brain.generate_project_map(verbose=True)
+    return brain, (root / '.ai-brain' / 'PROJECT_MAP.md').read_text(encoding='utf-8'), out.getvalue()
+
+
+def test_truncated_map_lists_omitted_folders(auto_update, tmp_path):
+    make_project(tmp_path)
+
+    brain, text, output = generate(auto_update, tmp_path, token_budget=1500)
+
+    truncation = brain.map_truncation
+    assert 0 < truncation['shown'] < truncation['total'] == 90
+    assert sum(truncation['omitted'].values()) == truncation['total'] - truncation['shown']
+    assert '## ✂️ POMINIĘTE PRZEZ BUDŻET TOKENÓW' in text
+    for folder, count in truncation['omitted'].items():
+        assert f"- {folder}/ - {count} plików" in text
+    assert re.search(rf"w mapie {truncation['shown']} z 90 plików", output)
+    assert auto_update.estimate_tokens(text) <= 1500 * 1.1
+
+
+def test_budget_zero_renders_full_map(auto_update, tmp_path):
+    make_project(tmp_path)
+
+    brain, text, output = generate(auto_update, tmp_path, token_budget=0)
+
+    assert brain.token_budget is None and brain.map_truncation is None
+    assert 'POMINIĘTE' not in text and '✂️' not in output
+    assert all(f"{folder}{i}.ts" in text for folder in ('lib', 'components', 'services') for i in range(30))
+
+
+def test_default_budget_depends_on_ai(auto_update, tmp_path):
+    with redirect_stdout(StringIO()):
+        assert auto_update.UniversalAIBrain(project_root=tmp_path, ai_type='claude').token_budget == 60000
+        assert auto_update.UniversalAIBrain(project_root=tmp_path, ai_type='universal').token_budget is None
+        assert auto_update.UniversalAIBrain(project_root=tmp_path, ai_type='chatgpt', token_budget=5000).token_budget == 5000
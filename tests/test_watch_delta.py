@@ -0,0 +1,81 @@
+"""Testy delty trybu obserwacji (refresh_paths i _rescan) z .ai-brain/auto-update.py."""
+import os
+from contextlib import redirect_stdout
+
+import pytest
+
+
+@pytest.fixture
+def project(auto_update, tmp_path):
+    (tmp_path / 'lib').mkdir()
+    (tmp_path / 'lib' / 'keep.ts').write_text("export function keep() {}\n", encoding='utf-8')
+    (tmp_path / 'lib' / 'edit.ts').write_text("export function before() {}\n", encoding='utf-8')
+    (tmp_path / 'lib' / 'gone.ts').write_text("export function gone() {}\n", encoding='utf-8')
+    with open(os.devnull, 'w', encoding='utf-8') as devnull, redirect_stdout(devnull):
+        brain = auto_update.UniversalAIBrain(project_root=tmp_path, analysis_cache=False)
+        all_files = brain.build_project_graph(verbose=False)
+    brain.changes = {'baseline': True, 'files': {}}
+    return brain, all_files
+
+
+def change_tree(root):
+    (root / 'lib' / 'edit.ts').write_text("export function after() {}\n// nowa linia\n", encoding='utf-8')
+    (root / 'lib' / 'gone.ts').unlink()
+    (root / 'lib' / 'new.ts').write_text("export function added() {}\n", encoding='utf-8')
+
+
+def assert_delta(auto_update, brain, all_files):
+    delta = auto_update.compute_state_delta(brain.changes['files'], all_files)
+    assert [d['file'] for d in delta['added']] == [os.path.join('lib', 'new.ts')]
+    assert [d['file'] for d in delta['modified']] == [os.path.join('lib', 'edit.ts')]
+    assert [d['file'] for d in delta['removed']] == [os.path.join('lib', 'gone.ts')]
+    assert sorted(s['name'] for s in delta['symbols_added']) == ['added', 'after']
+    assert sorted(s['name'] for s in delta['symbols_removed']) == ['before', 'gone']
+
+
+def test_refresh_paths_records_delta(auto_update, project):
+    brain, all_files = project
+    change_tree(brain.root)
+
+    changed = brain.refresh_paths(all_files, [brain.root / 'lib' / name for name in ('edit.ts', 'gone.ts', 'new.ts')])
+
+    assert changed == 3
+    assert_delta(auto_update, brain, all_files)
+
+
+def test_rescan_records_delta(auto_update, project):
+    brain, all_files = project
+    change_tree(brain.root)
+
+    all_files, changed = brain._rescan(all_files)
+
+    assert changed == 3
+    assert os.path.join('lib', 'keep.ts') not in brain.changes['files']
+    assert_delta(auto_update, brain, all_files)
+
+
+def test_compute_state_delta_skips_touch_and_reports_imports(auto_update):
+    old = {'file': 'e.ts', 'lines': 3, 'imports': ['./a', './b'], 'fingerprint': {'mtime_ns': 1}}
+    touched = dict(old, fingerprint={'mtime_ns': 2})
+    edited = dict(old, imports=['./b', './c'], fingerprint={'mtime_ns': 3})
+
+    delta = auto_update.compute_state_delta({'t.ts': old, 'e.ts': old, 'x.ts': None},
+                                            {'t.ts': touched, 'e.ts': edited})
+
+    assert delta['modified'] == [{'file': 'e.ts', 'lines': (3, 3)}]
+    assert delta['imports'] == [{'file': 'e.ts', 'added': ['./c'], 'removed': ['./a']}]
+    assert delta['added'] == delta['removed'] == []
+
+
+def test_first_run_delta_keeps_only_counts(auto_update, tmp_path):
+    changed = {'a.ts': None, 'b.ts': None, 'broken.ts': None}
+    delta = auto_update.compute_state_delta(changed, {'a.ts': {'file': 'a.ts'}, 'b.ts': {'file': 'b.ts'}},
+                                            baseline=False)
+    assert delta == {'added': 2, 'modified': 0, 'removed': 0}
+
+    (tmp_path / 'a.ts').write_text("export function a() {}\n", encoding='utf-8')
+    with open(os.devnull, 'w', encoding='utf-8') as devnull, redirect_stdout(devnull):
+        brain = auto_update.UniversalAIBrain(project_root=tmp_path, analysis_cache=False)
+        brain.write_project_map(brain.build_project_graph(verbose=False), verbose=False)
+    text = (tmp_path / '.ai-brain' / 'PROJECT_DELTA.md').read_text(encoding='utf-8')
+    assert '**➕ Dodane:** 1 ' in text and 'Pierwsza analiza' in text
@@ -9,6 +9,13 @@ import json
 import time
 import shutil
 import re
+import queue
+import argparse
+import hashlib
+import stat
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
@@ -28,18 +35,213 @@ except ImportError:
     REQUESTS_AVAILABLE = False
     print("⚠️  requests nie jest zainstalowany. Uruchom: pip install requests")
 
+class _JsonCursor:
+    """Okno na plik JSON czytany kawałkami"""
+    WHITESPACE = re.compile(r'[ \t\n\r]*')
+    PLAIN = re.compile(r'[^"\[\]{}]*')
+    NUMBER_CHARS = frozenset('0123456789.eE+-')
+    # Błąd dalej niż tyle znaków od końca okna nie wynika z ucięcia (najdłuższy token: 'false', '\\uXXXX')
+    TRUNCATION_MARGIN = 6
+    decoder = json.JSONDecoder()
+
+    def __init__(self, f, chunk_size):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+
+    def fill(self):
+        """Doczytaj kolejny kawałek (rośnie razem z oknem - duża wartość to liniowy, nie kwadratowy koszt)"""
+        chunk = self.f.read(max(self.chunk_size, len(self.buf)))
+        if not chunk:
+            return False
+        self.buf += chunk
+        return True
+
+    def release(self):
+        """Zwolnij przeczytaną część okna"""
+        if self.pos >= self.chunk_size:
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+
+    def error(self, message):
+        raise json.JSONDecodeError(message, self.buf, self.pos)
+
+    def peek(self):
+        """Pomiń białe znaki i zwróć następny znak ('' na końcu pliku)"""
+        while True:
+            self.pos = self.WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return ''
+
+    def expect(self, chars):
+        char = self.peek()
+        if not char or char not in chars:
+            self.error(f"Expecting {' or '.join(repr(c) for c in chars)}")
+        self.pos += 1
+        return char
+
+    def value(self):
+        """Zdekoduj następną wartość JSON (ucięta na końcu okna - doczytaj i spróbuj ponownie)
+        
+        Błąd w środku okna to uszkodzony plik - zgłaszany od razu, bez doczytywania reszty.
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError as e:
+                truncated = (e.msg.startswith('Unterminated string')
+                             or e.pos >= len(self.buf) - self.TRUNCATION_MARGIN)
+                if truncated and self.fill():
+                    continue
+                raise
+            # Liczba ucięta na końcu okna ("12" z "125", "-2." z "-2.5") ma dalszy ciąg w pliku
+            if (end < len(self.buf) and self.buf[end] not in self.NUMBER_CHARS) or not self.fill():
+                break
+        self.pos = end
+        return value
+
+    def skip_value(self):
+        """Przeskocz wartość JSON bez budowania jej w pamięci - tablice i obiekty znak po znaku,
+        pojedyncze napisy dekodowane i od razu porzucane, przeczytana część okna zwalniana na bieżąco
+        """
+        char = self.peek()
+        if not char or char not in '{[':
+            self.value()
+            return
+        
+        depth = 0
+        while True:
+            self.pos = self.PLAIN.match(self.buf, self.pos).end()
+            if self.pos == len(self.buf):
+                self.release()
+                if not self.fill():
+                    self.error("Unexpected end of data")
+                continue
+            char = self.buf[self.pos]
+            if char == '"':
+                self.value()
+                self.release()
+                continue
+            depth += 1 if char in '{[' else -1
+            self.pos += 1
+            if depth == 0:
+                return
+
+    def keys(self):
+        """Klucze obiektu JSON - po każdym kluczu kursor stoi na jego wartości, którą trzeba przeczytać"""
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            if self.peek() != '"':
+                self.error("Expecting property name enclosed in double quotes")
+            key = self.value()
+            self.expect(':')
+            yield key
+            if self.expect(',}') == '}':
+                return
+
+class ArtifactBundleReader:
+    """Przyrostowy czytnik bundle artefaktów
+    
+    Plik jest czytany kawałkami: artifacts() zwraca elementy tablicy `artifacts` po jednym
+    (i po drodze zapamiętuje `metadata` w bundle_metadata), a metadata() czyta samo `metadata`,
+    przeskakując artefakty bez budowania ich w pamięci. W pamięci jest tylko bieżący artefakt,
+    nie cały bundle.
+    """
+    CHUNK_SIZE = 1 << 20
+
+    def __init__(self, path, chunk_size=CHUNK_SIZE):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.bundle_metadata = {}
+
+    def metadata(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            cursor = _JsonCursor(f, self.chunk_size)
+            for key in cursor.keys():
+                if key == 'metadata':
+                    return cursor.value()
+                cursor.skip_value()
+                cursor.release()
+        return {}
+
+    def artifacts(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            cursor = _JsonCursor(f, self.chunk_size)
+            for key in cursor.keys():
+                if key == 'metadata':
+                    self.bundle_metadata = cursor.value()
+                    continue
+                if key != 'artifacts' or cursor.peek() != '[':
+                    cursor.skip_value()
+                    cursor.release()
+                    continue
+                
+                cursor.expect('[')
+                if cursor.peek() == ']':
+                    cursor.pos += 1
+                    continue
+                while True:
+                    yield cursor.value()
+                    cursor.release()
+                    if cursor.expect(',]') == ']':
+                        break
+
 class UltimateSmartReceiver:
-    def __init__(self):
+    # Pliki tymczasowe przeglądarek - właściwa nazwa pojawia się dopiero po zakończeniu pobierania
+    TEMP_SUFFIXES = ('.crdownload', '.part', '.partial', '.download', '.tmp')
+    # Plik bez zdarzenia zamknięcia uznajemy za kompletny, gdy rozmiar i mtime nie zmieniają się przez ten czas
+    STABLE_SECONDS = 0.5
+    POLL_INTERVAL = 0.1
+    # Pliki kompletne w odstępie do BATCH_WINDOW od ostatniego zdarzenia tworzą jedną paczkę (jedno kliknięcie),
+    # ale paczka nie czeka dłużej niż MAX_BATCH_WAIT na pliki, które wciąż się zapisują
+    BATCH_WINDOW = 1.0
+    MAX_BATCH_WAIT = 5.0
+    # Pusty plik (placeholder przeglądarki), który tyle czasu nie dostał treści, przestaje być śledzony -
+    # gdy przeglądarka podmieni go gotowym plikiem, zdarzenie zmiany nazwy doda go ponownie
+    EMPTY_FILE_TIMEOUT = 30.0
+    # Tyle czeka stop_worker na wątek roboczy (np. stojący na input() w trakcie paczki)
+    STOP_TIMEOUT = 10.0
+    # Liczba wątków zapisujących artefakty podczas auto-deploymentu
+    DEPLOY_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+    # Bundle większy niż STREAM_BUNDLE_BYTES jest czytany strumieniowo i wdrażany paczkami
+    # (do DEPLOY_BATCH artefaktów albo DEPLOY_BATCH_BYTES treści naraz)
+    STREAM_BUNDLE_BYTES = 32 * 1024 * 1024
+    DEPLOY_BATCH = 64
+    DEPLOY_BATCH_BYTES = 16 * 1024 * 1024
+
+    def __init__(self, force=False):
         self.project_root = Path.cwd()
         self.downloads_dir = Path.home() / 'Downloads'
         self.brain_dir = self.project_root / '.copilot-brain'
         self.history_dir = self.brain_dir / 'history'
         self.supabase_dir = self.brain_dir / 'supabase'
+        self.deploy_dir = self.brain_dir / 'deploy'
         
         # Stwórz strukturę folderów
         self.brain_dir.mkdir(exist_ok=True)
         self.history_dir.mkdir(exist_ok=True) 
         self.supabase_dir.mkdir(exist_ok=True)
+        self.deploy_dir.mkdir(exist_ok=True)
+        
+        # Manifest wdrożeń: ścieżka -> hash treści artefaktu, hash -> przetworzony plik źródłowy
+        self.manifest_file = self.deploy_dir / 'manifest.json'
+        self.manifest = self.load_manifest()
+        # Hash pliku źródłowego przetwarzanego w tej chwili (zapisywany przy wdrożonych plikach)
+        self.source_hash = None
+        # Wymuś ponowne przetworzenie i wdrożenie mimo wpisów w manifeście
+        self.force = force
+        # Domyślne uprawnienia nowych plików (jak przy open(..., 'w')). umask da się odczytać tylko
+        # przez jego ustawienie, a to zmienia stan całego procesu - robimy to raz, przed startem wątków
+        umask = os.umask(0)
+        os.umask(umask)
+        self.default_file_mode = 0o666 & ~umask
         
         # Konfiguracja Supabase
         self.supabase_url = os.getenv('NEXT_PUBLIC_SUPABASE_URL', '')
@@ -59,6 +261,12 @@ class UltimateSmartReceiver:
             'claude-artifacts-all.txt'
         ]
         
+        # Kolejka zdarzeń od obserwatora - przetwarza je jeden wątek roboczy
+        self.events = queue.Queue()
+        self.worker = None
+        # W trakcie paczki: pliki do otwarcia w VS Code (None = sam projekt); poza paczką None
+        self.editor_requests = None
+        
         # Ulepszone mapowanie dla Next.js
         self.type_folders = {
             # Database & Supabase
@@ -118,7 +326,8 @@ class UltimateSmartReceiver:
             print("🔧 Zainstaluj: pip install watchdog")
             return
         
-        # Rozpocznij watch
+        # Rozpocznij watch - obserwator tylko kolejkuje, przetwarzanie w wątku roboczym
+        self.start_worker()
         event_handler = SmartWatcher(self)
         observer = Observer()
         observer.schedule(event_handler, str(self.downloads_dir), recursive=False)
@@ -144,6 +353,95 @@ class UltimateSmartReceiver:
             print("\n👋 Smart monitoring zatrzymany")
         
         observer.join()
+        self.stop_worker()
+    
+    def is_watched_file(self, file_path):
+        """Czy to nasz plik (a nie plik tymczasowy przeglądarki w trakcie pobierania)"""
+        name = file_path.name
+        if name.lower().endswith(self.TEMP_SUFFIXES):
+            return False
+        return any(pattern in name for pattern in self.watch_patterns)
+    
+    def enqueue_file(self, file_path, closed=False):
+        """Wywoływane z wątku obserwatora - tylko dodaje zdarzenie do kolejki, nigdy nie blokuje"""
+        self.events.put((file_path, closed))
+    
+    def start_worker(self):
+        """Uruchamia wątek roboczy przetwarzający kompletne pliki"""
+        self.worker = threading.Thread(target=self.process_events, name='smart-receiver-worker', daemon=True)
+        self.worker.start()
+    
+    def stop_worker(self):
+        """Kończy wątek roboczy po dokończeniu bieżącego pliku (czeka najwyżej STOP_TIMEOUT)"""
+        if self.worker:
+            self.events.put(None)
+            self.worker.join(self.STOP_TIMEOUT)
+            if self.worker.is_alive():
+                # Wątek jest demonem - zakończy się razem z programem
+                print(f"⚠️  Przetwarzanie nie zakończyło się w {self.STOP_TIMEOUT:.0f}s (czeka na odpowiedź?) - przerywam")
+            self.worker = None
+    
+    def next_events(self, timeout):
+        """Zdarzenia z kolejki: na pierwsze czeka najwyżej timeout (None = bez limitu), resztę zbiera od razu"""
+        items = []
+        try:
+            items.append(self.events.get(timeout=timeout))
+            while True:
+                items.append(self.events.get_nowait())
+        except queue.Empty:
+            pass
+        return items
+    
+    def process_events(self):
+        """Pętla wątku roboczego: czeka, aż pliki będą kompletne, i przetwarza je paczkami.
+        
+        Plik jest kompletny po zdarzeniu zamknięcia po zapisie / zmianie nazwy z pliku tymczasowego,
+        albo gdy jego rozmiar i mtime są stałe przez STABLE_SECONDS. Kompletne pliki czekają
+        BATCH_WINDOW na kolejne z tego samego kliknięcia i trafiają razem do process_batch.
+        Pusty plik bez zmian przez EMPTY_FILE_TIMEOUT jest porzucany.
+        """
+        pending = {}  # ścieżka -> {'size', 'mtime', 'since', 'closed'}
+        ready = []
+        first_ready = last_event = 0.0
+        while True:
+            for item in self.next_events(self.POLL_INTERVAL if pending or ready else None):
+                if item is None:
+                    if ready:
+                        self.process_batch(ready)
+                    return
+                last_event = time.monotonic()
+                file_path, closed = item
+                if file_path in ready:
+                    continue
+                if file_path not in pending:
+                    print(f"\n🔔 Wykryto enhanced plik: {file_path.name}")
+                    pending[file_path] = {'size': None, 'mtime': None, 'since': 0.0, 'closed': False}
+                pending[file_path]['closed'] |= closed
+            
+            now = time.monotonic()
+            for file_path, entry in list(pending.items()):
+                try:
+                    st = file_path.stat()
+                except OSError:
+                    del pending[file_path]  # plik zniknął (np. przemianowany przez przeglądarkę)
+                    continue
+                if (st.st_size, st.st_mtime_ns) != (entry['size'], entry['mtime']):
+                    entry['size'], entry['mtime'], entry['since'] = st.st_size, st.st_mtime_ns, now
+                    if not entry['closed']:
+                        continue  # nadal rośnie
+                if st.st_size > 0 and (entry['closed'] or now - entry['since'] >= self.STABLE_SECONDS):
+                    del pending[file_path]
+                    if not ready:
+                        first_ready = now
+                    ready.append(file_path)
+                elif st.st_size == 0 and now - entry['since'] >= self.EMPTY_FILE_TIMEOUT:
+                    del pending[file_path]
+                    print(f"⏭️  {file_path.name}: pusty od {self.EMPTY_FILE_TIMEOUT:.0f}s - pomijam do kolejnej zmiany")
+            
+            if ready and ((not pending and now - last_event >= self.BATCH_WINDOW)
+                          or now - first_ready >= self.MAX_BATCH_WAIT):
+                batch, ready = ready, []
+                self.process_batch(batch)
     
     def check_existing_files(self):
         """Sprawdź czy są już jakieś pliki do przetworzenia"""
@@ -163,13 +461,40 @@ class UltimateSmartReceiver:
             
             process_now = input("\n🔄 Przetworzyć teraz? (y/n): ").lower().strip()
             if process_now in ['y', 'yes', 'tak', '']:
-                for file in found_files:
-                    self.process_file_smart(file)
+                self.process_batch(found_files)
     
     def process_file_smart(self, file_path):
-        """Smart processing z cleanup i synchronizacją"""
-        print(f"\n🧹 SMART PROCESSING: {file_path.name}")
+        """Smart processing z cleanup i synchronizacją (pojedynczy plik)"""
+        self.process_batch([file_path])
+    
+    def process_batch(self, file_paths):
+        """Smart processing paczki plików z jednego kliknięcia.
         
+        Archiwizacja, cleanup, sync z Supabase, fresh brain i VS Code wykonują się raz na paczkę.
+        """
+        print(f"\n🧹 SMART PROCESSING: {', '.join(p.name for p in file_paths)}")
+        
+        # KROK 0: Pliki identyczne z już przetworzonymi tylko archiwizujemy
+        hashes = {}
+        for file_path in file_paths:
+            try:
+                hashes[file_path] = self.file_hash(file_path)
+            except OSError:
+                hashes[file_path] = None
+        
+        seen = [] if self.force else [p for p in file_paths if hashes[p] in self.manifest['bundles']]
+        for file_path in seen:
+            processed = self.manifest['bundles'][hashes[file_path]]
+            print(f"⏭️  {file_path.name}: identyczny plik przetworzono {processed['processed']} - pomijam")
+        if seen:
+            self.archive_incoming_files(seen)
+            file_paths = [p for p in file_paths if p not in seen]
+            if not file_paths:
+                print("🎉 Nic nowego - brain i projekt bez zmian")
+                return
+        
+        # Kroki paczki tylko zgłaszają pliki do otwarcia - VS Code otwierany raz, na końcu
+        self.editor_requests = []
         try:
             # KROK 1: Archiwizuj poprzednią sesję jeśli istnieje
             if self.has_active_session():
@@ -178,17 +503,21 @@ class UltimateSmartReceiver:
             # KROK 2: Wyczyść brain dla fresh start
             self.cleanup_brain()
             
-            # KROK 3: Przetwórz nowy plik
-            if file_path.name.endswith('.json'):
-                self.process_artifacts_bundle(file_path)
-            elif file_path.name.endswith('.sql'):
-                self.process_supabase_sql(file_path)
-            elif file_path.name.endswith('.md'):
-                self.process_deployment_guide(file_path)
-            elif file_path.name.endswith('.js'):
-                self.process_copilot_instructions(file_path)
-            elif file_path.name.endswith('.txt'):
-                self.process_text_file(file_path)
+            # KROK 3: Przetwórz nowe pliki - w manifeście tylko te w pełni wdrożone
+            # (błąd JSON, odmowa auto-wdrożenia lub nieudane artefakty = ponowna próba następnym razem)
+            for file_path in file_paths:
+                self.source_hash = hashes[file_path]
+                try:
+                    if self.process_incoming_file(file_path) and self.source_hash:
+                        self.manifest['bundles'][self.source_hash] = {
+                            'name': file_path.name,
+                            'processed': datetime.now().isoformat()
+                        }
+                except Exception as e:
+                    print(f"❌ Błąd przetwarzania {file_path.name}: {e}")
+                finally:
+                    self.source_hash = None
+            self.save_manifest()
             
             # KROK 4: Synchronizuj z Supabase
             self.sync_with_supabase()
@@ -196,16 +525,100 @@ class UltimateSmartReceiver:
             # KROK 5: Stwórz fresh brain context
             self.create_fresh_brain()
             
-            # KROK 6: Przenieś plik do archiwum
-            archive_file = self.history_dir / f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{file_path.name}"
-            if file_path.exists():
-                shutil.move(str(file_path), str(archive_file))
-                print(f"📁 Zarchiwizowano: {archive_file}")
+            # KROK 6: Przenieś pliki do archiwum
+            self.archive_incoming_files(file_paths)
             
-            print("🎉 SMART PROCESSING ZAKOŃCZONY!")
+            # KROK 7: Jedno otwarcie VS Code dla całej paczki
+            pending_editors, self.editor_requests = self.editor_requests, None
+            self.open_requested_editor(pending_editors)
+            
+            print(f"🎉 SMART PROCESSING ZAKOŃCZONY! ({len(file_paths)} plików)")
             
         except Exception as e:
             print(f"❌ Błąd smart processing: {e}")
+        finally:
+            self.editor_requests = None
+    
+    def archive_incoming_files(self, file_paths):
+        """Przenieś przetworzone pliki do archiwum"""
+        for file_path in file_paths:
+            archive_file = self.history_dir / f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{file_path.name}"
+            if file_path.exists():
+                shutil.move(str(file_path), str(archive_file))
+                print(f"📁 Zarchiwizowano: {archive_file}")
+    
+    def file_hash(self, file_path):
+        """SHA-256 treści pliku (czytanego blokami)"""
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
+    
+    def load_manifest(self):
+        """Wczytaj manifest wdrożeń (pusty, gdy brak lub uszkodzony)"""
+        try:
+            with open(self.manifest_file, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = {}
+        manifest.setdefault('files', {})
+        manifest.setdefault('bundles', {})
+        return manifest
+    
+    def save_manifest(self):
+        """Zapisz manifest atomowo (plik tymczasowy + os.replace)"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.deploy_dir, prefix='.manifest.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self.manifest, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self.manifest_file)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+    
+    def manifest_key(self, deployment_path):
+        try:
+            return deployment_path.relative_to(self.project_root).as_posix()
+        except ValueError:
+            return deployment_path.as_posix()
+    
+    def is_deployed(self, deployment_path, digest):
+        """Czy plik ma już treść z artefaktu o tym hashu i nikt go od tego czasu nie zmienił"""
+        entry = self.manifest['files'].get(self.manifest_key(deployment_path))
+        if not entry or entry['sha256'] != digest:
+            return False
+        try:
+            st = deployment_path.stat()
+        except OSError:
+            return False
+        return st.st_size == entry['size'] and st.st_mtime_ns == entry['mtime_ns']
+    
+    def record_deployment(self, deployment_path, digest):
+        st = deployment_path.stat()
+        self.manifest['files'][self.manifest_key(deployment_path)] = {
+            'sha256': digest,
+            'bundle': self.source_hash,
+            'size': st.st_size,
+            'mtime_ns': st.st_mtime_ns
+        }
+    
+    def process_incoming_file(self, file_path):
+        """Przetwórz jeden plik paczki wg rozszerzenia; True, gdy został w pełni przetworzony"""
+        if file_path.name.endswith('.json'):
+            return self.process_artifacts_bundle(file_path)
+        elif file_path.name.endswith('.sql'):
+            return self.process_supabase_sql(file_path)
+        elif file_path.name.endswith('.md'):
+            return self.process_deployment_guide(file_path)
+        elif file_path.name.endswith('.js'):
+            return self.process_copilot_instructions(file_path)
+        elif file_path.name.endswith('.txt'):
+            return self.process_text_file(file_path)
+        return False
     
     def has_active_session(self):
         """Sprawdź czy jest aktywna sesja"""
@@ -244,35 +657,28 @@ class UltimateSmartReceiver:
         print("✅ Brain wyczyszczony - fresh start!")
     
     def process_artifacts_bundle(self, bundle_path):
-        """Przetwórz bundle artefaktów z enhanced features"""
+        """Przetwórz bundle artefaktów z enhanced features; True, gdy wszystko zostało wdrożone"""
         print("📦 Przetwarzam bundle artefaktów...")
         
+        if bundle_path.stat().st_size > self.STREAM_BUNDLE_BYTES:
+            return self.process_artifacts_stream(bundle_path)
+        
         try:
             with open(bundle_path, 'r', encoding='utf-8') as f:
                 bundle = json.load(f)
         except json.JSONDecodeError as e:
             print(f"❌ Błąd parsowania JSON: {e}")
-            return
+            return False
         
         artifacts = bundle.get('artifacts', [])
         print(f"🔍 Znaleziono {len(artifacts)} artefaktów")
         
         if not artifacts:
             print("⚠️  Brak artefaktów w bundle")
-            return
+            return True
         
         # Zapisz metadata sesji
-        session_info = {
-            'timestamp': datetime.now().isoformat(),
-            'source': bundle.get('metadata', {}).get('source', 'Unknown'),
-            'artifacts_count': len(artifacts),
-            'extractor_version': bundle.get('metadata', {}).get('extractorVersion', 'Unknown'),
-            'chat_url': bundle.get('metadata', {}).get('chatUrl', 'Unknown'),
-            'bundle_type': self.detect_bundle_type(bundle_path.name)
-        }
-        
-        with open(self.brain_dir / 'CURRENT_SESSION.json', 'w', encoding='utf-8') as f:
-            json.dump(session_info, f, indent=2, ensure_ascii=False)
+        self.save_session_info(bundle_path, bundle.get('metadata', {}), len(artifacts))
         
         # Analizuj artefakty pod kątem Supabase
         supabase_artifacts = self.analyze_supabase_artifacts(artifacts)
@@ -281,9 +687,72 @@ class UltimateSmartReceiver:
         
         # Auto-deployment z enhanced logic
         if self.should_auto_deploy(artifacts):
-            self.auto_deploy_artifacts(artifacts)
-        else:
-            self.create_manual_deployment_instructions(artifacts)
+            return self.auto_deploy_artifacts(artifacts)
+        self.create_manual_deployment_instructions(artifacts)
+        return False
+    
+    def process_artifacts_stream(self, bundle_path):
+        """Przetwórz duży bundle strumieniowo - artefakty czytane po jednym, treść nie zostaje w pamięci"""
+        print("🌊 Duży bundle - czytam strumieniowo")
+        reader = ArtifactBundleReader(bundle_path)
+        
+        # Pierwsze przejście: metadata i podsumowania artefaktów (typ, język, tytuł, ścieżka)
+        try:
+            summaries = [self.summarize_artifact(artifact) for artifact in reader.artifacts()]
+            metadata = reader.bundle_metadata
+        except json.JSONDecodeError as e:
+            print(f"❌ Błąd parsowania JSON: {e}")
+            return False
+        
+        print(f"🔍 Znaleziono {len(summaries)} artefaktów")
+        
+        if not summaries:
+            print("⚠️  Brak artefaktów w bundle")
+            return True
+        
+        self.save_session_info(bundle_path, metadata, len(summaries))
+        
+        supabase_count = sum(1 for summary in summaries if summary['supabase'])
+        if supabase_count:
+            print(f"🗃️ Wykryto {supabase_count} artefaktów Supabase")
+        
+        # Drugie przejście: treść artefaktów prosto do wdrożenia/instrukcji, ze ścieżkami z pierwszego
+        artifacts = self.with_summary_paths(reader.artifacts(), summaries)
+        if self.should_auto_deploy(summaries):
+            return self.auto_deploy_artifacts(artifacts, summaries)
+        self.create_manual_deployment_instructions(artifacts, len(summaries))
+        return False
+    
+    def with_summary_paths(self, artifacts, summaries):
+        """Dołącz do artefaktów ścieżki wyliczone w podsumowaniach
+        
+        Ścieżka jest liczona raz - nazwa z czasem (generate_enhanced_filename) w drugim przejściu
+        mogłaby wyjść inna niż w podsumowaniu pokazanym przy konfliktach i zapisanym w brain.
+        """
+        for artifact, summary in zip(artifacts, summaries):
+            artifact['deploymentPath'] = summary['deploymentPath']
+            yield artifact
+    
+    def summarize_artifact(self, artifact):
+        """Artefakt bez treści - wystarcza do ostrzeżeń o konfliktach i aktualizacji brain"""
+        summary = {key: artifact[key] for key in ('type', 'language', 'title') if key in artifact}
+        summary['deploymentPath'] = self.get_deployment_path(artifact)
+        summary['supabase'] = self.is_supabase_artifact(artifact)
+        return summary
+    
+    def save_session_info(self, bundle_path, metadata, artifacts_count):
+        """Zapisz metadata sesji"""
+        session_info = {
+            'timestamp': datetime.now().isoformat(),
+            'source': metadata.get('source', 'Unknown'),
+            'artifacts_count': artifacts_count,
+            'extractor_version': metadata.get('extractorVersion', 'Unknown'),
+            'chat_url': metadata.get('chatUrl', 'Unknown'),
+            'bundle_type': self.detect_bundle_type(bundle_path.name)
+        }
+        
+        with open(self.brain_dir / 'CURRENT_SESSION.json', 'w', encoding='utf-8') as f:
+            json.dump(session_info, f, indent=2, ensure_ascii=False)
     
     def detect_bundle_type(self, filename):
         """Wykryj typ bundle na podstawie nazwy"""
@@ -298,20 +767,16 @@ class UltimateSmartReceiver:
     
     def analyze_supabase_artifacts(self, artifacts):
         """Analizuj artefakty pod kątem Supabase"""
-        supabase_artifacts = []
+        return [artifact for artifact in artifacts if self.is_supabase_artifact(artifact)]
+    
+    def is_supabase_artifact(self, artifact):
+        """Wykryj Supabase artifact"""
+        content = artifact.get('content', '').lower()
+        artifact_type = artifact.get('type', '')
         
-        for artifact in artifacts:
-            content = artifact.get('content', '').lower()
-            artifact_type = artifact.get('type', '')
-            
-            # Wykryj Supabase artifacts
-            if (artifact_type in ['database_schema', 'database_function', 'supabase_config'] or
+        return (artifact_type in ['database_schema', 'database_function', 'supabase_config'] or
                 'supabase' in content or 'create table' in content or 
-                'createclient' in content or 'rls' in content):
-                
-                supabase_artifacts.append(artifact)
-        
-        return supabase_artifacts
+                'createclient' in content or 'rls' in content)
     
     def should_auto_deploy(self, artifacts):
         """Sprawdź czy można bezpiecznie auto-wdrożyć (enhanced)"""
@@ -349,31 +814,43 @@ class UltimateSmartReceiver:
         
         return True
     
-    def auto_deploy_artifacts(self, artifacts):
-        """Enhanced auto-deployment dla Next.js"""
+    def auto_deploy_artifacts(self, artifacts, summaries=None):
+        """Enhanced auto-deployment dla Next.js
+        
+        Z `summaries` (podsumowania z process_artifacts_stream) `artifacts` jest strumieniem:
+        wdrażany jest paczkami w kolejności z bundle, bez sortowania wszystkich naraz.
+        Zwraca True, gdy żaden artefakt nie został pominięty.
+        """
         print("\n🚀 ENHANCED AUTO-DEPLOYMENT")
         print("=" * 40)
         
         deployed = 0
+        unchanged = 0
         skipped = 0
         supabase_files = 0
         
-        # Sortuj artefakty: najpierw Supabase, potem reszta
-        sorted_artifacts = self.sort_artifacts_by_priority(artifacts)
-        
-        for i, artifact in enumerate(sorted_artifacts, 1):
-            try:
-                deployment_path = self.get_deployment_path(artifact)
-                
-                # Stwórz folder jeśli nie istnieje
-                deployment_path.parent.mkdir(parents=True, exist_ok=True)
-                
-                # Enhanced content processing
-                content = self.process_artifact_content(artifact, deployment_path)
+        if summaries is None:
+            # Sortuj artefakty: najpierw Supabase, potem reszta
+            batches = [self.sort_artifacts_by_priority(artifacts)]
+        else:
+            batches = self.deployment_batches(artifacts)
+        
+        start = 1
+        for batch in batches:
+            # Najpierw ścieżki i treść całej paczki, potem jeden wspólny zapis
+            planned, errors = self.plan_deployment(batch, start)
+            failed = self.deploy_files(planned)
+            start += len(batch)
+            
+            for i, deployment_path, content, _ in planned:
+                if i in failed:
+                    errors[i] = failed[i]
+                    continue
                 
-                # Zapisz plik
-                with open(deployment_path, 'w', encoding='utf-8') as f:
-                    f.write(content)
+                if content is None:
+                    print(f"⏭️  {i:2d}. {deployment_path.relative_to(self.project_root)} (bez zmian)")
+                    unchanged += 1
+                    continue
                 
                 # Kategoryzuj output
                 if 'supabase' in str(deployment_path):
@@ -383,21 +860,161 @@ class UltimateSmartReceiver:
                     print(f"✅ {i:2d}. {deployment_path.relative_to(self.project_root)}")
                 
                 deployed += 1
-                
-            except Exception as e:
+            
+            for i, e in sorted(errors.items()):
                 print(f"❌ {i:2d}. Błąd: {e}")
                 skipped += 1
         
+        self.save_manifest()
+        
         print(f"\n🎉 ENHANCED DEPLOYMENT COMPLETE!")
         print(f"✅ Wdrożono: {deployed}")
+        print(f"⏭️  Bez zmian: {unchanged}")
         print(f"🗃️ Supabase: {supabase_files}")
         print(f"❌ Pominięto: {skipped}")
         
         # Aktualizuj enhanced brain
-        self.update_enhanced_brain(artifacts)
+        self.update_enhanced_brain(artifacts if summaries is None else summaries)
         
         # Otwórz VS Code
         self.open_vscode()
+        return skipped == 0
+    
+    def deployment_batches(self, artifacts):
+        """Podziel strumień artefaktów na paczki ograniczone liczbą i rozmiarem treści"""
+        batch = []
+        size = 0
+        for artifact in artifacts:
+            batch.append(artifact)
+            size += len(artifact.get('content', ''))
+            if len(batch) >= self.DEPLOY_BATCH or size >= self.DEPLOY_BATCH_BYTES:
+                yield batch
+                batch = []
+                size = 0
+        if batch:
+            yield batch
+    
+    def plan_deployment(self, sorted_artifacts, start=1):
+        """Wylicz ścieżki i treść artefaktów: ([(nr, ścieżka, treść, hash)], {nr: błąd})
+        
+        Artefakt, którego treść (hash) jest już wdrożona pod tą ścieżką, ma treść None - nie jest zapisywany.
+        """
+        planned = []
+        errors = {}
+        
+        for i, artifact in enumerate(sorted_artifacts, start):
+            try:
+                deployment_path = self.get_deployment_path(artifact)
+                digest = hashlib.sha256(artifact.get('content', '').encode('utf-8')).hexdigest()
+                if not self.force and self.is_deployed(deployment_path, digest):
+                    content = None
+                else:
+                    content = self.process_artifact_content(artifact, deployment_path)
+                planned.append((i, deployment_path, content, digest))
+            except Exception as e:
+                errors[i] = e
+        
+        return planned, errors
+    
+    def deploy_files(self, planned):
+        """Zapisz zaplanowane pliki równolegle i atomowo, zwróć {nr: błąd} dla nieudanych
+        
+        Każdy plik trafia najpierw do pliku tymczasowego w docelowym folderze (zapis + fsync
+        w puli wątków), a dopiero potem jest podmieniany przez os.replace - przerwany
+        deployment zostawia stary plik albo nowy, nigdy ucięty.
+        """
+        failed = {}
+        
+        # Przy powtórzonej ścieżce wygrywa ostatni artefakt (jak przy zapisie po kolei);
+        # pliki bez zmian (treść None) nie są dotykane
+        latest = {}
+        for i, deployment_path, content, digest in planned:
+            latest[deployment_path] = (i, content, digest)
+        latest = {path: entry for path, entry in latest.items() if entry[1] is not None}
+        
+        # Każdy folder docelowy tworzony raz
+        directories = {deployment_path.parent for deployment_path in latest}
+        for directory in sorted(directories):
+            try:
+                directory.mkdir(parents=True, exist_ok=True)
+            except OSError as e:
+                for deployment_path, (i, _, _) in latest.items():
+                    if deployment_path.parent == directory:
+                        failed[i] = e
+        
+        jobs = [(deployment_path, content) for deployment_path, (i, content, _) in latest.items()
+                if i not in failed]
+        staged = []
+        if jobs:
+            with ThreadPoolExecutor(max_workers=min(self.DEPLOY_WORKERS, len(jobs))) as pool:
+                results = pool.map(lambda job: self.stage_file(*job), jobs)
+                for (deployment_path, _), (tmp_path, error) in zip(jobs, results):
+                    if error is None:
+                        staged.append((deployment_path, tmp_path))
+                    else:
+                        failed[latest[deployment_path][0]] = error
+        
+        # Wszystkie treści są już na dysku - podmień pliki i utrwal wpisy w folderach
+        for deployment_path, tmp_path in staged:
+            try:
+                os.replace(tmp_path, deployment_path)
+            except OSError as e:
+                failed[latest[deployment_path][0]] = e
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+            else:
+                self.record_deployment(deployment_path, latest[deployment_path][2])
+        self.fsync_directories(directories)
+        
+        return failed
+    
+    def stage_file(self, deployment_path, content):
+        """Zapisz treść do pliku tymczasowego obok celu (z fsync), zwróć (ścieżka tymczasowa, błąd)
+        
+        Plik dostaje uprawnienia istniejącego celu, a nowy - domyślne wg umask z startu programu.
+        """
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=deployment_path.parent,
+                                            prefix=f'.{deployment_path.name}.', suffix='.tmp')
+        except OSError as e:
+            return None, e
+        
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(content)
+                f.flush()
+                os.fsync(f.fileno())
+            try:
+                mode = stat.S_IMODE(os.stat(deployment_path).st_mode)
+            except OSError:
+                mode = self.default_file_mode
+            os.chmod(tmp_path, mode)
+            return tmp_path, None
+        except Exception as e:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            return None, e
+    
+    def fsync_directories(self, directories):
+        """Utrwal wpisy podmienionych plików - jeden fsync na folder (tylko POSIX)"""
+        if os.name != 'posix':
+            return
+        
+        for directory in directories:
+            try:
+                fd = os.open(directory, os.O_RDONLY)
+            except OSError:
+                continue
+            try:
+                os.fsync(fd)
+            except OSError:
+                pass
+            finally:
+                os.close(fd)
     
     def sort_artifacts_by_priority(self, artifacts):
         """Sortuj artefakty według priorytetu wdrożenia"""
@@ -445,6 +1062,10 @@ class UltimateSmartReceiver:
     
     def get_deployment_path(self, artifact):
         """Enhanced deployment path z lepszym mapowaniem"""
+        # Podsumowanie artefaktu (summarize_artifact) ma ścieżkę już wyliczoną z pełnej treści
+        if 'deploymentPath' in artifact:
+            return artifact['deploymentPath']
+        
         artifact_type = artifact.get('type', 'code_snippet')
         
         # Użyj ulepszonego mapowania
@@ -545,6 +1166,7 @@ class UltimateSmartReceiver:
         shutil.copy2(sql_path, target_path)
         
         print(f"✅ SQL zapisany: {target_path}")
+        return True
     
     def process_deployment_guide(self, guide_path):
         """Przetwórz przewodnik deployment"""
@@ -554,6 +1176,7 @@ class UltimateSmartReceiver:
         shutil.copy2(guide_path, target_path)
         
         print(f"✅ Przewodnik zapisany: {target_path}")
+        return True
     
     def process_copilot_instructions(self, instructions_path):
         """Przetwórz instrukcje Copilot"""
@@ -563,6 +1186,7 @@ class UltimateSmartReceiver:
         shutil.copy2(instructions_path, target_path)
         
         print(f"✅ Instrukcje Copilot zapisane: {target_path}")
+        return True
     
     def process_text_file(self, text_path):
         """Przetwórz plik tekstowy"""
@@ -584,14 +1208,15 @@ class UltimateSmartReceiver:
                 print(f"🔍 Wyodrębniono {len(artifacts)} artefaktów z pliku tekstowego")
                 
                 if self.should_auto_deploy(artifacts):
-                    self.auto_deploy_artifacts(artifacts)
-                else:
-                    self.create_manual_deployment_instructions(artifacts)
-            else:
-                print("📄 Plik tekstowy przeniesiony do brain")
+                    return self.auto_deploy_artifacts(artifacts)
+                self.create_manual_deployment_instructions(artifacts)
+                return False
+            print("📄 Plik tekstowy przeniesiony do brain")
+            return True
                 
         except Exception as e:
             print(f"❌ Błąd przetwarzania pliku tekstowego: {e}")
+            return False
     
     def parse_text_artifact(self, raw_text):
         """Parsuj artefakt z tekstu"""
@@ -781,26 +1406,36 @@ Projekt został znacznie rozszerzony!
         
         print(f"🧠 Enhanced brain zaktualizowany: {brain_file}")
     
-    def create_manual_deployment_instructions(self, artifacts):
-        """Stwórz enhanced instrukcje do ręcznego wdrożenia"""
+    def create_manual_deployment_instructions(self, artifacts, count=None):
+        """Stwórz enhanced instrukcje do ręcznego wdrożenia
+        
+        Instrukcje są dopisywane do pliku artefakt po artefakcie, więc `artifacts` może być
+        strumieniem (wtedy `count` podaje ich liczbę).
+        """
         print("📋 Tworzę enhanced instrukcje...")
         
-        instructions = f'''/* 🤖 ENHANCED COPILOT DEPLOYMENT INSTRUCTIONS
+        if count is None:
+            count = len(artifacts)
+        
+        # Zapisz instrukcje
+        instructions_file = self.brain_dir / 'COPILOT_DEPLOYMENT.js'
+        with open(instructions_file, 'w', encoding='utf-8') as f:
+            f.write(f'''/* 🤖 ENHANCED COPILOT DEPLOYMENT INSTRUCTIONS
 Wygenerowano: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 Źródło: Claude Artifacts Bundle (Enhanced)
-Liczba artefaktów: {len(artifacts)}
+Liczba artefaktów: {count}
 
 🎯 COPILOT: Wdróż te artefakty automatycznie w Next.js!
 
 === ENHANCED DEPLOYMENT ===
 
-'''
+''')
         
-        for i, artifact in enumerate(artifacts, 1):
-            try:
-                deployment_path = self.get_deployment_path(artifact)
+            for i, artifact in enumerate(artifacts, 1):
+                try:
+                    deployment_path = self.get_deployment_path(artifact)
                 
-                instructions += f'''
+                    f.write(f'''
 📦 ENHANCED ARTEFAKT #{i}:
    📝 Tytuł: {artifact['title']}
    📍 Ścieżka: {deployment_path.relative_to(self.project_root)}
@@ -815,17 +1450,17 @@ Liczba artefaktów: {len(artifacts)}
    
    ✅ Oznacz jako wdrożone
    
-'''
-            except Exception as e:
-                instructions += f'''
+''')
+                except Exception as e:
+                    f.write(f'''
 📦 ARTEFAKT #{i}:
    ❌ Błąd generowania ścieżki: {e}
    📝 Tytuł: {artifact.get('title', 'Unknown')}
    🏷️  Typ: {artifact.get('type', 'unknown')}
    
-'''
+''')
         
-        instructions += '''
+            f.write('''
 🎉 ENHANCED DEPLOYMENT READY!
 
 🎯 INSTRUKCJE:
@@ -840,20 +1475,37 @@ Liczba artefaktów: {len(artifacts)}
 - TypeScript priority (.tsx, .ts)
 
 */
-'''
-        
-        # Zapisz instrukcje
-        instructions_file = self.brain_dir / 'COPILOT_DEPLOYMENT.js'
-        with open(instructions_file, 'w', encoding='utf-8') as f:
-            f.write(instructions)
+''')
         
         print(f"📄 Enhanced instrukcje zapisane: {instructions_file}")
         
         # Otwórz VS Code z instrukcjami
         self.open_vscode_with_file(instructions_file)
     
+    def request_editor(self, file_path=None):
+        """W trakcie paczki zapamiętuje plik do otwarcia zamiast od razu uruchamiać VS Code"""
+        if self.editor_requests is None:
+            return False
+        if file_path not in self.editor_requests:
+            self.editor_requests.append(file_path)
+        return True
+    
+    def open_requested_editor(self, pending_editors):
+        """Otwiera VS Code raz dla wszystkich zgłoszeń z paczki"""
+        files = [path for path in pending_editors if path is not None]
+        if not files:
+            if pending_editors:
+                self.open_vscode()
+            return
+        brain_file = self.brain_dir / 'COPILOT_CONTEXT.js'
+        if None in pending_editors and brain_file.exists() and brain_file not in files:
+            files.insert(0, brain_file)
+        self.open_vscode_with_file(*files)
+    
     def open_vscode(self):
         """Otwórz VS Code w projekcie"""
+        if self.request_editor():
+            return
         try:
             print("🎯 Otwieramy VS Code...")
             os.system('code .')
@@ -869,17 +1521,22 @@ Liczba artefaktów: {len(artifacts)}
         except Exception as e:
             print(f"⚠️  Nie można otworzyć VS Code: {e}")
     
-    def open_vscode_with_file(self, file_path):
-        """Otwórz VS Code z konkretnym plikiem"""
+    def open_vscode_with_file(self, *file_paths):
+        """Otwórz VS Code z konkretnymi plikami"""
+        if self.editor_requests is not None:
+            for file_path in file_paths:
+                self.request_editor(file_path)
+            return
         try:
             print("🎯 Otwieramy VS Code...")
             
             # Otwórz projekt
             os.system('code .')
             
-            # Czekaj chwilę i otwórz plik
+            # Czekaj chwilę i otwórz pliki
             time.sleep(2)
-            os.system(f'code "{file_path}"')
+            for file_path in file_paths:
+                os.system(f'code "{file_path}"')
             
             print("✅ VS Code otwarty z enhanced instrukcjami!")
             print()
@@ -891,40 +1548,53 @@ Liczba artefaktów: {len(artifacts)}
             
         except Exception as e:
             print(f"⚠️  Nie można otworzyć VS Code: {e}")
-            print(f"Otwórz ręcznie: {file_path}")
+            print(f"Otwórz ręcznie: {', '.join(str(path) for path in file_paths)}")
 
 if WATCHDOG_AVAILABLE:
     class SmartWatcher(FileSystemEventHandler):
-        """Enhanced obserwator foldera Downloads"""
+        """Enhanced obserwator foldera Downloads - tylko kolejkuje zdarzenia, przetwarza wątek roboczy"""
         
         def __init__(self, receiver):
             self.receiver = receiver
         
+        def queue_file(self, path, closed=False):
+            file_path = Path(path)
+            if self.receiver.is_watched_file(file_path):
+                self.receiver.enqueue_file(file_path, closed)
+        
         def on_created(self, event):
-            if event.is_directory:
-                return
-            
-            file_path = Path(event.src_path)
-            
-            # Sprawdź czy to nasz plik
-            is_our_file = any(pattern in file_path.name for pattern in self.receiver.watch_patterns)
-            
-            if is_our_file:
-                print(f"\n🔔 Wykryto enhanced plik: {file_path.name}")
-                
-                # Czekaj aż plik będzie w pełni zapisany
-                time.sleep(2)
-                
-                self.receiver.process_file_smart(file_path)
+            if not event.is_directory:
+                self.queue_file(event.src_path)
+        
+        def on_modified(self, event):
+            if not event.is_directory:
+                self.queue_file(event.src_path)
+        
+        def on_moved(self, event):
+            # Np. claude-artifacts-bundle.json.crdownload -> claude-artifacts-bundle.json: pobieranie zakończone
+            if not event.is_directory:
+                self.queue_file(event.dest_path, closed=True)
+        
+        def on_closed(self, event):
+            # Zamknięcie po zapisie (inotify IN_CLOSE_WRITE) - plik kompletny bez czekania
+            if not event.is_directory:
+                self.queue_file(event.src_path, closed=True)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Ultimate Smart Receiver - wdrażanie artefaktów z Downloads")
+    parser.add_argument('--force', action='store_true',
+                        help="przetwórz i wdróż ponownie pliki oraz artefakty zapisane już w manifeście")
+    return parser.parse_args(argv)
 
-def main():
+def main(argv=None):
     """Główna funkcja"""
+    args = parse_args(argv)
     print("🧹 ULTIMATE SMART RECEIVER")
     print("=" * 50)
     print("Enhanced system z cleanup + Supabase + Next.js!")
     print()
     
-    receiver = UltimateSmartReceiver()
+    receiver = UltimateSmartReceiver(force=args.force)
     
     if WATCHDOG_AVAILABLE:
         receiver.start_monitoring()